@@ -1 +1 @@
-
+__version__ = '1.4.48'
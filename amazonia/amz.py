@@ -7,9 +7,13 @@ Ingest User YAML and defaults YAML and send to yaml class to return as one unifi
 import os
 import argparse
 import sys
+from amazonia.classes.environment_matrix import EnvironmentMatrix, get_overlays, get_region_environments, \
+    get_environment_template_path
 from amazonia.classes.yaml import Yaml
 from amazonia.classes.stack import Stack
-from amazonia.classes.util import read_yaml
+from amazonia.classes.template_cache import TemplateCache
+from amazonia.classes.template_parameters import TemplateParameters, parameter_names
+from amazonia.classes.util import read_yaml, get_content_hash, PhaseTimer
 
 
 def create_stack(united_data):
@@ -24,22 +28,54 @@ def create_stack(united_data):
     return stack
 
 
-def generate_template(yaml_data, default_data):
+def generate_template(yaml_data, default_data, indent=2, separators=(',', ': '), on_phase=None,
+                      validate_defaults=True, parameters=None):
     """
     Generate troposhere template from given yaml data
     :param yaml_data: User yaml data
     :param default_data: default yaml data
+    :param indent: json indentation of the template, None for a single line template
+    :param separators: json item and key separators of the template
+    :param on_phase: function called with the name and duration in seconds of the validate, merge, build and
+    serialize phases as each one ends
+    :param validate_defaults: False to skip validating default data that has already been validated
+    :param parameters: list of yaml fields to turn into cloud formation parameters, e.g. ['image_id', 'keypair']
     :return: Troposphere generated cloud formation template
     """
-    yaml_return = Yaml(yaml_data, default_data)
+    phase_timer = PhaseTimer(on_phase)
+    Yaml.validate_yaml(yaml_data, Yaml.cerberus_schema)
+    if validate_defaults:
+        Yaml.validate_yaml(default_data, Yaml.cerberus_schema)
+    phase_timer.end('validate')
+
+    yaml_return = Yaml(yaml_data, default_data, validate=False)
     stack_input = yaml_return.united_data
+    if parameters:
+        template_parameters = TemplateParameters(parameters)
+        stack_input = template_parameters.parameterise(stack_input)
+    phase_timer.end('merge')
 
     # Create stack and create stack template file
     template_trop = create_stack(stack_input)
-    template_data = template_trop.template.to_json(indent=2, separators=(',', ': '))
+    if parameters:
+        template_parameters.add_to_template(template_trop.template)
+    phase_timer.end('build')
+
+    template_data = template_trop.template.to_json(indent=indent, separators=separators)
+    phase_timer.end('serialize')
     return template_data
 
 
+def validate_template(yaml_data, default_data):
+    """
+    Validate given yaml data without generating a template
+    :param yaml_data: User yaml data
+    :param default_data: default yaml data
+    :return: list of every error found, empty if the yaml data is valid
+    """
+    return Yaml(yaml_data, default_data, collect_errors=True).errors
+
+
 def main():
     """
     Ingest User YAML as user_stack_data
@@ -65,17 +101,77 @@ def main():
     parser.add_argument('-o', '--out',
                         action='store_true',
                         help='Output template to stdout rather than a file.')
+    parser.add_argument('--validate-only',
+                        action='store_true',
+                        help='Validate the yaml files and report every error without creating a template.')
+    parser.add_argument('-c', '--cache',
+                        help='Path to a template cache database shared with other amazonia processes, templates for '
+                             'unchanged yaml files are read from the cache rather than generated')
+    parser.add_argument('--yaml-cache',
+                        help='Directory to cache parsed yaml files in, unchanged yaml files are not parsed again. '
+                             'Defaults to the AMAZONIA_YAML_CACHE environment variable')
+    parser.add_argument('-m', '--matrix',
+                        help='Path to a matrix yaml file of environment names and the values each environment '
+                             'overrides in the application yaml. A template is created per environment, named after '
+                             'the template path and the environment, e.g. stack-prod.template')
+    parser.add_argument('-p', '--parameters',
+                        nargs='+',
+                        choices=list(parameter_names),
+                        help='Yaml fields to create as cloud formation parameters rather than literal values, so that '
+                             'one template can serve every environment. Parameters default to the merged yaml value. '
+                             'Checks across fields, e.g. minsize <= maxsize, only apply to the merged values')
+    parser.add_argument('-r', '--regions',
+                        help='Path to a regions yaml file of region names and the values each region overrides in the '
+                             'defaults yaml, e.g. availability_zones and image ids. A template is created per region, '
+                             'or per environment and region with --matrix, e.g. stack-prod-us-east-1.template')
     args = parser.parse_args()
+    if (args.matrix or args.regions) and (args.out or args.validate_only or args.cache):
+        parser.error('--matrix and --regions can not be used with --out, --validate-only or --cache')
 
     # YAML ingestion
-    user_stack_data = read_yaml(args.yaml)
-    default_data = read_yaml(args.default)
+    user_stack_data = read_yaml(args.yaml, args.yaml_cache)
+    default_data = read_yaml(args.default, args.yaml_cache)
+
+    if args.validate_only:
+        errors = validate_template(user_stack_data, default_data)
+        for error in errors:
+            sys.stderr.write(error + '\n')
+        if errors:
+            sys.exit(1)
+        print('Amazonia has successfully validated: {0}'.format(args.yaml))
+        return
+
+    if args.matrix or args.regions:
+        environments = get_overlays(read_yaml(args.matrix, args.yaml_cache)) if args.matrix else None
+        default_overlays = None
+        if args.regions:
+            environments, default_overlays = get_region_environments(
+                environments, get_overlays(read_yaml(args.regions, args.yaml_cache), 'regions'))
+        environment_matrix = EnvironmentMatrix(user_stack_data, default_data, environments,
+                                               default_overlays=default_overlays)
+        for environment, template_data in environment_matrix.generate(parameters=args.parameters).items():
+            template_file_path = get_environment_template_path(args.template, environment)
+            with open(template_file_path, 'w') as template_file:
+                template_file.write(template_data)
+            print('Amazonia has successfully created {0} stack template at location: {1}'
+                  .format(environment, template_file_path))
+        return
 
     # Create stack and create stack template file
     template_file_path = args.template
     send_to_output = args.out
 
-    template_data = generate_template(user_stack_data, default_data)
+    if args.cache:
+        template_cache = TemplateCache(args.cache)
+        with open(args.yaml, 'r') as user_yaml, open(args.default, 'rb') as default_yaml:
+            template_key = TemplateCache.get_key(user_yaml.read(), get_content_hash(default_yaml.read()),
+                                                 options=sorted(args.parameters or []))
+        template_data = template_cache.get(template_key)
+        if template_data is None:
+            template_data = generate_template(user_stack_data, default_data, parameters=args.parameters)
+            template_cache.put(template_key, template_data)
+    else:
+        template_data = generate_template(user_stack_data, default_data, parameters=args.parameters)
 
     if send_to_output is True:
         sys.stdout.write(template_data)
@@ -0,0 +1,280 @@
+#!/usr/bin/python3
+
+import troposphere.elasticloadbalancingv2 as elbv2
+from amazonia.classes.security_enabled_object import LocalSecurityEnabledObject, LocalReferenceSecurityEnabledObject
+from troposphere import Tags, Ref, Output, Join, GetAtt, route53
+
+
+def get_listener_title(title, loadbalancer_port):
+    """
+    :param title: title of the unit owning the application load balancer
+    :param loadbalancer_port: port of the listener
+    :return: title of the application load balancer's listener on the port
+    """
+    return '{0}Listener{1}'.format(title, loadbalancer_port)
+
+
+def get_target_metrics(load_balancer, target_group):
+    """
+    Identify the cloudwatch metrics of a target group, which only exist once the stack has created it
+    :param load_balancer: application load balancer, or the title of another unit's application load balancer
+    :param target_group: target group the autoscaling group registers its instances with
+    :return: ALBRequestCountPerTarget resource label, list of (name, value) AWS/ApplicationELB metric dimensions
+    """
+    load_balancer_name = GetAtt(load_balancer, 'LoadBalancerFullName')
+    target_group_name = GetAtt(target_group, 'TargetGroupFullName')
+    return Join('/', [load_balancer_name, target_group_name]), [('LoadBalancer', load_balancer_name),
+                                                                ('TargetGroup', target_group_name)]
+
+
+def get_shared_load_balancer_errors(units, zd_units=None):
+    """
+    Check that units sharing an application load balancer share one that exists, on ports it listens on, with rule
+    priorities that are unique on the load balancer
+    :param units: list of autoscaling unit dicts, with elb_config config objects
+    :param zd_units: list of zd autoscaling unit dicts, which cannot share load balancers
+    :return: list of error strings
+    """
+    errors = []
+    for unit in zd_units or []:
+        if unit.get('elb_config') is not None and unit['elb_config'].shared_load_balancer:
+            errors.append("Error: zd autoscaling unit '{0}' cannot share a load balancer, its blue and green groups "
+                          "each need their own.".format(unit['unit_title']))
+    load_balancers = dict((unit['unit_title'], unit['elb_config']) for unit in units
+                          if unit.get('elb_config') is not None)
+    rule_priorities = {}
+    for unit_title, elb_config in load_balancers.items():
+        shared_load_balancer = elb_config.shared_load_balancer
+        if not shared_load_balancer:
+            continue
+        owner_config = load_balancers.get(shared_load_balancer)
+        if owner_config is None or owner_config.load_balancer_type != 'application' or \
+                owner_config.shared_load_balancer:
+            errors.append("Error: unit '{0}' shares load balancer '{1}', which is not the application load balancer "
+                          "of an autoscaling unit.".format(unit_title, shared_load_balancer))
+            continue
+        owner_ports = [listener.loadbalancer_port for listener in owner_config.elb_listeners_config or []]
+        for listener in elb_config.elb_listeners_config or []:
+            if listener.loadbalancer_port not in owner_ports:
+                errors.append("Error: unit '{0}' routes port {1}, which load balancer '{2}' does not listen on."
+                              .format(unit_title, listener.loadbalancer_port, shared_load_balancer))
+        priority_key = (shared_load_balancer, int(elb_config.rule_priority))
+        if priority_key in rule_priorities:
+            errors.append("Error: units '{0}' and '{1}' have the same rule_priority {2} on load balancer '{3}'."
+                          .format(rule_priorities[priority_key], unit_title, elb_config.rule_priority,
+                                  shared_load_balancer))
+        rule_priorities[priority_key] = unit_title
+    return errors
+
+
+def create_target_groups(title, template, network_config, elb_config):
+    """
+    Create a target group per instance port, which autoscaling groups register their instances with
+    AWS Cloud Formation:
+    https://docs.aws.amazon.com/AWSCloudFormation/latest/UserGuide/aws-resource-elasticloadbalancingv2-targetgroup.html
+    :param title: title of the unit
+    :param template: The troposphere template to add the target groups to
+    :param network_config: object containing network related variables
+    :param elb_config: object containing elb related variables
+    :return: dictionary of instance ports and their target groups
+    """
+    health_check_protocol, health_check_target = elb_config.elb_health_check.split(':', 1)
+    health_check_port, _, health_check_path = health_check_target.partition('/')
+
+    target_groups = {}
+    for listener in elb_config.elb_listeners_config:
+        if listener.instance_port in target_groups:
+            continue
+        target_group = elbv2.TargetGroup(
+            '{0}Tg{1}'.format(title, listener.instance_port),
+            HealthCheckIntervalSeconds=elb_config.interval,
+            HealthCheckPath='/' + health_check_path,
+            HealthCheckPort=health_check_port,
+            HealthCheckProtocol=health_check_protocol,
+            HealthCheckTimeoutSeconds=elb_config.timeout,
+            HealthyThresholdCount=elb_config.healthy_threshold,
+            UnhealthyThresholdCount=elb_config.unhealthy_threshold,
+            Port=listener.instance_port,
+            Protocol=listener.instance_protocol,
+            VpcId=network_config.vpc,
+            Tags=Tags(owner=elb_config.owner)
+        )
+        target_group_attributes = []
+        if elb_config.slow_start:
+            target_group_attributes.append(
+                elbv2.TargetGroupAttribute(Key='slow_start.duration_seconds', Value=str(elb_config.slow_start)))
+        if elb_config.connection_draining_timeout is not None:
+            target_group_attributes.append(elbv2.TargetGroupAttribute(
+                Key='deregistration_delay.timeout_seconds', Value=str(elb_config.connection_draining_timeout)))
+        if target_group_attributes:
+            target_group.TargetGroupAttributes = target_group_attributes
+        target_groups[listener.instance_port] = template.add_resource(target_group)
+    return target_groups
+
+
+class Alb(LocalSecurityEnabledObject):
+    def __init__(self, title, template, network_config, elb_config):
+        """
+        Public Class to create an Application Loadbalancer in the unit stack environment, with a listener per
+        loadbalancer port forwarding to a target group per instance port. Other units can share the load balancer
+        with a SharedAlb.
+        AWS Cloud Formation, pages under https://docs.aws.amazon.com/AWSCloudFormation/latest/UserGuide/:
+        aws-resource-elasticloadbalancingv2-loadbalancer.html
+        aws-resource-elasticloadbalancingv2-listener.html
+        Troposphere: https://github.com/cloudtools/troposphere/blob/master/troposphere/elasticloadbalancingv2.py
+        :param title: Name of the Cloud formation stack object
+        :param template: The troposphere template to add the Application Loadbalancer to.
+        :param network_config: object containing network related variables
+        :param elb_config: object containing elb related variables, including list of listeners (elb_listener_config)
+        """
+        self.elb_r53 = None
+        self.elb_config = elb_config
+        self.network_config = network_config
+        super(Alb, self).__init__(vpc=network_config.vpc, title=title, template=template)
+        subnets = network_config.public_subnets if elb_config.public_unit is True else network_config.private_subnets
+
+        self.trop_elb = self.template.add_resource(
+            elbv2.LoadBalancer(self.title,
+                               Scheme='internet-facing' if elb_config.public_unit is True else 'internal',
+                               SecurityGroups=[self.security_group],
+                               Subnets=subnets,
+                               Tags=Tags(Name=self.title, owner=elb_config.owner)))
+        if network_config.get_depends_on():
+            self.trop_elb.DependsOn = network_config.get_depends_on()
+
+        load_balancer_attributes = []
+        # Create ALB Log Bucket
+        if elb_config.elb_log_bucket:
+            load_balancer_attributes += [
+                elbv2.LoadBalancerAttributes(Key='access_logs.s3.enabled', Value='true'),
+                elbv2.LoadBalancerAttributes(Key='access_logs.s3.bucket', Value=elb_config.elb_log_bucket),
+                elbv2.LoadBalancerAttributes(Key='access_logs.s3.prefix',
+                                             Value=Join('', [Ref('AWS::StackName'), '-', self.title]))]
+        if elb_config.idle_timeout is not None:
+            load_balancer_attributes.append(elbv2.LoadBalancerAttributes(Key='idle_timeout.timeout_seconds',
+                                                                         Value=str(elb_config.idle_timeout)))
+        if load_balancer_attributes:
+            self.trop_elb.LoadBalancerAttributes = load_balancer_attributes
+
+        target_groups = create_target_groups(self.title, self.template, network_config, elb_config)
+        self.target_groups = list(target_groups.values())
+        # target groups that autoscaling groups register their instances with
+        self.targets = self.target_groups
+        # metrics of the first listener's target group, used by request count scaling policies
+        self.metric_namespace = 'AWS/ApplicationELB'
+        self.resource_label, self.metric_dimensions = get_target_metrics(self.trop_elb, self.target_groups[0])
+
+        self.listeners = []
+        for listener_config in elb_config.elb_listeners_config:
+            listener = elbv2.Listener(
+                get_listener_title(self.title, listener_config.loadbalancer_port),
+                DefaultActions=[elbv2.Action(Type='forward',
+                                             TargetGroupArn=Ref(target_groups[listener_config.instance_port]))],
+                LoadBalancerArn=Ref(self.trop_elb),
+                Port=listener_config.loadbalancer_port,
+                Protocol=listener_config.loadbalancer_protocol
+            )
+            # Create SSL for Listeners
+            if elb_config.ssl_certificate_id and listener_config.loadbalancer_protocol == 'HTTPS':
+                listener.Certificates = [elbv2.Certificate(CertificateArn=elb_config.ssl_certificate_id)]
+            self.listeners.append(self.template.add_resource(listener))
+        # resources that must exist before instances can be registered with the target groups
+        self.target_dependencies = [listener.title for listener in self.listeners]
+
+        if not elb_config.public_unit:
+            self.create_r53_record(network_config.private_hosted_zone_domain)
+        elif network_config.public_hosted_zone_name:
+            self.create_r53_record(network_config.public_hosted_zone_name)
+        else:
+            self.template.add_output(Output(
+                self.trop_elb.title,
+                Description='URL of the {0} ALB'.format(self.title),
+                Value=Join('', ['http://', GetAtt(self.trop_elb, 'DNSName')])
+            ))
+
+        self.network_config.endpoints[title] = GetAtt(self.trop_elb, 'DNSName')
+
+    def create_r53_record(self, hosted_zone_name):
+        """
+        Function to create r53 recourdset to associate with ALB
+        :param hosted_zone_name: R53 hosted zone to create record in
+        """
+        if self.elb_config.public_unit:
+            name = Join('', [Ref('AWS::StackName'),
+                             '-',
+                             self.title,
+                             '.',
+                             hosted_zone_name])
+        else:
+            name = Join('', [self.title,
+                             '.',
+                             hosted_zone_name])
+        self.elb_r53 = self.template.add_resource(route53.RecordSetGroup(
+            self.title + 'R53',
+            RecordSets=[route53.RecordSet(
+                Name=name,
+                AliasTarget=route53.AliasTarget(dnsname=GetAtt(self.trop_elb, 'DNSName'),
+                                                hostedzoneid=GetAtt(self.trop_elb, 'CanonicalHostedZoneID')),
+                Type='A')]))
+
+        if not self.elb_config.public_unit:
+            self.elb_r53.HostedZoneId = self.network_config.private_hosted_zone_id
+        else:
+            self.elb_r53.HostedZoneName = hosted_zone_name
+
+        self.template.add_output(Output(
+            self.trop_elb.title,
+            Description='URL of the {0} ALB'.format(self.title),
+            Value=Join('', ['http://', self.elb_r53.RecordSets[0].Name])
+        ))
+
+
+class SharedAlb(LocalReferenceSecurityEnabledObject):
+    def __init__(self, title, template, network_config, elb_config):
+        """
+        Route requests matching a path pattern or host header from another unit's application load balancer to a
+        target group per instance port of this unit. Network flows from the load balancer are sent from its security
+        group.
+        AWS Cloud Formation, pages under https://docs.aws.amazon.com/AWSCloudFormation/latest/UserGuide/:
+        aws-resource-elasticloadbalancingv2-listenerrule.html
+        :param title: Name of the unit
+        :param template: The troposphere template to add the target groups and listener rules to.
+        :param network_config: object containing network related variables
+        :param elb_config: object containing elb related variables, including the shared load balancer's unit title
+        """
+        shared_load_balancer = elb_config.shared_load_balancer
+        super(SharedAlb, self).__init__(template=template, reference_title=shared_load_balancer + 'Sg')
+        # flows are named after the load balancer, as they would be for its own unit
+        self.title = shared_load_balancer
+        self.elb_config = elb_config
+        self.network_config = network_config
+
+        conditions = []
+        if elb_config.path_pattern:
+            conditions.append(elbv2.Condition(Field='path-pattern', Values=[elb_config.path_pattern]))
+        if elb_config.host_header:
+            conditions.append(elbv2.Condition(Field='host-header', Values=[elb_config.host_header]))
+
+        target_groups = create_target_groups(title, template, network_config, elb_config)
+        self.target_groups = list(target_groups.values())
+        # target groups that autoscaling groups register their instances with
+        self.targets = self.target_groups
+        # metrics of the first listener's target group, used by request count scaling policies
+        self.metric_namespace = 'AWS/ApplicationELB'
+        self.resource_label, self.metric_dimensions = get_target_metrics(shared_load_balancer,
+                                                                         self.target_groups[0])
+
+        self.listener_rules = []
+        for listener_config in elb_config.elb_listeners_config:
+            self.listener_rules.append(self.template.add_resource(elbv2.ListenerRule(
+                '{0}Rule{1}'.format(title, listener_config.loadbalancer_port),
+                Actions=[elbv2.Action(Type='forward',
+                                      TargetGroupArn=Ref(target_groups[listener_config.instance_port]))],
+                Conditions=conditions,
+                ListenerArn=Ref(get_listener_title(shared_load_balancer, listener_config.loadbalancer_port)),
+                Priority=int(elb_config.rule_priority)
+            )))
+        # resources that must exist before instances can be registered with the target groups
+        self.target_dependencies = [listener_rule.title for listener_rule in self.listener_rules]
+
+        self.network_config.endpoints[title] = GetAtt(shared_load_balancer, 'DNSName')
@@ -103,7 +103,9 @@ class ApiGateway(object):
             RequestTemplates=method_config.request.templates,
             Uri=Join('',
                      [
-                         'arn:aws:apigateway:ap-southeast-2:lambda:path/2015-03-31/functions/',
+                         'arn:aws:apigateway:',
+                         Ref('AWS::Region'),
+                         ':lambda:path/2015-03-31/functions/',
                          lambda_arn,
                          '/invocations'
                      ]
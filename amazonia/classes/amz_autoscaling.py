@@ -1,7 +1,7 @@
 #!/usr/bin/python3
 
 from amazonia.classes.asg import Asg
-from amazonia.classes.elb import Elb
+from amazonia.classes.elb import create_load_balancer
 from amazonia.classes.leaf import Leaf
 from amazonia.classes.security_enabled_object import RemoteReferenceSecurityEnabledObject, \
     LocalReferenceSecurityEnabledObject
@@ -11,7 +11,7 @@ from troposphere import Output, GetAtt, ImportValue, Export
 class Autoscaling(object):
     def __init__(self, title, template, network_config, elb_config, asg_config, dependencies, ec2_scheduled_shutdown):
         """
-        Create Amazonia Autoscaling resources, an ELB, an autosclaing group and other associated resources
+        Create Amazonia Autoscaling resources, an ELB or ALB, an autosclaing group and other associated resources
         :param title: title of the amazonia obect and associated resources to be used in cloud formation
         :param template: the troposphere template object to update
         :param network_config: the VPC/subnets etc to deploy autoscaling resources into
@@ -26,9 +26,9 @@ class Autoscaling(object):
         self.instance_ports = [listener.instance_port for listener in elb_config.elb_listeners_config]
         self.dependencies = dependencies if dependencies else []
 
-        asg_config.ec2_scheduled_shutdown = ec2_scheduled_shutdown
+        asg_config = asg_config.replace(ec2_scheduled_shutdown=ec2_scheduled_shutdown)
 
-        self.elb = Elb(
+        self.elb = create_load_balancer(
             title=title,
             template=self.template,
             network_config=network_config,
@@ -40,10 +40,13 @@ class Autoscaling(object):
             template=self.template,
             network_config=network_config,
             asg_config=asg_config,
-            load_balancers=[self.elb.trop_elb]
+            load_balancers=self.elb.targets,
+            load_balancer=self.elb
         )
+        self.asg.add_depends_on(self.elb.target_dependencies)
 
-        if elb_config.public_unit:
+        # a shared load balancer already accepts traffic on its ports
+        if elb_config.public_unit and not elb_config.shared_load_balancer:
             [self.elb.add_ingress(sender=network_config.public_cidr, port=loadbalancerport) for loadbalancerport in
              self.loadbalancer_ports]
         [self.elb.add_flow(receiver=self.asg, port=instanceport) for instanceport in self.instance_ports]
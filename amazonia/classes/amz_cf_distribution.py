@@ -38,7 +38,7 @@ class CFDistribution(object):
         # Set distribution-wide parameters
         self.cf_dist = cloudfront.DistributionConfig(
             self.title + 'CfDistConfig',
-            Aliases=cf_distribution_config.aliases,
+            Aliases=list(cf_distribution_config.aliases),
             Comment=self.title,
             DefaultCacheBehavior=self.default_cache_behavior,
             CacheBehaviors=self.cache_behaviors,
@@ -112,7 +112,7 @@ class CFDistribution(object):
                 if origin.origin_protocol_policy:
                     custom_origin_config.OriginProtocolPolicy = origin.origin_protocol_policy
                 if origin.origin_ssl_protocols:
-                    custom_origin_config.OriginSSLProtocols = origin.origin_ssl_protocols
+                    custom_origin_config.OriginSSLProtocols = list(origin.origin_ssl_protocols)
 
                 # Set CustomOrigin
                 created_origin.CustomOriginConfig = custom_origin_config
@@ -138,15 +138,15 @@ class CFDistribution(object):
                 QueryString=cache_behavior.query_string
             )
             if cache_behavior.forwarded_headers is not None:
-                forwarded_values.Headers = cache_behavior.forwarded_headers
+                forwarded_values.Headers = list(cache_behavior.forwarded_headers)
 
             cf_cache_behavior_params = {
-                'AllowedMethods': cache_behavior.allowed_methods,
-                'CachedMethods': cache_behavior.cached_methods,
+                'AllowedMethods': list(cache_behavior.allowed_methods),
+                'CachedMethods': list(cache_behavior.cached_methods),
                 'Compress': False,
                 'TargetOriginId': cache_behavior.target_origin_id,
                 'ForwardedValues': forwarded_values,
-                'TrustedSigners': cache_behavior.trusted_signers,
+                'TrustedSigners': list(cache_behavior.trusted_signers),
                 'ViewerProtocolPolicy': cache_behavior.viewer_protocol_policy,
                 'MinTTL': cache_behavior.min_ttl,
                 'DefaultTTL': cache_behavior.default_ttl,
@@ -174,10 +174,10 @@ class CFDistribution(object):
                 self.cache_behaviors.append(created_cache_behavior)
                 cache_behavior_count += 1
 
-            # if there is at least one cache behavior, there must be exactly one default cache behavior
-            if cache_behavior_count > 0 and default_cache_behavior_count != 1:
-                raise CloudfrontConfigError(
-                    'Error: cf_distribution_unit {0} must have exactly one default cache behavior.'.format(title))
+        # if there is at least one cache behavior, there must be exactly one default cache behavior
+        if cache_behavior_count > 0 and default_cache_behavior_count != 1:
+            raise CloudfrontConfigError(
+                'Error: cf_distribution_unit {0} must have exactly one default cache behavior.'.format(title))
 
     def get_custom_reference(self, domain_name):
         """
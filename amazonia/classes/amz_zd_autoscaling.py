@@ -1,16 +1,17 @@
 #!/usr/bin/python3
 
 from amazonia.classes.asg import Asg
-from amazonia.classes.elb import Elb
+from amazonia.classes.elb import create_load_balancer
 from amazonia.classes.leaf import Leaf
+from amazonia.classes.weighted_routing_config import InvalidWeightedRoutingConfigError
 from amazonia.classes.security_enabled_object import RemoteReferenceSecurityEnabledObject, \
     LocalReferenceSecurityEnabledObject
-from troposphere import Output, GetAtt, ImportValue, Export
+from troposphere import Output, GetAtt, ImportValue, Export, Join, Ref, route53
 
 
 class ZdAutoscaling(object):
     def __init__(self, title, template, network_config, elb_config, blue_asg_config,
-                 green_asg_config, dependencies):
+                 green_asg_config, dependencies, weighted_routing_config=None):
         """
         Create Amazonia zero downtime Autoscaling resources, two ELBs, two autoscaling groups and other associated
         resources
@@ -21,21 +22,23 @@ class ZdAutoscaling(object):
         :param blue_asg_config: config related to the Blue AutoScaling Group
         :param green_asg_config: config related to the Green AutoScaling Group
         :param dependencies: List of resources to create network flow to
+        :param weighted_routing_config: config sharing requests to one name between the two ELBs, none if not set
         """
         self.title = title
         self.template = template
+        self.weighted_r53 = None
         self.loadbalancer_ports = [listener.loadbalancer_port for listener in elb_config.elb_listeners_config]
         self.instance_ports = [listener.instance_port for listener in elb_config.elb_listeners_config]
         self.dependencies = dependencies if dependencies else []
 
         # Create prod and pre elb's
-        self.prod_elb = Elb(
+        self.prod_elb = create_load_balancer(
             title=self.title,
             template=self.template,
             network_config=network_config,
             elb_config=elb_config
         )
-        self.pre_elb = Elb(
+        self.pre_elb = create_load_balancer(
             title='pre' + self.title,
             template=self.template,
             network_config=network_config,
@@ -47,16 +50,20 @@ class ZdAutoscaling(object):
             title='blue' + self.title,
             template=self.template,
             network_config=network_config,
-            load_balancers=[self.prod_elb.trop_elb],
+            load_balancers=self.prod_elb.targets,
+            load_balancer=self.prod_elb,
             asg_config=blue_asg_config
         )
         self.green_asg = Asg(
             title='green' + self.title,
             template=self.template,
             network_config=network_config,
-            load_balancers=[self.pre_elb.trop_elb],
+            load_balancers=self.pre_elb.targets,
+            load_balancer=self.pre_elb,
             asg_config=green_asg_config
         )
+        self.blue_asg.add_depends_on(self.prod_elb.target_dependencies)
+        self.green_asg.add_depends_on(self.pre_elb.target_dependencies)
 
         self.loadbalancer_ports = [listener.loadbalancer_port for listener in elb_config.elb_listeners_config]
         self.instance_ports = [listener.instance_port for listener in elb_config.elb_listeners_config]
@@ -86,10 +93,56 @@ class ZdAutoscaling(object):
         network_config.jump.add_flow(receiver=self.blue_asg, port='22')
         network_config.jump.add_flow(receiver=self.green_asg, port='22')
 
+        if weighted_routing_config:
+            self.create_weighted_r53_records(network_config, elb_config, weighted_routing_config)
+
+    def create_weighted_r53_records(self, network_config, elb_config, weighted_routing_config):
+        """
+        Create weighted R53 records under one name for the prod and pre ELBs, so that requests can be shifted between
+        the blue and green groups, e.g. for a canary release, by changing the weights rather than the groups
+        :param network_config: the VPC/subnets etc to deploy zd autoscaling resources into
+        :param elb_config: config related to the Elastic Load Balancers
+        :param weighted_routing_config: weights of the two ELBs and ttl of the records
+        """
+        if elb_config.public_unit:
+            hosted_zone_name = network_config.public_hosted_zone_name
+            if not hosted_zone_name:
+                raise InvalidWeightedRoutingConfigError('Weighted routing of public zd autoscaling unit {0} requires a '
+                                                        'public_hosted_zone_name'.format(self.title))
+            name = Join('', [Ref('AWS::StackName'), '-', 'live' + self.title, '.', hosted_zone_name])
+        else:
+            hosted_zone_name = network_config.private_hosted_zone_domain
+            name = Join('', ['live' + self.title, '.', hosted_zone_name])
+
+        # CNAME records rather than aliases, as alias records take the ttl of their target
+        self.weighted_r53 = self.template.add_resource(route53.RecordSetGroup(
+            'live' + self.title + 'R53',
+            RecordSets=[route53.RecordSet(
+                Name=name,
+                ResourceRecords=[GetAtt(elb.trop_elb, 'DNSName')],
+                SetIdentifier=colour,
+                TTL=str(weighted_routing_config.ttl),
+                Type='CNAME',
+                Weight=weight
+            ) for colour, elb, weight in (('blue', self.prod_elb, weighted_routing_config.blue_weight),
+                                          ('green', self.pre_elb, weighted_routing_config.green_weight))]))
+
+        if not elb_config.public_unit:
+            self.weighted_r53.HostedZoneId = network_config.private_hosted_zone_id
+        else:
+            self.weighted_r53.HostedZoneName = hosted_zone_name
+
+        self.template.add_output(Output(
+            'live' + self.title,
+            Description='URL of the {0} ELBs, weighted between the blue and green groups'.format(self.title),
+            Value=Join('', ['http://', name])
+        ))
+
 
 class ZdAutoscalingLeaf(ZdAutoscaling, Leaf):
     def __init__(self, leaf_title, template, dependencies, public_cidr, public_hosted_zone_name, cd_service_role_arn,
-                 availability_zones, tree_name, elb_config, blue_asg_config, green_asg_config, keypair):
+                 availability_zones, tree_name, elb_config, blue_asg_config, green_asg_config, keypair,
+                 weighted_routing_config=None):
         """
         Create zd autoscaling resources within a cross referenced stack
         :param leaf_title: title of the amazonia leaf and associated resources to be used in cloud formation
@@ -104,6 +157,7 @@ class ZdAutoscalingLeaf(ZdAutoscaling, Leaf):
         :param elb_config: config related to Elastic Load Balancer
         :param blue_asg_config: config related to the Blue AutoScaling Group
         :param green_asg_config: config related to the Green AutoScaling Group
+        :param weighted_routing_config: config sharing requests to one name between the two ELBs, none if not set
         """
         self.set_tree_config(template=template, availability_zones=availability_zones,
                              tree_name=tree_name)
@@ -116,7 +170,7 @@ class ZdAutoscalingLeaf(ZdAutoscaling, Leaf):
         self.tree_config.private_hosted_zone_domain = ImportValue(self.tree_name + '-PrivateHostedZoneDomain')
 
         super(ZdAutoscalingLeaf, self).__init__(leaf_title, template, self.tree_config, elb_config, blue_asg_config,
-                                                green_asg_config, dependencies)
+                                                green_asg_config, dependencies, weighted_routing_config)
 
         self.template.add_output(Output(
             'elbEndpoint',
@@ -144,7 +198,7 @@ class ZdAutoscalingLeaf(ZdAutoscaling, Leaf):
 
 class ZdAutoscalingUnit(ZdAutoscaling):
     def __init__(self, unit_title, template, dependencies, stack_config, elb_config, blue_asg_config,
-                 green_asg_config):
+                 green_asg_config, weighted_routing_config=None):
         """
         Create zd autoscaling resources within an integrated stack
         :param unit_title: Title of the autoscaling application  prefixedx with Stack name e.g 'MyStackWebApp1',
@@ -155,10 +209,11 @@ class ZdAutoscalingUnit(ZdAutoscaling):
         :param elb_config: config related to Elastic Load Balancer
         :param blue_asg_config: config related to the Blue AutoScaling Group
         :param green_asg_config: config related to the Green AutoScaling Group
+        :param weighted_routing_config: config sharing requests to one name between the two ELBs, none if not set
         """
         super(ZdAutoscalingUnit, self).__init__(unit_title, template, stack_config, elb_config, blue_asg_config,
                                                 green_asg_config,
-                                                dependencies)
+                                                dependencies, weighted_routing_config)
         for dependency in self.dependencies:
             portless_dependency_name = dependency.split(':')[0]
             dependency_port = dependency.split(':')[1]
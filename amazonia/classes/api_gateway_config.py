@@ -1,7 +1,11 @@
 #!/usr/bin/python3
 
+from amazonia.classes.config_object import ConfigObject
+
+
+class ApiGatewayMethodConfig(ConfigObject):
+    __slots__ = ('method_name', 'lambda_unit', 'request', 'responses', 'httpmethod', 'authorizationtype')
 
-class ApiGatewayMethodConfig(object):
     def __init__(self, method_name, lambda_unit, request_config, response_config, httpmethod, authorizationtype):
         """
         This class is used to hold the configuration required for an API Gateway Method
@@ -15,7 +19,9 @@ class ApiGatewayMethodConfig(object):
         self.authorizationtype = authorizationtype
 
 
-class ApiGatewayRequestConfig(object):
+class ApiGatewayRequestConfig(ConfigObject):
+    __slots__ = ('templates', 'parameters')
+
     def __init__(self, templates, parameters):
         """
         This class is used to hold the configuration required for an Api Gateway Request.
@@ -25,6 +31,8 @@ class ApiGatewayRequestConfig(object):
 
 
 class ApiGatewayResponseConfig(ApiGatewayRequestConfig):
+    __slots__ = ('statuscode', 'models', 'selectionpattern')
+
     def __init__(self, templates, parameters, statuscode, models, selectionpattern):
         """
         This class is used to hold the configuration required for an Api Gateway Response.
@@ -1,34 +1,63 @@
 #!/usr/bin/python3
 
+import re
+
 from amazonia.classes.block_devices import Bdm
+from amazonia.classes.asg_config import InvalidAsgConfigError
+from amazonia.classes.scheduled_action_config import get_scheduled_shutdown_actions
 from amazonia.classes.security_enabled_object import LocalSecurityEnabledObject
-from amazonia.classes.util import get_cf_friendly_name
-from troposphere import Base64, codedeploy, Ref, Join, Output
-from troposphere.autoscaling import AutoScalingGroup, LaunchConfiguration, Tag, NotificationConfigurations
-from troposphere.autoscaling import ScalingPolicy, ScheduledAction
+from amazonia.classes.template_parameters import get_literal_value
+from amazonia.classes.troposphere_compat import DeploymentGroup, AlarmConfiguration, AutoRollbackConfiguration, \
+    CodeDeployAlarm, TargetTrackingConfiguration, PredefinedMetricSpecification, CustomizedMetricSpecification
+from amazonia.classes.troposphere_compat import AutoScalingGroup, IamInstanceProfile, LaunchTemplate, \
+    LaunchTemplateData, LaunchTemplateSpecification, LaunchTemplateOverrides, MixedInstancesLaunchTemplate, \
+    MixedInstancesPolicy, InstancesDistribution, ScheduledAction, LifecycleHookSpecification, WarmPool, \
+    InstanceReusePolicy
+from amazonia.classes.troposphere_compat import MetricDimension as ScalingMetricDimension
+from amazonia.classes.troposphere_compat import ScalingPolicy as TargetTrackingScalingPolicy
+from amazonia.classes.util import get_cf_friendly_name, load_yaml, dump_yaml
+from troposphere import Base64, codedeploy, Ref, Join, Output, GetAtt
+from troposphere.autoscaling import LaunchConfiguration, Tag, NotificationConfigurations
+from troposphere.autoscaling import ScalingPolicy, StepAdjustments
 from troposphere.cloudwatch import MetricDimension, Alarm
-from troposphere.policies import UpdatePolicy, AutoScalingRollingUpdate
+from troposphere.ec2 import Monitoring
+from troposphere.elasticloadbalancingv2 import TargetGroup
+from troposphere.policies import UpdatePolicy, AutoScalingRollingUpdate, CreationPolicy, ResourceSignal
+
+# placeholders for the stack name and region in the cfn-signal command, replaced with references once the userdata is
+# complete
+signal_references = {'{{AmazoniaStackName}}': Ref('AWS::StackName'), '{{AmazoniaRegion}}': Ref('AWS::Region')}
+signal_reference_pattern = re.compile('({0})'.format('|'.join(re.escape(token) for token in signal_references)))
+
 
 class Asg(LocalSecurityEnabledObject):
-    def __init__(self, title, template, network_config, load_balancers, asg_config):
+    def __init__(self, title, template, network_config, load_balancers, asg_config, load_balancer=None):
         """
         Creates an autoscaling group and codedeploy definition
         :param title: Title of the autoscaling application e.g 'webApp1', 'api2' or 'dataprocessing'
         :param template: Troposphere stack to append resources to
         :param network_config: object containing network related config
         :param asg_config: object containing asg related config
-        :param load_balancers: list of load balancers to associate autoscaling group with
+        :param load_balancers: list of classic load balancers and application load balancer target groups to associate
+        autoscaling group with
+        :param load_balancer: the unit's Elb, Alb or SharedAlb, whose metrics target tracking policies can track
         """
         self.title = title + 'Asg'
         super(Asg, self).__init__(vpc=network_config.vpc, title=self.title, template=template)
         self.template = template
         self.network_config = network_config
+        self.load_balancer = load_balancer
         self.trop_asg = None
         self.lc = None
+        self.launch_template = None
         self.cd_app = None
         self.cd_deploygroup = None
+        self.cd_deploy_config = None
         self.cw_alarms = []
+        self.scaling_policy_alarms = {}
         self.scaling_polices = []
+        self.scheduled_actions = []
+        self.warm_pool = None
         self.create_asg(
             title=self.title,
             network_config=network_config,
@@ -38,7 +67,8 @@ class Asg(LocalSecurityEnabledObject):
         if network_config.cd_service_role_arn is not None:
             self.create_cd_deploygroup(
                 title=self.title,
-                cd_service_role_arn=network_config.cd_service_role_arn
+                cd_service_role_arn=network_config.cd_service_role_arn,
+                asg_config=asg_config
             )
 
     def create_asg(self, title, network_config, load_balancers, asg_config):
@@ -60,7 +90,6 @@ class Asg(LocalSecurityEnabledObject):
             MaxSize=asg_config.maxsize,
             VPCZoneIdentifier=network_config.private_subnets,
             AvailabilityZones=availability_zones,
-            LoadBalancerNames=[Ref(load_balancer) for load_balancer in load_balancers],
             HealthCheckGracePeriod=asg_config.health_check_grace_period,
             HealthCheckType=asg_config.health_check_type,
             Tags=[
@@ -70,13 +99,37 @@ class Asg(LocalSecurityEnabledObject):
         if network_config.get_depends_on():
             self.trop_asg.DependsOn = network_config.get_depends_on()
 
+        load_balancer_names = [Ref(load_balancer) for load_balancer in load_balancers
+                               if not isinstance(load_balancer, TargetGroup)]
+        if load_balancer_names:
+            self.trop_asg.LoadBalancerNames = load_balancer_names
+        target_group_arns = [Ref(load_balancer) for load_balancer in load_balancers
+                             if isinstance(load_balancer, TargetGroup)]
+        if target_group_arns:
+            self.trop_asg.TargetGroupARNs = target_group_arns
+
         # Set cloud formation update policy to update
-        self.trop_asg.resource['UpdatePolicy'] = UpdatePolicy(
-            AutoScalingRollingUpdate=AutoScalingRollingUpdate(
-                MinInstancesInService=asg_config.minsize,
-                PauseTime='PT{0}M'.format(asg_config.pausetime)
-            )
+        # a minsize template parameter can be given any value when the stack is created, which was never checked
+        # against the policies, so they keep the minsize the asg_config was validated with
+        policy_minsize = get_literal_value(asg_config.minsize)
+        rolling_update = AutoScalingRollingUpdate(
+            MinInstancesInService=policy_minsize,
+            PauseTime='PT{0}M'.format(asg_config.pausetime)
         )
+        if asg_config.max_batch_size is not None:
+            rolling_update.MaxBatchSize = int(asg_config.max_batch_size)
+        if asg_config.suspend_processes:
+            rolling_update.SuspendProcesses = list(asg_config.suspend_processes)
+        if asg_config.wait_on_resource_signals:
+            # each batch proceeds as soon as its instances signal, pausetime becomes the time to wait for signals
+            rolling_update.WaitOnResourceSignals = True
+            self.trop_asg.resource['CreationPolicy'] = CreationPolicy(
+                ResourceSignal=ResourceSignal(
+                    Count=policy_minsize,
+                    Timeout='PT{0}M'.format(asg_config.pausetime)
+                )
+            )
+        self.trop_asg.resource['UpdatePolicy'] = UpdatePolicy(AutoScalingRollingUpdate=rolling_update)
 
         self.trop_asg.NotificationConfigurations = [
             NotificationConfigurations(TopicARN=network_config.sns_topic,
@@ -89,33 +142,45 @@ class Asg(LocalSecurityEnabledObject):
         if asg_config.simple_scaling_policy_config is not None:
             for scaling_policy_config in asg_config.simple_scaling_policy_config:
                 self.create_simple_scaling_policy(scaling_policy_config=scaling_policy_config)
+        for scaling_policy_config in asg_config.target_tracking_policy_config or []:
+            self.create_target_tracking_policy(scaling_policy_config=scaling_policy_config)
+        for scaling_policy_config in asg_config.step_scaling_policy_config or []:
+            self.create_step_scaling_policy(scaling_policy_config=scaling_policy_config)
 
-        self.trop_asg.LaunchConfigurationName = Ref(self.create_launch_config(
-            title=title,
-            asg_config=asg_config,
-            network_config=network_config
-        ))
+        if asg_config.launch_template or asg_config.mixed_instances_policy_config is not None:
+            launch_template = LaunchTemplateSpecification(
+                LaunchTemplateId=Ref(self.create_launch_template(
+                    title=title,
+                    asg_config=asg_config,
+                    network_config=network_config
+                )),
+                Version=GetAtt(self.launch_template, 'LatestVersionNumber')
+            )
+            if asg_config.mixed_instances_policy_config is not None:
+                self.trop_asg.MixedInstancesPolicy = self.create_mixed_instances_policy(launch_template, asg_config)
+            else:
+                self.trop_asg.LaunchTemplate = launch_template
+        else:
+            self.trop_asg.LaunchConfigurationName = Ref(self.create_launch_config(
+                title=title,
+                asg_config=asg_config,
+                network_config=network_config
+            ))
 
-        # scale down auto scaling group outside work hours with Scheduled Actions
+        # resize the auto scaling group on a schedule, ec2_scheduled_shutdown is a preset scaling it down outside work
+        # hours
+        scheduled_actions = list(asg_config.scheduled_actions or [])
         if asg_config.ec2_scheduled_shutdown:
-            # Recurrence tag uses Cron syntax: https://en.wikipedia.org/wiki/Cron
-
-            # scheduled action for turning off instances (max=0)
-            self.template.add_resource(ScheduledAction(
-                title=title + 'SchedActOFF',
-                AutoScalingGroupName=Ref(self.trop_asg),
-                MaxSize=0,
-                MinSize=0,
-                Recurrence="0 09 * * *"  # 0900 UTC = 2000 AEDT
-            ))
-            # scheduled action for turning on instances (max=maxsize)
-            self.template.add_resource(ScheduledAction(
-                title=title + 'SchedActON',
-                AutoScalingGroupName=Ref(self.trop_asg),
-                MaxSize=asg_config.maxsize,
-                MinSize=asg_config.minsize,
-                Recurrence="0 19 * * 0,1,2,3,4"  # 1900 UTC (previous day) = 0600 AEDT
-            ))
+            scheduled_actions += get_scheduled_shutdown_actions(asg_config.minsize, asg_config.maxsize)
+        for scheduled_action_config in scheduled_actions:
+            self.create_scheduled_action(title=title, scheduled_action_config=scheduled_action_config)
+
+        if asg_config.lifecycle_hooks:
+            self.trop_asg.LifecycleHookSpecificationList = [
+                self.create_lifecycle_hook(lifecycle_hook_config=lifecycle_hook_config)
+                for lifecycle_hook_config in asg_config.lifecycle_hooks]
+        if asg_config.warm_pool_config is not None:
+            self.create_warm_pool(title=title, warm_pool_config=asg_config.warm_pool_config)
 
     def create_launch_config(self, title, asg_config, network_config):
         """
@@ -137,7 +202,7 @@ class Asg(LocalSecurityEnabledObject):
             launch_config_title,
             AssociatePublicIpAddress=False,
             ImageId=asg_config.image_id,
-            InstanceMonitoring=False,
+            InstanceMonitoring=bool(asg_config.detailed_monitoring),
             InstanceType=asg_config.instance_type,
             KeyName=network_config.keypair,
             SecurityGroups=[self.security_group],
@@ -146,11 +211,7 @@ class Asg(LocalSecurityEnabledObject):
         if asg_config.iam_instance_profile_arn is not None:
             self.lc.IamInstanceProfile = asg_config.iam_instance_profile_arn
 
-        # Userdata must be a valid string
-        if asg_config.userdata is None:
-            self.lc.UserData = ''
-        else:
-            self.lc.UserData = Base64(asg_config.userdata)
+        self.lc.UserData = self.create_userdata(title, asg_config)
 
         # If block devices have been configured
         if asg_config.block_devices_config is not None:
@@ -159,6 +220,194 @@ class Asg(LocalSecurityEnabledObject):
 
         return launch_config_title
 
+    def create_launch_template(self, title, asg_config, network_config):
+        """
+        Method to add a launch template resource to a cloud formation document, the launch template counterpart of
+        create_launch_config
+        AWS Cloud Formation links, pages under https://docs.aws.amazon.com/AWSCloudFormation/latest/UserGuide/:
+        aws-resource-ec2-launchtemplate.html
+        aws-properties-ec2-launchtemplate-launchtemplatedata.html
+        :param title: Title of the autoscaling application
+        :param asg_config: object holding asg related variables
+        :param network_config: object holding network related variables
+        :return string representing Launch Template name
+        """
+        launch_template_title = title + 'Lt'
+
+        launch_template_data = LaunchTemplateData(
+            ImageId=asg_config.image_id,
+            InstanceType=asg_config.instance_type,
+            KeyName=network_config.keypair,
+            Monitoring=Monitoring(Enabled=bool(asg_config.detailed_monitoring)),
+            SecurityGroupIds=[self.security_group],
+            UserData=self.create_userdata(title, asg_config)
+        )
+
+        # launch configurations take an instance profile's name or arn, launch templates need to be told which
+        if asg_config.iam_instance_profile_arn is not None:
+            if str(asg_config.iam_instance_profile_arn).startswith('arn:'):
+                launch_template_data.IamInstanceProfile = IamInstanceProfile(Arn=asg_config.iam_instance_profile_arn)
+            else:
+                launch_template_data.IamInstanceProfile = IamInstanceProfile(Name=asg_config.iam_instance_profile_arn)
+
+        # If block devices have been configured
+        if asg_config.block_devices_config is not None:
+            launch_template_data.BlockDeviceMappings = Bdm(launch_template_title, asg_config.block_devices_config) \
+                .block_device_mappings
+
+        self.launch_template = self.template.add_resource(LaunchTemplate(
+            launch_template_title,
+            LaunchTemplateData=launch_template_data
+        ))
+
+        return launch_template_title
+
+    @staticmethod
+    def create_mixed_instances_policy(launch_template, asg_config):
+        """
+        Create a mixed instances policy launching the asg_config instance type and the mixed instances policy instance
+        types, as on demand or spot instances
+        AWS Cloud Formation links, pages under https://docs.aws.amazon.com/AWSCloudFormation/latest/UserGuide/:
+        aws-properties-autoscaling-autoscalinggroup-mixedinstancespolicy.html
+        aws-properties-autoscaling-mixedinstancespolicy-instancesdistribution.html
+        :param launch_template: launch template specification of the autoscaling group
+        :param asg_config: object holding asg related variables
+        :return: mixed instances policy
+        """
+        mixed_instances_policy_config = asg_config.mixed_instances_policy_config
+
+        # overrides replace the launch template instance type, which is kept as the first preference
+        instance_types = [asg_config.instance_type]
+        for instance_type in mixed_instances_policy_config.instance_types or []:
+            if instance_type not in instance_types:
+                instance_types.append(instance_type)
+
+        instances_distribution = InstancesDistribution()
+        if mixed_instances_policy_config.on_demand_base_capacity is not None:
+            instances_distribution.OnDemandBaseCapacity = mixed_instances_policy_config.on_demand_base_capacity
+        if mixed_instances_policy_config.on_demand_percentage_above_base_capacity is not None:
+            instances_distribution.OnDemandPercentageAboveBaseCapacity = \
+                mixed_instances_policy_config.on_demand_percentage_above_base_capacity
+        if mixed_instances_policy_config.spot_allocation_strategy is not None:
+            instances_distribution.SpotAllocationStrategy = mixed_instances_policy_config.spot_allocation_strategy
+        if mixed_instances_policy_config.spot_instance_pools is not None:
+            instances_distribution.SpotInstancePools = mixed_instances_policy_config.spot_instance_pools
+        if mixed_instances_policy_config.spot_max_price is not None:
+            instances_distribution.SpotMaxPrice = mixed_instances_policy_config.spot_max_price
+
+        return MixedInstancesPolicy(
+            InstancesDistribution=instances_distribution,
+            LaunchTemplate=MixedInstancesLaunchTemplate(
+                LaunchTemplateSpecification=launch_template,
+                Overrides=[LaunchTemplateOverrides(InstanceType=instance_type) for instance_type in instance_types]
+            )
+        )
+
+    @staticmethod
+    def create_userdata(title, asg_config):
+        """
+        Create the userdata of the launch configuration. If the autoscaling group waits on resource signals, a
+        cfn-signal command is run once the userdata has finished, reporting its exit status to cloud formation.
+        :param title: Title of the autoscaling group that instances signal
+        :param asg_config: object holding asg related variables
+        :return: base64 encoded userdata, or an empty string if there is no userdata
+        """
+        # Userdata must be a valid string
+        if not asg_config.wait_on_resource_signals:
+            return '' if asg_config.userdata is None else Base64(asg_config.userdata)
+
+        signal = '/opt/aws/bin/cfn-signal -e {0} --stack {{{{AmazoniaStackName}}}} --resource {1} ' \
+                 '--region {{{{AmazoniaRegion}}}}'
+        userdata = asg_config.userdata or ''
+        if userdata.lstrip().startswith('#cloud-config'):
+            # runcmd commands run as one script, so the signal reports the exit status of the last command
+            cloud_config = load_yaml(userdata) or {}
+            cloud_config['runcmd'] = list(cloud_config.get('runcmd') or []) + [signal.format('$?', title)]
+            userdata = '#cloud-config\n' + dump_yaml(cloud_config)
+        elif userdata.lstrip().startswith('#!'):
+            userdata = userdata.rstrip('\n') + '\n' + signal.format('$?', title) + '\n'
+        else:
+            userdata = '#!/bin/bash\n' + signal.format('0', title) + '\n'
+
+        return Base64(Join('', [signal_references.get(part, part)
+                                for part in signal_reference_pattern.split(userdata) if part]))
+
+    def add_depends_on(self, titles):
+        """
+        Create the autoscaling group after other resources, e.g. the listeners forwarding to its target groups, as
+        instances can only be registered with target groups that a load balancer forwards to
+        :param titles: list of titles of resources to create first
+        """
+        if not titles:
+            return
+        depends_on = self.trop_asg.resource.get('DependsOn', [])
+        depends_on = depends_on if isinstance(depends_on, list) else [depends_on]
+        self.trop_asg.DependsOn = depends_on + list(titles)
+
+    def create_scheduled_action(self, title, scheduled_action_config):
+        """
+        Scheduled action resizing the autoscaling group on a recurrence, in a time zone
+        AWS Cloud Formation:
+        https://docs.aws.amazon.com/AWSCloudFormation/latest/UserGuide/aws-resource-as-scheduledaction.html
+        :param title: Title of the autoscaling application
+        :param scheduled_action_config: scheduled action config object
+        """
+        scheduled_action = ScheduledAction(
+            title=title + 'SchedAct' + get_cf_friendly_name(scheduled_action_config.name),
+            AutoScalingGroupName=Ref(self.trop_asg)
+        )
+        for field, cf_property in (('recurrence', 'Recurrence'), ('min_size', 'MinSize'), ('max_size', 'MaxSize'),
+                                   ('desired_capacity', 'DesiredCapacity'), ('time_zone', 'TimeZone'),
+                                   ('start_time', 'StartTime'), ('end_time', 'EndTime')):
+            value = getattr(scheduled_action_config, field)
+            if value is not None:
+                setattr(scheduled_action, cf_property, value)
+        self.scheduled_actions.append(self.template.add_resource(scheduled_action))
+
+    def create_lifecycle_hook(self, lifecycle_hook_config):
+        """
+        Lifecycle hook holding instances in a wait state as they launch or terminate, notifying the stack's SNS topic
+        when the hook has a role to publish with
+        AWS Cloud Formation, pages under https://docs.aws.amazon.com/AWSCloudFormation/latest/UserGuide/:
+        aws-properties-autoscaling-autoscalinggroup-lifecyclehookspecification.html
+        :param lifecycle_hook_config: lifecycle hook config object
+        :return: lifecycle hook specification of the autoscaling group
+        """
+        lifecycle_hook = LifecycleHookSpecification(
+            LifecycleHookName=lifecycle_hook_config.name,
+            LifecycleTransition=lifecycle_hook_config.lifecycle_transition
+        )
+        for field, cf_property in (('default_result', 'DefaultResult'), ('heartbeat_timeout', 'HeartbeatTimeout'),
+                                   ('notification_metadata', 'NotificationMetadata')):
+            value = getattr(lifecycle_hook_config, field)
+            if value is not None:
+                setattr(lifecycle_hook, cf_property, value)
+        if lifecycle_hook_config.role_arn:
+            lifecycle_hook.NotificationTargetARN = self.network_config.sns_topic
+            lifecycle_hook.RoleARN = lifecycle_hook_config.role_arn
+        return lifecycle_hook
+
+    def create_warm_pool(self, title, warm_pool_config):
+        """
+        Warm pool of instances that have already run their userdata, which the autoscaling group scales out from
+        AWS Cloud Formation:
+        https://docs.aws.amazon.com/AWSCloudFormation/latest/UserGuide/aws-resource-autoscaling-warmpool.html
+        :param title: Title of the autoscaling application
+        :param warm_pool_config: warm pool config object
+        """
+        warm_pool = WarmPool(
+            title=title + 'WarmPool',
+            AutoScalingGroupName=Ref(self.trop_asg),
+            PoolState=warm_pool_config.pool_state
+        )
+        if warm_pool_config.min_size is not None:
+            warm_pool.MinSize = warm_pool_config.min_size
+        if warm_pool_config.max_group_prepared_capacity is not None:
+            warm_pool.MaxGroupPreparedCapacity = warm_pool_config.max_group_prepared_capacity
+        if warm_pool_config.reuse_on_scale_in:
+            warm_pool.InstanceReusePolicy = InstanceReusePolicy(ReuseOnScaleIn=True)
+        self.warm_pool = self.template.add_resource(warm_pool)
+
     def create_simple_scaling_policy(self, scaling_policy_config):
         """
         Simple scaling policy based upon ec2 metrics
@@ -192,7 +441,7 @@ class Asg(LocalSecurityEnabledObject):
 
         self.scaling_polices.append(scaling_policy)
 
-        self.cw_alarms.append(self.template.add_resource(Alarm(
+        alarm = self.template.add_resource(Alarm(
             title=cf_name + 'Cwa',
             AlarmActions=[Ref(scaling_policy), self.network_config.sns_topic],
             AlarmDescription=scaling_policy_config.description,
@@ -209,16 +458,123 @@ class Asg(LocalSecurityEnabledObject):
             Statistic='Average',
             Threshold=scaling_policy_config.threshold,
             OKActions=[self.network_config.sns_topic]
-        )))
+        ))
+        self.cw_alarms.append(alarm)
+        self.scaling_policy_alarms[scaling_policy_config.name] = alarm
 
-    def create_cd_deploygroup(self, title, cd_service_role_arn):
+    def create_target_tracking_policy(self, scaling_policy_config):
+        """
+        Target tracking scaling policy, the group is scaled to keep a predefined or custom metric at a target value.
+        The alarms that trigger the policy are created and managed by AWS.
+        https://docs.aws.amazon.com/AWSCloudFormation/latest/UserGuide/aws-properties-as-policy.html
+        :param scaling_policy_config: target tracking policy config object
+        """
+        cf_name = self.trop_asg.title + get_cf_friendly_name(scaling_policy_config.name)
+
+        target_tracking = TargetTrackingConfiguration(TargetValue=scaling_policy_config.target_value)
+        if scaling_policy_config.predefined_metric is not None:
+            target_tracking.PredefinedMetricSpecification = PredefinedMetricSpecification(
+                PredefinedMetricType=scaling_policy_config.predefined_metric
+            )
+            # the label of a target group created by this stack is only known once the stack exists
+            resource_label = scaling_policy_config.resource_label or getattr(self.load_balancer, 'resource_label',
+                                                                             None)
+            if scaling_policy_config.predefined_metric == 'ALBRequestCountPerTarget':
+                if resource_label is None:
+                    raise InvalidAsgConfigError('Target tracking policy {0} tracks ALBRequestCountPerTarget, which '
+                                                'needs an application load balancer or a resource_label'
+                                                .format(scaling_policy_config.name))
+                target_tracking.PredefinedMetricSpecification.ResourceLabel = resource_label
+        else:
+            dimensions = [('AutoScalingGroupName', Ref(self.trop_asg))]
+            # load balancer metrics are not published per autoscaling group
+            if self.load_balancer is not None and \
+                    scaling_policy_config.namespace == self.load_balancer.metric_namespace:
+                dimensions = self.load_balancer.metric_dimensions
+            target_tracking.CustomizedMetricSpecification = CustomizedMetricSpecification(
+                Dimensions=[ScalingMetricDimension(Name=name, Value=value) for name, value in dimensions],
+                MetricName=scaling_policy_config.metric_name,
+                Namespace=scaling_policy_config.namespace,
+                Statistic=scaling_policy_config.statistic
+            )
+        if scaling_policy_config.disable_scale_in:
+            target_tracking.DisableScaleIn = True
+
+        scaling_policy = self.template.add_resource(TargetTrackingScalingPolicy(
+            title=cf_name + 'Sp',
+            AutoScalingGroupName=Ref(self.trop_asg),
+            PolicyType='TargetTrackingScaling',
+            TargetTrackingConfiguration=target_tracking
+        ))
+        if scaling_policy_config.estimated_instance_warmup is not None:
+            scaling_policy.EstimatedInstanceWarmup = scaling_policy_config.estimated_instance_warmup
+
+        self.scaling_polices.append(scaling_policy)
+
+    def create_step_scaling_policy(self, scaling_policy_config):
+        """
+        Step scaling policy, an alarm on a metric of the group triggers the adjustment of the band, relative to the
+        alarm threshold, that the metric is in
+        AWS Cloud Formation, pages under https://docs.aws.amazon.com/AWSCloudFormation/latest/UserGuide/:
+        aws-properties-as-policy.html
+        aws-properties-autoscaling-scalingpolicy-stepadjustments.html
+        :param scaling_policy_config: step scaling policy config object
+        """
+        cf_name = self.trop_asg.title + get_cf_friendly_name(scaling_policy_config.name)
+
+        step_adjustments = []
+        for step_adjustment_config in scaling_policy_config.step_adjustments:
+            step_adjustment = StepAdjustments(ScalingAdjustment=step_adjustment_config.adjustment)
+            if step_adjustment_config.lower_bound is not None:
+                step_adjustment.MetricIntervalLowerBound = step_adjustment_config.lower_bound
+            if step_adjustment_config.upper_bound is not None:
+                step_adjustment.MetricIntervalUpperBound = step_adjustment_config.upper_bound
+            step_adjustments.append(step_adjustment)
+
+        scaling_policy = self.template.add_resource(ScalingPolicy(
+            title=cf_name + 'Sp',
+            AdjustmentType=scaling_policy_config.adjustment_type,
+            AutoScalingGroupName=Ref(self.trop_asg),
+            MetricAggregationType=scaling_policy_config.statistic,
+            PolicyType='StepScaling',
+            StepAdjustments=step_adjustments
+        ))
+        if scaling_policy_config.estimated_instance_warmup is not None:
+            scaling_policy.EstimatedInstanceWarmup = scaling_policy_config.estimated_instance_warmup
+
+        self.scaling_polices.append(scaling_policy)
+
+        alarm = self.template.add_resource(Alarm(
+            title=cf_name + 'Cwa',
+            AlarmActions=[Ref(scaling_policy), self.network_config.sns_topic],
+            AlarmDescription=scaling_policy_config.description,
+            AlarmName=cf_name,
+            ComparisonOperator=scaling_policy_config.comparison_operator,
+            Dimensions=[MetricDimension(
+                Name='AutoScalingGroupName',
+                Value=Ref(self.trop_asg)
+            )],
+            EvaluationPeriods=scaling_policy_config.evaluation_periods,
+            MetricName=scaling_policy_config.metric_name,
+            Namespace=scaling_policy_config.namespace,
+            Period=scaling_policy_config.period,
+            Statistic=scaling_policy_config.statistic,
+            Threshold=str(scaling_policy_config.threshold),
+            OKActions=[self.network_config.sns_topic]
+        ))
+        self.cw_alarms.append(alarm)
+        self.scaling_policy_alarms[scaling_policy_config.name] = alarm
+
+    def create_cd_deploygroup(self, title, cd_service_role_arn, asg_config):
         """
         Creates a CodeDeploy application and deploy group and associates with autoscaling group
         AWS Cloud Formation:
         http://docs.aws.amazon.com/AWSCloudFormation/latest/UserGuide/aws-resource-codedeploy-deploymentgroup.html
+        http://docs.aws.amazon.com/AWSCloudFormation/latest/UserGuide/aws-resource-codedeploy-deploymentconfig.html
         Troposphere link: https://github.com/cloudtools/troposphere/blob/master/troposphere/codedeploy.py
         :param title: Title of the code deploy application
         :param cd_service_role_arn: AWS IAM Role with Code Deploy permissions
+        :param asg_config: object holding the deployment configuration and rollback settings
         :return 2 strings representing CodeDeploy Application name and CodeDeploy Group name.
         """
         cd_app_title = title + 'Cda'
@@ -227,15 +583,42 @@ class Asg(LocalSecurityEnabledObject):
         self.cd_app = self.template.add_resource(codedeploy.Application(cd_app_title,
                                                                         ApplicationName=Join('', [Ref('AWS::StackName'),
                                                                                                   '-', cd_app_title])))
+
+        if asg_config.minimum_healthy_hosts is not None:
+            minimum_healthy_hosts = str(asg_config.minimum_healthy_hosts)
+            self.cd_deploy_config = self.template.add_resource(codedeploy.DeploymentConfig(
+                title + 'Cdc',
+                MinimumHealthyHosts=codedeploy.MinimumHealthyHosts(
+                    Type='FLEET_PERCENT' if minimum_healthy_hosts.endswith('%') else 'HOST_COUNT',
+                    Value=int(minimum_healthy_hosts.rstrip('%'))
+                )
+            ))
+            deployment_config_name = Ref(self.cd_deploy_config)
+        else:
+            deployment_config_name = 'CodeDeployDefault.{0}'.format(asg_config.deployment_config or 'OneAtATime')
+
         self.cd_deploygroup = self.template.add_resource(
-            codedeploy.DeploymentGroup(cd_deploygroup_title,
-                                       ApplicationName=Ref(self.cd_app),
-                                       AutoScalingGroups=[Ref(self.trop_asg)],
-                                       DeploymentConfigName='CodeDeployDefault.OneAtATime',
-                                       DeploymentGroupName=Join('', [Ref('AWS::StackName'),
-                                                                     '-', cd_deploygroup_title]),
-                                       ServiceRoleArn=cd_service_role_arn,
-                                       DependsOn=[self.cd_app.title, self.trop_asg.title]))
+            DeploymentGroup(cd_deploygroup_title,
+                            ApplicationName=Ref(self.cd_app),
+                            AutoScalingGroups=[Ref(self.trop_asg)],
+                            DeploymentConfigName=deployment_config_name,
+                            DeploymentGroupName=Join('', [Ref('AWS::StackName'),
+                                                          '-', cd_deploygroup_title]),
+                            ServiceRoleArn=cd_service_role_arn,
+                            DependsOn=[self.cd_app.title, self.trop_asg.title]))
+
+        # stop deployments when any of the chosen scaling policy alarms fire
+        if asg_config.rollback_alarms:
+            self.cd_deploygroup.AlarmConfiguration = AlarmConfiguration(
+                Alarms=[CodeDeployAlarm(Name=Ref(self.scaling_policy_alarms[name]))
+                        for name in asg_config.rollback_alarms],
+                Enabled=True
+            )
+        if asg_config.auto_rollback:
+            events = ['DEPLOYMENT_FAILURE']
+            if asg_config.rollback_alarms:
+                events.append('DEPLOYMENT_STOP_ON_ALARM')
+            self.cd_deploygroup.AutoRollbackConfiguration = AutoRollbackConfiguration(Enabled=True, Events=events)
 
         # Outputs
         self.template.add_output(
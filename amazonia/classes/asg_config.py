@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 
-from amazonia.classes.util import detect_unencrypted_access_keys
+from amazonia.classes.config_object import ConfigObject
+from amazonia.classes.scheduled_action_config import get_duplicate_scheduled_action_names
 
 
 class InvalidAsgConfigError(Exception):
@@ -11,11 +12,22 @@ class InvalidAsgConfigError(Exception):
         self.value = value
 
 
-class AsgConfig(object):
+class AsgConfig(ConfigObject):
+    __slots__ = ('health_check_grace_period', 'health_check_type', 'minsize', 'maxsize', 'image_id', 'instance_type',
+                 'userdata', 'iam_instance_profile_arn', 'block_devices_config', 'simple_scaling_policy_config',
+                 'target_tracking_policy_config', 'step_scaling_policy_config', 'ec2_scheduled_shutdown', 'pausetime',
+                 'owner', 'max_batch_size', 'wait_on_resource_signals', 'suspend_processes', 'deployment_config',
+                 'minimum_healthy_hosts', 'auto_rollback', 'rollback_alarms', 'detailed_monitoring', 'launch_template',
+                 'mixed_instances_policy_config', 'scheduled_actions', 'lifecycle_hooks', 'warm_pool_config')
+
     def __init__(self, health_check_grace_period,
                  health_check_type, minsize, maxsize, image_id, instance_type, userdata,
                  iam_instance_profile_arn, block_devices_config, simple_scaling_policy_config,
-                 ec2_scheduled_shutdown, pausetime, owner):
+                 ec2_scheduled_shutdown, pausetime, owner, max_batch_size=None, wait_on_resource_signals=None,
+                 suspend_processes=None, deployment_config=None, minimum_healthy_hosts=None, auto_rollback=None,
+                 rollback_alarms=None, target_tracking_policy_config=None, step_scaling_policy_config=None,
+                 detailed_monitoring=None, launch_template=None, mixed_instances_policy_config=None,
+                 scheduled_actions=None, lifecycle_hooks=None, warm_pool_config=None):
         """
         Simple config class to contain autoscaling group related parameters
         :param minsize: minimum size of autoscaling group
@@ -23,14 +35,38 @@ class AsgConfig(object):
         :param image_id: AWS ami id to create instances from, e.g. 'ami-12345'
         :param instance_type: Instance type to create instances of e.g. 't2.micro' or 't2.nano'
         :param userdata: Instance boot script
-        :param iam_instance_profile_arn: Iam instance profile ARN to allow isntance access to services like S3
+        :param iam_instance_profile_arn: Iam instance profile name or ARN to allow instance access to services like S3
         :param health_check_grace_period: The amount of time to wait for an instance to start before checking health
         :param health_check_type: The type of health check. currently 'ELB' or 'EC2' are the only valid types.
         :param block_devices_config: List containing block device mappings
         :param simple_scaling_policy_config: List containing scaling policies
-        :param ec2_scheduled_shutdown: True/False for whether to schedule shutdown for EC2 instances outside work hours
+        :param ec2_scheduled_shutdown: True/False for whether to schedule shutdown for EC2 instances outside work hours,
+        a preset of scheduled actions
         :param pausetime: number of minutes as an int. Time between building an instance and taking down the old one
         :param owner: the value of the owner tag
+        :param max_batch_size: maximum number of instances replaced at once during a rolling update, 1 if not set
+        :param wait_on_resource_signals: True for instances to signal cloud formation once their userdata has run, the
+        group is created and each rolling update batch proceeds as soon as its instances signal, waiting at most
+        pausetime minutes
+        :param suspend_processes: list of autoscaling processes to suspend during a rolling update, e.g.
+        AlarmNotification
+        :param deployment_config: code deploy configuration, 'OneAtATime', 'HalfAtATime' or 'AllAtOnce'. OneAtATime if
+        neither this nor minimum_healthy_hosts is set
+        :param minimum_healthy_hosts: minimum healthy instances during a code deploy deployment, as a count e.g. '2' or
+        a percentage of the group e.g. '75%', creates a custom deployment configuration
+        :param auto_rollback: True to roll back failed and alarm stopped code deploy deployments
+        :param rollback_alarms: list of simple or step scaling policy names whose alarms stop a code deploy deployment
+        :param target_tracking_policy_config: List containing target tracking scaling policies
+        :param step_scaling_policy_config: List containing step scaling policies
+        :param detailed_monitoring: True for instances to send cloudwatch metrics every minute rather than every five
+        minutes, required for scaling policy periods shorter than 300 seconds
+        :param launch_template: True to launch instances from a launch template rather than a launch configuration
+        :param mixed_instances_policy_config: Mixed instances policy config object to launch several instance types and
+        spot instances, always launched from a launch template
+        :param scheduled_actions: List containing scheduled actions resizing the group, e.g. ahead of predictable peaks
+        :param lifecycle_hooks: List containing lifecycle hooks holding instances as they launch or terminate
+        :param warm_pool_config: Warm pool config object to keep bootstrapped instances ready for scale out, not with
+        mixed_instances_policy_config
         """
         self.health_check_grace_period = health_check_grace_period
         self.health_check_type = health_check_type
@@ -42,15 +78,80 @@ class AsgConfig(object):
         self.iam_instance_profile_arn = iam_instance_profile_arn
         self.block_devices_config = block_devices_config
         self.simple_scaling_policy_config = simple_scaling_policy_config
+        self.target_tracking_policy_config = target_tracking_policy_config
+        self.step_scaling_policy_config = step_scaling_policy_config
         self.ec2_scheduled_shutdown = ec2_scheduled_shutdown
         self.pausetime = pausetime
         self.owner = owner
+        self.max_batch_size = max_batch_size
+        self.wait_on_resource_signals = wait_on_resource_signals
+        self.suspend_processes = suspend_processes
+        self.deployment_config = deployment_config
+        self.minimum_healthy_hosts = minimum_healthy_hosts
+        self.auto_rollback = auto_rollback
+        self.rollback_alarms = rollback_alarms
+        self.detailed_monitoring = detailed_monitoring
+        self.launch_template = launch_template
+        self.mixed_instances_policy_config = mixed_instances_policy_config
+        self.scheduled_actions = scheduled_actions
+        self.lifecycle_hooks = lifecycle_hooks
+        self.warm_pool_config = warm_pool_config
 
-        # check for insecure variables
-        if self.userdata is not None:
-            detect_unencrypted_access_keys(self.userdata)
-
-        # Validate that minsize is less than maxsize
-        if int(self.minsize) > int(self.maxsize):
+    def validate(self):
+        """
+        Raise InvalidAsgConfigError if the autoscaling unit's fields are not consistent
+        """
+        # sizes may be references to template parameters, which can only be compared once the stack is created
+        minsize, maxsize = [int(size) if isinstance(size, (int, str)) and str(size).isdigit() else None
+                            for size in (self.minsize, self.maxsize)]
+        if minsize is not None and maxsize is not None and minsize > maxsize:
             raise InvalidAsgConfigError('Autoscaling unit minsize ({0}) cannot be '
                                         'larger than maxsize ({1})'.format(self.minsize, self.maxsize))
+
+        if self.max_batch_size is not None and int(self.max_batch_size) < 1:
+            raise InvalidAsgConfigError('Autoscaling unit max_batch_size ({0}) must be at least 1'
+                                        .format(self.max_batch_size))
+
+        # a signal can only be added to cloud-config or script userdata
+        if self.wait_on_resource_signals and self.userdata and \
+                not self.userdata.lstrip().startswith(('#cloud-config', '#!')):
+            raise InvalidAsgConfigError('Autoscaling unit userdata must be cloud-config or a script beginning with #! '
+                                        'to wait on resource signals')
+
+        if self.deployment_config is not None and self.minimum_healthy_hosts is not None:
+            raise InvalidAsgConfigError('Autoscaling unit can set deployment_config ({0}) or minimum_healthy_hosts '
+                                        '({1}) but not both'.format(self.deployment_config,
+                                                                    self.minimum_healthy_hosts))
+
+        scaling_policies = tuple(self.simple_scaling_policy_config or ()) + tuple(self.step_scaling_policy_config or ())
+        scaling_policy_names = [scaling_policy.name for scaling_policy in scaling_policies]
+        for rollback_alarm in self.rollback_alarms or []:
+            if rollback_alarm not in scaling_policy_names:
+                raise InvalidAsgConfigError('Autoscaling unit rollback alarm {0} is not one of its simple or step '
+                                            'scaling policies {1}'.format(rollback_alarm, scaling_policy_names))
+
+        # alarms on metrics sent every five minutes can not evaluate shorter periods
+        minimum_period = 60 if self.detailed_monitoring else 300
+        for scaling_policy in scaling_policies:
+            if int(scaling_policy.period) % 60:
+                raise InvalidAsgConfigError('Autoscaling unit scaling policy {0} period ({1}) must be a multiple of 60 '
+                                            'seconds'.format(scaling_policy.name, scaling_policy.period))
+            if int(scaling_policy.period) < minimum_period:
+                raise InvalidAsgConfigError('Autoscaling unit scaling policy {0} period ({1}) must be at least {2} '
+                                            'seconds, periods down to 60 seconds need detailed_monitoring'
+                                            .format(scaling_policy.name, scaling_policy.period, minimum_period))
+
+        duplicate_scheduled_action_names = get_duplicate_scheduled_action_names(self.scheduled_actions,
+                                                                                self.ec2_scheduled_shutdown)
+        if duplicate_scheduled_action_names:
+            raise InvalidAsgConfigError('Autoscaling unit scheduled action names {0} must be unique, including the OFF '
+                                        'and ON actions of ec2_scheduled_shutdown'
+                                        .format(duplicate_scheduled_action_names))
+
+        lifecycle_hook_names = [lifecycle_hook.name for lifecycle_hook in self.lifecycle_hooks or []]
+        if len(set(lifecycle_hook_names)) != len(lifecycle_hook_names):
+            raise InvalidAsgConfigError('Autoscaling unit lifecycle hook names {0} must be unique'
+                                        .format(lifecycle_hook_names))
+
+        if self.warm_pool_config is not None and self.mixed_instances_policy_config is not None:
+            raise InvalidAsgConfigError('Autoscaling unit can not have both a warm pool and a mixed instances policy')
@@ -1,7 +1,12 @@
 #!/usr/bin/python3
 
+from amazonia.classes.config_object import ConfigObject
+
+
+class CFDistributionConfig(ConfigObject):
+    __slots__ = ('aliases', 'comment', 'default_root_object', 'enabled', 'price_class', 'error_page_path',
+                 'acm_cert_arn', 'minimum_protocol_version', 'ssl_support_method')
 
-class CFDistributionConfig(object):
     def __init__(self, aliases, comment, default_root_object, enabled, price_class,
                  error_page_path, acm_cert_arn, minimum_protocol_version,
                  ssl_support_method):
@@ -31,7 +36,10 @@ class CFDistributionConfig(object):
         self.ssl_support_method = ssl_support_method
 
 
-class CFOriginsConfig(object):
+class CFOriginsConfig(ConfigObject):
+    __slots__ = ('domain_name', 'origin_id', 'origin_path', 'custom_headers', 'origin_policy', 'origin_access_identity',
+                 'origin_protocol_policy', 'http_port', 'https_port', 'origin_ssl_protocols')
+
     def __init__(self, domain_name, origin_id, origin_path, custom_headers, origin_policy):
         """
         Class to abstract a Cloudfront Distribution Origin object of type S3 or Custom
@@ -67,7 +75,11 @@ class CFOriginsConfig(object):
             self.origin_ssl_protocols = origin_policy['origin_ssl_protocols']
 
 
-class CFCacheBehaviorConfig(object):
+class CFCacheBehaviorConfig(ConfigObject):
+    __slots__ = ('is_default', 'path_pattern', 'allowed_methods', 'cached_methods', 'target_origin_id',
+                 'forward_cookies', 'forwarded_headers', 'viewer_protocol_policy', 'min_ttl', 'default_ttl', 'max_ttl',
+                 'trusted_signers', 'query_string')
+
     def __init__(self, is_default, path_pattern, allowed_methods, cached_methods, target_origin_id,
                  forward_cookies, forwarded_headers, viewer_protocol_policy, min_ttl, default_ttl,
                  max_ttl, trusted_signers, query_string):
@@ -0,0 +1,166 @@
+#!/usr/bin/python3
+
+import hashlib
+import json
+
+
+class ImmutableConfigError(AttributeError):
+    """
+    Exception if a config object is changed after it has been created
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+
+class ConfigObjectType(type):
+    def __call__(cls, *args, **kwargs):
+        """
+        Validate and freeze config objects once their constructor, including any subclass constructor, has finished
+        """
+        config_object = super(ConfigObjectType, cls).__call__(*args, **kwargs)
+        freeze_config_object(config_object)
+        return config_object
+
+
+class ConfigObject(object, metaclass=ConfigObjectType):
+    """
+    Base class of the immutable value objects built from yaml, e.g. AsgConfig and ElbListenersConfig. Subclasses list
+    their fields in __slots__, set them in their constructor and can not be changed afterwards, use replace() to create
+    a changed copy. Config objects compare and hash by value, and fingerprint() gives a digest that is stable between
+    processes, so they can be used as cache keys. Lists held by a config object are stored as tuples, dictionaries must
+    not be changed. Subclasses check their fields in validate(), which runs for every new or replaced config object.
+    """
+    __slots__ = ('_frozen', '_fingerprint')
+
+    def __setattr__(self, name, value):
+        if getattr(self, '_frozen', False):
+            raise ImmutableConfigError('Error: {0}.{1} can not be changed, use replace() to create a changed copy.'
+                                       .format(type(self).__name__, name))
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name):
+        raise ImmutableConfigError('Error: {0}.{1} can not be deleted.'.format(type(self).__name__, name))
+
+    @classmethod
+    def get_field_names(cls):
+        """
+        :return: tuple of the names of the config object's fields, in declaration order
+        """
+        if '_field_names' not in cls.__dict__:
+            field_names = []
+            for klass in reversed(cls.__mro__):
+                field_names.extend(name for name in klass.__dict__.get('__slots__', ()) if not name.startswith('_'))
+            cls._field_names = tuple(field_names)
+        return cls._field_names
+
+    def validate(self):
+        """
+        Raise an error if the config object's fields are not consistent, run before the config object is frozen
+        """
+        pass
+
+    def get_fields(self):
+        """
+        :return: list of (field name, value) tuples
+        """
+        return [(name, getattr(self, name)) for name in self.get_field_names()]
+
+    def replace(self, **changes):
+        """
+        Create a copy of the config object with some fields changed
+        :param changes: field names and their new values
+        :return: new config object of the same type, checked by validate()
+        """
+        unknown_fields = set(changes) - set(self.get_field_names())
+        if unknown_fields:
+            raise ImmutableConfigError('Error: {0} has no fields {1}'.format(type(self).__name__,
+                                                                           sorted(unknown_fields)))
+        config_object = object.__new__(type(self))
+        for name, value in self.get_fields():
+            object.__setattr__(config_object, name, changes.get(name, value))
+        freeze_config_object(config_object)
+        return config_object
+
+    def fingerprint(self):
+        """
+        :return: hex sha256 digest of the config object's type and field values
+        """
+        if getattr(self, '_fingerprint', None) is None:
+            canonical = json.dumps(get_canonical_value(self), sort_keys=True, separators=(',', ':'), default=repr)
+            object.__setattr__(self, '_fingerprint', hashlib.sha256(canonical.encode('utf-8')).hexdigest())
+        return self._fingerprint
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return NotImplemented
+        # compare what is hashed, so 1 and 1.0, which serialise differently, are not equal with different hashes
+        return self is other or self.fingerprint() == other.fingerprint()
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        return hash(self.fingerprint())
+
+    def __repr__(self):
+        return '{0}({1})'.format(type(self).__name__,
+                                 ', '.join('{0}={1!r}'.format(name, value) for name, value in self.get_fields()))
+
+    def __reduce__(self):
+        return restore_config_object, (type(self), tuple(value for _, value in self.get_fields()))
+
+
+def freeze_config_object(config_object):
+    """
+    Store the list fields of a new config object as tuples, validate it and make it immutable
+    :param config_object: config object whose fields have been set
+    """
+    for name, value in config_object.get_fields():
+        if isinstance(value, list):
+            object.__setattr__(config_object, name, get_frozen_value(value))
+    config_object.validate()
+    object.__setattr__(config_object, '_frozen', True)
+
+
+def get_frozen_value(value):
+    """
+    :param value: field value
+    :return: the value with lists, including nested lists, converted to tuples
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(get_frozen_value(item) for item in value)
+    return value
+
+
+def restore_config_object(config_type, values):
+    """
+    Recreate a pickled or copied config object
+    :param config_type: class of the config object
+    :param values: tuple of field values in declaration order
+    :return: config object
+    """
+    config_object = object.__new__(config_type)
+    for name, value in zip(config_type.get_field_names(), values):
+        object.__setattr__(config_object, name, value)
+    object.__setattr__(config_object, '_frozen', True)
+    return config_object
+
+
+def get_canonical_value(value):
+    """
+    Convert a value to json serialisable data that is the same for equal values
+    :param value: config object, troposphere object, list, dictionary or scalar
+    :return: json serialisable data
+    """
+    if isinstance(value, ConfigObject):
+        return [type(value).__name__, [[name, get_canonical_value(field)] for name, field in value.get_fields()]]
+    if hasattr(value, 'JSONrepr'):
+        # troposphere objects, e.g. the Ref of a template parameter, by the json they add to a template
+        return [type(value).__name__, getattr(value, 'title', None), get_canonical_value(value.JSONrepr())]
+    if isinstance(value, dict):
+        return {str(key): get_canonical_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [get_canonical_value(item) for item in value]
+    return value
@@ -1,7 +1,12 @@
 #!/usr/bin/python3
 
+from amazonia.classes.config_object import ConfigObject
+
+
+class DatabaseConfig(ConfigObject):
+    __slots__ = ('db_hdd_size', 'db_instance_type', 'db_engine', 'db_port', 'db_name', 'db_snapshot_id',
+                 'db_backup_window', 'db_backup_retention', 'db_maintenance_window', 'db_storage_type', 'owner')
 
-class DatabaseConfig(object):
     def __init__(self, db_hdd_size, db_instance_type, db_engine, db_port, db_name,
                  db_snapshot_id, db_backup_window, db_backup_retention, db_maintenance_window,
                  db_storage_type, owner):
@@ -0,0 +1,147 @@
+#!/usr/bin/python3
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+
+from amazonia.classes.util import get_content_hash, load_yaml
+from amazonia.classes.yaml import Yaml, InvalidYamlValueError
+
+
+class UnknownDefaultsError(Exception):
+    """
+    Exception if defaults are referenced by a hash that is not registered
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+
+class DefaultsRegistry(object):
+    def __init__(self, max_entries=64, path=None, timeout=30):
+        """
+        Registry of parsed and validated defaults keyed by the content hash of their yaml, so that one server can
+        generate templates against the defaults of many teams without parsing or validating them per request. Parsed
+        defaults are held in memory by each process. With a path, the defaults yaml is also stored in an sqlite
+        database shared by every process that opens the same file, e.g. each web server worker and each generator
+        process, so defaults registered with one process can be used by all of them. Without a path the registry only
+        serves the process that registered the defaults, so a server with more than one worker needs a path.
+        :param max_entries: maximum number of defaults held, the least recently used defaults are evicted first
+        :param path: path of the sqlite database file, created if it does not exist, or None to keep defaults in memory
+        :param timeout: seconds to wait for another process's write lock before giving up
+        """
+        self.max_entries = max_entries
+        self.path = path
+        self.timeout = timeout
+        self.defaults = OrderedDict()
+        self.lock = threading.Lock()
+        if self.path is not None:
+            with closing(self.connect()) as connection:
+                connection.execute('PRAGMA journal_mode=WAL')
+                connection.execute('CREATE TABLE IF NOT EXISTS defaults ('
+                                   'hash TEXT PRIMARY KEY, '
+                                   'defaults TEXT NOT NULL, '
+                                   'last_access REAL NOT NULL)')
+                connection.execute('CREATE INDEX IF NOT EXISTS defaults_last_access ON defaults (last_access)')
+
+    def connect(self):
+        """
+        Open a connection, a connection is opened per operation so that the registry can be used from any thread and
+        from processes forked after the registry was created
+        :return: sqlite3 connection in autocommit mode
+        """
+        return sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+
+    @staticmethod
+    def parse(defaults_yaml):
+        """
+        Parse and validate defaults
+        :param defaults_yaml: defaults yaml text
+        :return: parsed defaults
+        """
+        default_data = load_yaml(defaults_yaml)
+        if not isinstance(default_data, dict):
+            raise InvalidYamlValueError('Error: defaults must be a yaml dictionary, got {0}'
+                                        .format(type(default_data).__name__))
+        Yaml.validate_yaml(default_data, Yaml.cerberus_schema)
+        return default_data
+
+    def add(self, defaults_yaml):
+        """
+        Parse, validate and register defaults
+        :param defaults_yaml: defaults yaml text
+        :return: content hash to reference the defaults by
+        """
+        default_data = self.parse(defaults_yaml)
+        defaults_hash = get_content_hash(defaults_yaml)
+        if self.path is not None:
+            self.store(defaults_hash, defaults_yaml)
+        self.put(defaults_hash, default_data)
+        return defaults_hash
+
+    def store(self, defaults_hash, defaults_yaml):
+        """
+        Store defaults yaml in the shared database, evicting the least recently used defaults over max_entries
+        :param defaults_hash: content hash of the defaults yaml
+        :param defaults_yaml: defaults yaml text
+        """
+        with closing(self.connect()) as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                connection.execute('INSERT OR REPLACE INTO defaults (hash, defaults, last_access) VALUES (?, ?, ?)',
+                                   (defaults_hash, defaults_yaml, time.time()))
+                connection.execute('DELETE FROM defaults WHERE hash NOT IN '
+                                   '(SELECT hash FROM defaults ORDER BY last_access DESC LIMIT ?)',
+                                   (self.max_entries,))
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+
+    def load(self, defaults_hash):
+        """
+        Read defaults yaml from the shared database and mark it as recently used
+        :param defaults_hash: content hash of the defaults yaml
+        :return: defaults yaml text, or None if the defaults are not stored
+        """
+        if self.path is None:
+            return None
+        with closing(self.connect()) as connection:
+            row = connection.execute('SELECT defaults FROM defaults WHERE hash = ?', (defaults_hash,)).fetchone()
+            if row is None:
+                return None
+            connection.execute('UPDATE defaults SET last_access = ? WHERE hash = ?', (time.time(), defaults_hash))
+        # the database file may be shared, only trust defaults that match the hash they are stored under
+        return row[0] if get_content_hash(row[0]) == defaults_hash else None
+
+    def put(self, defaults_hash, default_data):
+        """
+        Hold defaults that have already been validated in memory
+        :param defaults_hash: content hash of the defaults yaml
+        :param default_data: parsed defaults
+        """
+        with self.lock:
+            self.defaults[defaults_hash] = default_data
+            self.defaults.move_to_end(defaults_hash)
+            while len(self.defaults) > self.max_entries:
+                self.defaults.popitem(last=False)
+
+    def get(self, defaults_hash):
+        """
+        :param defaults_hash: content hash of the defaults yaml
+        :return: parsed defaults
+        """
+        with self.lock:
+            if defaults_hash in self.defaults:
+                self.defaults.move_to_end(defaults_hash)
+                return self.defaults[defaults_hash]
+        # registered by another process, parsed once by this process
+        defaults_yaml = self.load(defaults_hash)
+        if defaults_yaml is None:
+            raise UnknownDefaultsError('Error: defaults {0} are not registered or have been evicted, please '
+                                       'upload them again.'.format(defaults_hash))
+        default_data = self.parse(defaults_yaml)
+        self.put(defaults_hash, default_data)
+        return default_data
@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 
 import troposphere.elasticloadbalancing as elb
+from amazonia.classes.alb import Alb, SharedAlb
 from amazonia.classes.security_enabled_object import LocalSecurityEnabledObject
 from troposphere import Tags, Ref, Output, Join, GetAtt, route53
 
@@ -30,7 +31,7 @@ class Elb(LocalSecurityEnabledObject):
         # Create ELB
         self.trop_elb = self.template.add_resource(
             elb.LoadBalancer(self.title,
-                             CrossZone=True,
+                             CrossZone=elb_config.cross_zone is not False,
                              HealthCheck=elb.HealthCheck(
                                  Target=elb_config.elb_health_check,
                                  HealthyThreshold=elb_config.healthy_threshold,
@@ -49,6 +50,15 @@ class Elb(LocalSecurityEnabledObject):
         if network_config.get_depends_on():
             self.trop_elb.DependsOn = network_config.get_depends_on()
 
+        # Let in-flight requests complete when instances are deregistered, e.g. on scale in or rolling updates
+        if elb_config.connection_draining_timeout is not None:
+            self.trop_elb.ConnectionDrainingPolicy = elb.ConnectionDrainingPolicy(
+                Enabled=int(elb_config.connection_draining_timeout) > 0)
+            if int(elb_config.connection_draining_timeout) > 0:
+                self.trop_elb.ConnectionDrainingPolicy.Timeout = elb_config.connection_draining_timeout
+        if elb_config.idle_timeout is not None:
+            self.trop_elb.ConnectionSettings = elb.ConnectionSettings(IdleTimeout=elb_config.idle_timeout)
+
         # App sticky session cookies
         sticky_app_cookie_policies = []
         # sticky_app_cookie defaults to None, gather listeners that have cookies
@@ -79,7 +89,7 @@ class Elb(LocalSecurityEnabledObject):
         # Create ELB Log Bucket
         if elb_config.elb_log_bucket:
             self.trop_elb.AccessLoggingPolicy = elb.AccessLoggingPolicy(
-                EmitInterval='60',
+                EmitInterval=str(elb_config.access_log_emit_interval or 60),
                 Enabled=True,
                 S3BucketName=elb_config.elb_log_bucket,
                 S3BucketPrefix=Join('', [Ref('AWS::StackName'),
@@ -100,6 +110,13 @@ class Elb(LocalSecurityEnabledObject):
             ))
 
         self.network_config.endpoints[title] = GetAtt(self.trop_elb, 'DNSName')
+        # load balancers that autoscaling groups register their instances with
+        self.targets = [self.trop_elb]
+        self.target_dependencies = []
+        # dimensions of the load balancer's cloudwatch metrics, used by custom metric scaling policies
+        self.metric_namespace = 'AWS/ELB'
+        self.metric_dimensions = [('LoadBalancerName', Ref(self.trop_elb))]
+        self.resource_label = None
 
     def create_r53_record(self, hosted_zone_name):
         """
@@ -134,3 +151,19 @@ class Elb(LocalSecurityEnabledObject):
             Description='URL of the {0} ELB'.format(self.title),
             Value=Join('', ['http://', self.elb_r53.RecordSets[0].Name])
         ))
+
+
+def create_load_balancer(title, template, network_config, elb_config):
+    """
+    Create the load balancer of a unit, as selected by its elb_config
+    :param title: Name of the unit
+    :param template: The troposphere template to add the load balancer to.
+    :param network_config: object containing network related variables
+    :param elb_config: object containing elb related variables
+    :return: Elb, Alb, or SharedAlb routing to the unit from another unit's Alb
+    """
+    if elb_config.shared_load_balancer:
+        return SharedAlb(title=title, template=template, network_config=network_config, elb_config=elb_config)
+    if elb_config.load_balancer_type == 'application':
+        return Alb(title=title, template=template, network_config=network_config, elb_config=elb_config)
+    return Elb(title=title, template=template, network_config=network_config, elb_config=elb_config)
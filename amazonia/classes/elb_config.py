@@ -1,10 +1,27 @@
 #!/usr/bin/python3
 
+from amazonia.classes.config_object import ConfigObject
+
+
+class InvalidElbConfigError(Exception):
+    """
+    Exception if invalid properties are supplied
+    """
+    def __init__(self, value):
+        self.value = value
+
+
+class ElbConfig(ConfigObject):
+    __slots__ = ('elb_health_check', 'public_unit', 'elb_log_bucket', 'ssl_certificate_id', 'elb_listeners_config',
+                 'healthy_threshold', 'unhealthy_threshold', 'interval', 'timeout', 'owner', 'load_balancer_type',
+                 'shared_load_balancer', 'path_pattern', 'host_header', 'rule_priority', 'slow_start',
+                 'cross_zone', 'connection_draining_timeout', 'idle_timeout', 'access_log_emit_interval')
 
-class ElbConfig(object):
     def __init__(self, elb_listeners_config, elb_health_check,
                  public_unit, elb_log_bucket, ssl_certificate_id, healthy_threshold, unhealthy_threshold,
-                 interval, timeout, owner):
+                 interval, timeout, owner, load_balancer_type=None, shared_load_balancer=None, path_pattern=None,
+                 host_header=None, rule_priority=None, slow_start=None, cross_zone=None,
+                 connection_draining_timeout=None, idle_timeout=None, access_log_emit_interval=None):
         """
         Simple config class to contain elb related parameters
         :param elb_listeners_config: List of ELB listener configs
@@ -15,7 +32,22 @@ class ElbConfig(object):
         :param unhealthy_threshold: Number of consecutive health check successes before marking as Unhealthy
         :param interval: Interval between health checks
         :param timeout: Amount of time during which no response means a failed health check
-
+        :param load_balancer_type: 'classic' for an elastic load balancer or 'application' for an application load
+        balancer with a target group per instance port, classic if not set
+        :param shared_load_balancer: title of another autoscaling unit whose application load balancer this unit shares,
+        requests matching path_pattern or host_header are routed to this unit
+        :param path_pattern: path of requests to route to this unit on a shared load balancer, e.g. '/api/*'
+        :param host_header: host name of requests to route to this unit on a shared load balancer, e.g.
+        'api.example.com'
+        :param rule_priority: priority, 1 to 50000, of this unit's routing rule on a shared load balancer, lowest first
+        :param slow_start: seconds over which application load balancer targets receive a linearly increasing share of
+        requests after becoming healthy
+        :param cross_zone: False to only route requests to instances in the availability zone of the classic load
+        balancer node that received them, application load balancers are always cross zone
+        :param connection_draining_timeout: seconds to let in-flight requests to a deregistering instance complete
+        before it is removed, 0 disables draining
+        :param idle_timeout: seconds a connection can be idle before the load balancer closes it
+        :param access_log_emit_interval: minutes between publishing classic load balancer access logs, 5 or 60
         """
         self.elb_health_check = elb_health_check
         self.public_unit = public_unit
@@ -27,9 +59,66 @@ class ElbConfig(object):
         self.interval = interval
         self.timeout = timeout
         self.owner = owner
+        self.load_balancer_type = load_balancer_type
+        self.shared_load_balancer = shared_load_balancer
+        self.path_pattern = path_pattern
+        self.host_header = host_header
+        self.rule_priority = rule_priority
+        self.slow_start = slow_start
+        self.cross_zone = cross_zone
+        self.connection_draining_timeout = connection_draining_timeout
+        self.idle_timeout = idle_timeout
+        self.access_log_emit_interval = access_log_emit_interval
+
+    def validate(self):
+        """
+        Raise InvalidElbConfigError if the load balancer's fields are not consistent
+        """
+        is_application = self.load_balancer_type == 'application'
+        if self.shared_load_balancer:
+            if not is_application:
+                raise InvalidElbConfigError('Only application load balancers can be shared, set load_balancer_type '
+                                            'to application to share {0}'.format(self.shared_load_balancer))
+            if not self.path_pattern and not self.host_header:
+                raise InvalidElbConfigError('A unit sharing load balancer {0} must set a path_pattern or host_header '
+                                            'to route requests to it'.format(self.shared_load_balancer))
+            if self.rule_priority is None:
+                raise InvalidElbConfigError('A unit sharing load balancer {0} must set a rule_priority'
+                                            .format(self.shared_load_balancer))
+            if self.idle_timeout is not None:
+                raise InvalidElbConfigError('A unit sharing load balancer {0} uses its idle_timeout, set it on the '
+                                            'unit owning the load balancer'.format(self.shared_load_balancer))
+        elif self.path_pattern or self.host_header or self.rule_priority is not None:
+            raise InvalidElbConfigError('path_pattern, host_header and rule_priority can only be set by a unit sharing '
+                                        'another unit\'s load balancer')
+        if is_application:
+            for listener in self.elb_listeners_config or []:
+                if listener is None:
+                    continue
+                if listener.sticky_app_cookie:
+                    raise InvalidElbConfigError('Application load balancers do not support sticky_app_cookie ({0})'
+                                                .format(listener.sticky_app_cookie))
+                for protocol in (listener.loadbalancer_protocol, listener.instance_protocol):
+                    if protocol not in ('HTTP', 'HTTPS'):
+                        raise InvalidElbConfigError('Application load balancer listeners must use HTTP or HTTPS, not '
+                                                    '{0}'.format(protocol))
+            if not self.elb_health_check or not self.elb_health_check.startswith(('HTTP:', 'HTTPS:')):
+                raise InvalidElbConfigError('Application load balancer health checks must be HTTP or HTTPS, e.g. '
+                                            'HTTP:80/index.html, not {0}'.format(self.elb_health_check))
+            if self.cross_zone is False:
+                raise InvalidElbConfigError('Application load balancers are always cross zone, cross_zone cannot be '
+                                            'false')
+            if self.access_log_emit_interval is not None:
+                raise InvalidElbConfigError('Application load balancers publish access logs every 5 minutes, '
+                                            'access_log_emit_interval can only be set for classic load balancers')
+        elif self.slow_start is not None:
+            raise InvalidElbConfigError('slow_start can only be set for application load balancers')
+
 
+class ElbListenersConfig(ConfigObject):
+    __slots__ = ('instance_protocol', 'loadbalancer_protocol', 'instance_port', 'loadbalancer_port',
+                 'sticky_app_cookie')
 
-class ElbListenersConfig(object):
     def __init__(self, instance_protocol, loadbalancer_protocol, instance_port, loadbalancer_port, sticky_app_cookie):
         """
         Simple ELB listener config class to contain elb listener related parameters
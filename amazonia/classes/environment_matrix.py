@@ -0,0 +1,258 @@
+#!/usr/bin/python3
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from amazonia.classes.config_object import get_canonical_value
+from amazonia.classes.stack import Stack
+from amazonia.classes.template_parameters import TemplateParameters
+from amazonia.classes.util import find_unencrypted_access_keys, InsecureVariableError
+from amazonia.classes.yaml import Yaml, InvalidYamlStructureError
+from amazonia.classes.yaml_fields import YamlFields
+
+
+def merge_overlay(base, overlay):
+    """
+    Deep merge an environment overlay onto application yaml data. Dictionaries are merged key by key, unit lists are
+    merged by unit_title with units the overlay does not name left unchanged, and any other value, including other
+    lists, is replaced by the overlay's value
+    :param base: application yaml data
+    :param overlay: overlay yaml data
+    :return: merged yaml data, base and overlay are not changed
+    """
+    if not isinstance(base, dict) or not isinstance(overlay, dict):
+        return overlay
+    merged = dict(base)
+    for key, value in overlay.items():
+        if key in YamlFields.unit_key_list and isinstance(base.get(key), list) and isinstance(value, list):
+            merged[key] = merge_units(base[key], value)
+        elif key in base:
+            merged[key] = merge_overlay(base[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def merge_units(base_units, overlay_units):
+    """
+    Merge a list of overlay units onto a list of application units by unit_title
+    :param base_units: list of application unit dictionaries
+    :param overlay_units: list of overlay unit dictionaries, units with a new title are appended
+    :return: merged list of unit dictionaries
+    """
+    merged = list(base_units)
+    positions = dict((unit.get('unit_title'), index) for index, unit in enumerate(merged) if isinstance(unit, dict))
+    for unit in overlay_units:
+        title = unit.get('unit_title') if isinstance(unit, dict) else None
+        if title in positions:
+            merged[positions[title]] = merge_overlay(merged[positions[title]], unit)
+        else:
+            positions[title] = len(merged)
+            merged.append(unit)
+    return merged
+
+
+def get_overlays(matrix_data, key='environments'):
+    """
+    Read the overlays of a matrix or regions document
+    :param matrix_data: yaml data in the form {key: {name: overlay}}
+    :param key: name of the dictionary of overlays, e.g. environments or regions
+    :return: ordered dictionary of names and their overlays
+    """
+    overlays = matrix_data.get(key) if isinstance(matrix_data, dict) else None
+    if not isinstance(overlays, dict) or not overlays:
+        raise InvalidYamlStructureError('Error: {0} must be a dictionary of names and their overlays.'.format(key))
+    for name, overlay in overlays.items():
+        if overlay is not None and not isinstance(overlay, dict):
+            raise InvalidYamlStructureError('Error: the overlay of {0} {1} must be a dictionary.'.format(key, name))
+    return OrderedDict((str(name), overlay or {}) for name, overlay in overlays.items())
+
+
+def get_region_environments(environments, regions):
+    """
+    Combine environments with regions, so that every environment is generated for every region
+    :param environments: ordered dictionary of environment names and their application overlays, or None
+    :param regions: ordered dictionary of region names and their defaults overlays, e.g. availability zones and amis
+    :return: ordered dictionaries of environment names and their application overlays and defaults overlays, named
+    after the region or after the environment and the region, e.g. prod-us-east-1
+    """
+    if not environments:
+        return OrderedDict((region, {}) for region in regions), OrderedDict(regions)
+    region_environments = OrderedDict()
+    default_overlays = OrderedDict()
+    for environment, overlay in environments.items():
+        for region, default_overlay in regions.items():
+            name = '{0}-{1}'.format(environment, region)
+            region_environments[name] = overlay
+            default_overlays[name] = default_overlay
+    return region_environments, default_overlays
+
+
+def get_environment_template_path(template_path, environment):
+    """
+    :param template_path: path of a single template, e.g. stack.template
+    :param environment: environment name
+    :return: path of the environment's template, e.g. stack-prod.template
+    """
+    root, extension = os.path.splitext(template_path)
+    return '{0}-{1}{2}'.format(root, environment, extension)
+
+
+def build_template(united_data, indent, separators, parameters=None):
+    """
+    Build and serialize the template of one environment, run in a worker process
+    :param united_data: merged stack dictionary
+    :param indent: json indentation of the template
+    :param separators: json item and key separators of the template
+    :param parameters: list of yaml fields to turn into cloud formation parameters
+    :return: cloud formation template json
+    """
+    if parameters:
+        template_parameters = TemplateParameters(parameters)
+        united_data = template_parameters.parameterise(united_data)
+    stack = Stack(**united_data)
+    if parameters:
+        template_parameters.add_to_template(stack.template)
+    return stack.template.to_json(indent=indent, separators=separators)
+
+
+class EnvironmentMatrix(object):
+    def __init__(self, application, default_data, environments, validate=True, default_overlays=None):
+        """
+        Generate the templates of several environments, e.g. dev, test and prod, from one application and an overlay
+        per environment. The application and defaults are validated and merged once, each environment only validates
+        its overlay and merges the fields and units its overlay changes, reusing everything else from the shared merge.
+        Environments may also overlay the defaults, e.g. with the availability zones and amis of a region, the
+        application is merged once per distinct defaults overlay.
+        :param application: application yaml data shared by every environment
+        :param default_data: defaults yaml data
+        :param environments: dictionary of environment names and their overlay yaml data
+        :param validate: False to skip schema validation of data that has already been validated
+        :param default_overlays: dictionary of environment names and the overlay of their defaults yaml data
+        """
+        self.application = application
+        self.default_data = default_data
+        self.environments = OrderedDict(environments)
+        self.default_overlays = dict(default_overlays or {})
+
+        if validate:
+            Yaml.validate_yaml(application, Yaml.cerberus_schema)
+            Yaml.validate_yaml(default_data, Yaml.cerberus_schema)
+            # an overlay is a partial application or partial defaults, so it is valid if every field it sets is valid
+            for overlay in list(self.environments.values()) + list(self.default_overlays.values()):
+                Yaml.validate_yaml(overlay, Yaml.cerberus_schema)
+
+        # the shared merges check the application and defaults for insecure variables
+        insecure_variable_errors = ['Error: unencrypted {0} was found in {1}, please remove or encrypt.'
+                                    .format(secret_name, '{0}.{1}.{2}'.format(overlay_type, name, path))
+                                    for overlay_type, overlays in (('environments', self.environments),
+                                                                   ('defaults', self.default_overlays))
+                                    for name, overlay in overlays.items()
+                                    for path, secret_name in find_unencrypted_access_keys(overlay)]
+        if insecure_variable_errors:
+            raise InsecureVariableError('\n'.join(insecure_variable_errors))
+
+        self.base = Yaml(application, default_data, validate=False)
+        # shared merges of the application with each distinct defaults overlay, keyed by the overlay's id
+        self.overlay_bases = {}
+
+    def get_base(self, environment):
+        """
+        :param environment: environment name
+        :return: shared merge of the application with the environment's defaults
+        """
+        default_overlay = self.default_overlays.get(environment)
+        if not default_overlay:
+            return self.base
+        if id(default_overlay) not in self.overlay_bases:
+            self.overlay_bases[id(default_overlay)] = Yaml(self.application,
+                                                           merge_overlay(self.default_data, default_overlay),
+                                                           validate=False)
+        return self.overlay_bases[id(default_overlay)]
+
+    def merge_environment(self, environment):
+        """
+        Merge an environment's overlay, reusing the shared merge for the stack fields and units it does not change
+        :param environment: environment name
+        :return: merged stack dictionary of the environment
+        """
+        overlay = self.environments[environment]
+        base = self.get_base(environment)
+        application = merge_overlay(self.application, overlay)
+        united_data = dict(base.united_data)
+        for stack_key in YamlFields.stack_key_list:
+            if stack_key not in overlay:
+                continue
+            if stack_key in YamlFields.unit_key_list and isinstance(overlay[stack_key], list):
+                united_data[stack_key] = self.merge_environment_units(base, stack_key, application[stack_key],
+                                                                      overlay[stack_key])
+            else:
+                united_data[stack_key] = base.set_value(stack_key, application, base.default_data)
+        return united_data
+
+    def merge_environment_units(self, base, unit_key, units, overlay_units):
+        """
+        Merge the units of an environment, only units named by the overlay are merged again
+        :param base: shared merge of the application with the environment's defaults
+        :param unit_key: unit list field, e.g. autoscaling_units
+        :param units: the environment's unit dictionaries, merged with the overlay
+        :param overlay_units: the overlay's unit dictionaries
+        :return: list of merged units
+        """
+        base_units = dict((unit['unit_title'], unit) for unit in base.united_data[unit_key] or [])
+        changed_titles = set(unit.get('unit_title') for unit in overlay_units)
+        cofm = YamlFields.complex_object_field_mapping[unit_key]
+        merged_units = []
+        for unit in units:
+            if unit['unit_title'] in changed_titles or unit['unit_title'] not in base_units:
+                merged_units.extend(base.set_complex_value(unit_key, cofm, {unit_key: [unit]}, base.default_data))
+            else:
+                merged_units.append(base_units[unit['unit_title']])
+        return merged_units
+
+    def merge(self):
+        """
+        :return: ordered dictionary of environment names and their merged stack dictionaries
+        """
+        return OrderedDict((environment, self.merge_environment(environment)) for environment in self.environments)
+
+    @staticmethod
+    def get_fingerprint(united_data):
+        """
+        :param united_data: merged stack dictionary
+        :return: hex sha256 digest that is the same for environments that produce the same template
+        """
+        canonical = json.dumps(get_canonical_value(united_data), sort_keys=True, separators=(',', ':'), default=repr)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def generate(self, indent=2, separators=(',', ': '), workers=None, parameters=None):
+        """
+        Generate the template of every environment. Environments that merge to the same stack are built once, and
+        distinct environments are built in parallel on a pool of processes.
+        :param indent: json indentation of the templates, None for single line templates
+        :param separators: json item and key separators of the templates
+        :param workers: number of processes to build templates with, defaults to the number of cpus
+        :param parameters: list of yaml fields to turn into cloud formation parameters
+        :return: ordered dictionary of environment names and their cloud formation template json
+        """
+        fingerprints = OrderedDict()
+        stacks = OrderedDict()
+        for environment, united_data in self.merge().items():
+            fingerprint = self.get_fingerprint(united_data)
+            fingerprints[environment] = fingerprint
+            stacks.setdefault(fingerprint, united_data)
+
+        if len(stacks) == 1 or workers == 1:
+            templates = dict((fingerprint, build_template(united_data, indent, separators, parameters))
+                             for fingerprint, united_data in stacks.items())
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(stacks))) as executor:
+                futures = dict((fingerprint, executor.submit(build_template, united_data, indent, separators,
+                                                             parameters))
+                               for fingerprint, united_data in stacks.items())
+                templates = dict((fingerprint, future.result()) for fingerprint, future in futures.items())
+
+        return OrderedDict((environment, templates[fingerprint]) for environment, fingerprint in fingerprints.items())
@@ -0,0 +1,352 @@
+#!/usr/bin/python3
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, TimeoutError, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from amazonia import amz
+from amazonia.classes.defaults_registry import DefaultsRegistry
+from amazonia.classes.environment_matrix import merge_overlay
+from amazonia.classes.job_store import JobStore, JOB_RUNNING, JOB_ACTIVE
+from amazonia.classes.util import read_yaml, load_yaml, PhaseTimer
+from amazonia.classes.yaml import Yaml
+
+# defaults loaded and validated once by each worker process when it starts
+worker_default_data = None
+
+# registered defaults, parsed once by each worker process on first use
+worker_defaults_registry = None
+
+
+class GeneratorPoolBusyError(Exception):
+    """
+    Exception if the generator pool has no free worker or queue slot for a request
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+
+class GeneratorTimeoutError(Exception):
+    """
+    Exception if a template was not generated within the request timeout
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+
+def init_worker(default_path, defaults_registry_path):
+    """
+    Warm up a worker process by loading the defaults, the schema and the amazonia and troposphere modules once
+    :param default_path: path to the defaults yaml file
+    :param defaults_registry_path: path of the defaults registry database, or None if defaults are not registered
+    """
+    global worker_default_data, worker_defaults_registry
+    worker_default_data = read_yaml(default_path)
+    Yaml.validate_yaml(worker_default_data, Yaml.cerberus_schema)
+    worker_defaults_registry = DefaultsRegistry(path=defaults_registry_path)
+
+
+def warm_worker():
+    """
+    No-op task used to start worker processes before the first request arrives
+    :return: process id of the worker
+    """
+    return os.getpid()
+
+
+def generate_template(yaml_data, defaults_hash, default_overrides, indent, separators, on_phase=None):
+    """
+    Generate a template within a worker process
+    :param yaml_data: user yaml as text or as already parsed data
+    :param defaults_hash: content hash of registered defaults, or None to use the worker's preloaded defaults
+    :param default_overrides: dictionary of default values to deep merge onto the defaults, or None
+    :param indent: json indentation of the template
+    :param separators: json item and key separators of the template
+    :param on_phase: function called with the name and duration in seconds of each phase as it ends
+    :return: cloud formation template json, list of (phase, seconds) tuples
+    """
+    timings = []
+
+    def record_phase(phase, seconds):
+        timings.append((phase, seconds))
+        if on_phase is not None:
+            on_phase(phase, seconds)
+
+    phase_timer = PhaseTimer(record_phase)
+    if isinstance(yaml_data, str):
+        yaml_data = load_yaml(yaml_data)
+    phase_timer.end('parse')
+    if defaults_hash is None:
+        default_data = worker_default_data
+    else:
+        default_data = worker_defaults_registry.get(defaults_hash)
+    if default_overrides:
+        # override single fields of nested defaults, e.g. the instance_type of asg_config, without losing the rest
+        default_data = merge_overlay(default_data, default_overrides)
+    # defaults have already been validated unless they have been overridden
+    template_data = amz.generate_template(yaml_data, default_data, indent=indent, separators=separators,
+                                          on_phase=record_phase, validate_defaults=bool(default_overrides))
+    return template_data, timings
+
+
+def generate_job(job_directory, job_id, yaml_data, defaults_hash, default_overrides, indent, separators):
+    """
+    Generate the template of a job within a worker process, recording the job's progress and result in the job store
+    :param job_directory: directory of the job store
+    :param job_id: id of the job
+    :param yaml_data: user yaml as text or as already parsed data
+    :param defaults_hash: content hash of registered defaults, or None to use the worker's preloaded defaults
+    :param default_overrides: dictionary of default values to override, or None
+    :param indent: json indentation of the template
+    :param separators: json item and key separators of the template
+    :return: cloud formation template json, list of (phase, seconds) tuples
+    """
+    job_store = JobStore(job_directory)
+    job_store.update(job_id, status=JOB_RUNNING)
+    try:
+        template_data, timings = generate_template(yaml_data, defaults_hash, default_overrides, indent, separators,
+                                                   on_phase=lambda phase, seconds:
+                                                   job_store.add_phase(job_id, phase, seconds))
+    except Exception as error:
+        job_store.fail(job_id, str(error))
+        raise
+    job_store.complete(job_id, template_data)
+    return template_data, timings
+
+
+def fail_lost_job(job_directory, job_id, future):
+    """
+    Mark a job failed if its worker died or it was cancelled before the worker could record the result, so the job
+    does not stay queued or running forever
+    :param job_directory: directory of the job store
+    :param job_id: id of the job
+    :param future: the finished job
+    """
+    error = 'Job cancelled' if future.cancelled() else future.exception()
+    if error is None:
+        return
+    job_store = JobStore(job_directory)
+    status = job_store.get(job_id)
+    # the worker has already recorded the error of a job it failed
+    if status is not None and status['status'] in JOB_ACTIVE:
+        job_store.fail(job_id, str(error) or type(error).__name__)
+
+
+def get_batch_applications(documents):
+    """
+    Split the documents of a batch request into a list of applications and a dictionary of default overrides. A
+    leading document holding only defaults is deep merged under the defaults of an {'applications', 'defaults'}
+    document, so the overrides closest to the applications win
+    :param documents: list of yaml documents in the request
+    :return: list of application dictionaries, dictionary of default values to override
+    """
+    default_overrides = {}
+    # a leading document holding only defaults overrides the defaults of the applications that follow it
+    if len(documents) > 1 and isinstance(documents[0], dict) and list(documents[0]) == ['defaults']:
+        default_overrides = documents.pop(0)['defaults'] or {}
+    if len(documents) == 1 and isinstance(documents[0], list):
+        return documents[0], default_overrides
+    if len(documents) == 1 and isinstance(documents[0], dict) and 'applications' in documents[0]:
+        return documents[0]['applications'] or [], merge_overlay(default_overrides,
+                                                                 documents[0].get('defaults') or {})
+    return documents, default_overrides
+
+
+class GeneratorPool(object):
+    def __init__(self, default_path, workers=None, max_queue=None, timeout=None, on_generated=None,
+                 defaults_registry_path=None):
+        """
+        Pool of pre-forked worker processes that generate templates outside of the web server's interpreter, so
+        concurrent requests are not serialised on the GIL
+        :param default_path: path to the defaults yaml file every worker preloads
+        :param workers: number of worker processes, defaults to the number of cpus
+        :param max_queue: number of requests allowed to wait for a free worker before requests are rejected
+        :param timeout: seconds to wait for a template before giving up on a request, None to wait indefinitely
+        :param on_generated: function called with the template json and a list of (phase, seconds) tuples for each
+        template generated
+        :param defaults_registry_path: path of the defaults registry database that workers read registered defaults
+        from, or None if defaults are not registered
+        """
+        self.workers = workers if workers else os.cpu_count()
+        self.max_queue = max_queue if max_queue is not None else self.workers * 4
+        self.timeout = timeout
+        self.on_generated = on_generated
+        self.default_path = default_path
+        self.defaults_registry_path = defaults_registry_path
+        self.executor = self.create_executor()
+        self.executor_lock = threading.Lock()
+        # every submitted request holds a slot until its worker has finished with it, even after a timeout
+        self.slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self.pending = 0
+        self.lock = threading.Lock()
+
+        # start every worker now rather than on the first requests
+        wait([self.executor.submit(warm_worker) for _ in range(self.workers)])
+
+    def create_executor(self):
+        """
+        :return: process pool whose workers preload the defaults
+        """
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                   initargs=(self.default_path, self.defaults_registry_path))
+
+    def replace_broken_executor(self):
+        """
+        Replace the process pool if a worker died, e.g. killed for running out of memory. A dead worker breaks the
+        whole pool, so every later request would fail until the server was restarted.
+        """
+        with self.executor_lock:
+            try:
+                # a broken pool refuses new work, a pool already replaced by another request accepts it
+                self.executor.submit(warm_worker)
+            except BrokenProcessPool:
+                self.executor.shutdown(wait=False)
+                self.executor = self.create_executor()
+
+    def submit(self, yaml_data, default_overrides=None, indent=2, separators=(',', ': '), block=False,
+               defaults_hash=None):
+        """
+        Queue a template for generation
+        :param yaml_data: user yaml as text or as already parsed data
+        :param default_overrides: dictionary of default values to override, or None
+        :param indent: json indentation of the template
+        :param separators: json item and key separators of the template
+        :param block: True to wait for a free slot rather than raising GeneratorPoolBusyError
+        :param defaults_hash: content hash of registered defaults, or None to use the defaults preloaded by the
+        workers
+        :return: future holding the template json and its list of (phase, seconds) tuples
+        """
+        return self.submit_task(generate_template,
+                                (yaml_data, defaults_hash, default_overrides, indent, separators), block)
+
+    def submit_job(self, job_directory, job_id, yaml_data, default_overrides=None, indent=2, separators=(',', ': '),
+                   defaults_hash=None):
+        """
+        Queue the template of a job for generation, the worker records the job's progress and result in the job store
+        :param job_directory: directory of the job store
+        :param job_id: id of a job already created in the job store
+        :param yaml_data: user yaml as text or as already parsed data
+        :param default_overrides: dictionary of default values to override, or None
+        :param indent: json indentation of the template
+        :param separators: json item and key separators of the template
+        :param defaults_hash: content hash of registered defaults, or None to use the defaults preloaded by the
+        workers
+        :return: future holding the template json and its list of (phase, seconds) tuples
+        """
+        future = self.submit_task(generate_job, (job_directory, job_id, yaml_data, defaults_hash, default_overrides,
+                                                 indent, separators), False)
+        future.add_done_callback(lambda finished: fail_lost_job(job_directory, job_id, finished))
+        return future
+
+    def submit_task(self, function, args, block):
+        """
+        Queue a function to run on a worker if a slot is free
+        :param function: module level function to run on the worker
+        :param args: tuple of arguments to the function
+        :param block: True to wait for a free slot rather than raising GeneratorPoolBusyError
+        :return: future holding the function's result
+        """
+        if not self.slots.acquire(blocking=block):
+            raise GeneratorPoolBusyError('Error: all {0} workers are busy and {1} requests are queued, '
+                                         'please try again later.'.format(self.workers, self.max_queue))
+        with self.lock:
+            self.pending += 1
+        try:
+            try:
+                future = self.executor.submit(function, *args)
+            except BrokenProcessPool:
+                self.replace_broken_executor()
+                future = self.executor.submit(function, *args)
+        except BaseException:
+            # the request never reached a worker, so its slot is freed here rather than by release
+            with self.lock:
+                self.pending -= 1
+            self.slots.release()
+            raise
+        future.add_done_callback(self.release)
+        return future
+
+    def release(self, future):
+        """
+        Free the slot held by a finished request
+        :param future: the finished request
+        """
+        with self.lock:
+            self.pending -= 1
+        self.slots.release()
+        if self.on_generated is not None and not future.cancelled() and future.exception() is None:
+            self.on_generated(*future.result())
+
+    @property
+    def busy(self):
+        """
+        :return: number of workers generating a template
+        """
+        return min(self.pending, self.workers)
+
+    @property
+    def queued(self):
+        """
+        :return: number of requests waiting for a free worker
+        """
+        return max(self.pending - self.workers, 0)
+
+    def generate(self, yaml_data, default_overrides=None, defaults_hash=None):
+        """
+        Generate a template, waiting no longer than the pool timeout. A template whose worker died, possibly while
+        generating another template, is generated once more on a new pool.
+        :param yaml_data: user yaml as text or as already parsed data
+        :param default_overrides: dictionary of default values to override, or None
+        :param defaults_hash: content hash of registered defaults, or None to use the defaults preloaded by the
+        workers
+        :return: cloud formation template json
+        """
+        for retry in (True, False):
+            future = self.submit(yaml_data, default_overrides, defaults_hash=defaults_hash)
+            try:
+                return future.result(timeout=self.timeout)[0]
+            except TimeoutError:
+                raise GeneratorTimeoutError('Error: template generation did not finish within {0} seconds.'
+                                            .format(self.timeout))
+            except BrokenProcessPool:
+                self.replace_broken_executor()
+                if not retry:
+                    raise
+
+    def generate_unordered(self, applications, default_overrides=None, indent=None, separators=(',', ':'),
+                           defaults_hash=None):
+        """
+        Generate templates for a list of applications, keeping at most one request per worker in flight so that a
+        large batch does not starve other requests
+        :param applications: list of user yaml data
+        :param default_overrides: dictionary of default values to override, or None
+        :param indent: json indentation of the templates
+        :param separators: json item and key separators of the templates
+        :param defaults_hash: content hash of registered defaults, or None to use the defaults preloaded by the
+        workers
+        :return: generator of (index, template json, exception) tuples in order of completion, the template is None
+        if generation failed
+        """
+        remaining = list(enumerate(applications))
+        in_flight = {}
+        while remaining or in_flight:
+            while remaining and len(in_flight) < self.workers:
+                index, application = remaining.pop(0)
+                in_flight[self.submit(application, default_overrides, indent, separators, block=True,
+                                      defaults_hash=defaults_hash)] = index
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = in_flight.pop(future)
+                if future.exception() is not None:
+                    yield index, None, future.exception()
+                else:
+                    yield index, future.result()[0], None
+
+    def shutdown(self):
+        """
+        Stop the worker processes
+        """
+        self.executor.shutdown()
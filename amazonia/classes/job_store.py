@@ -0,0 +1,226 @@
+#!/usr/bin/python3
+
+import json
+import os
+import re
+import tempfile
+import time
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETE = 'complete'
+JOB_FAILED = 'failed'
+JOB_ACTIVE = (JOB_QUEUED, JOB_RUNNING)
+
+job_id_pattern = re.compile('^[0-9a-f]{64}$')
+
+
+class JobStore(object):
+    def __init__(self, directory, ttl=3600, max_entries=1000, stale_timeout=600):
+        """
+        On disk store of template generation jobs and their templates, shared by every process using the same
+        directory. Job ids are content hashes of the job inputs, so identical submissions resolve to the same job.
+        Each job is a status json file and, once complete, a template file. Every write is to a temporary file that is
+        then moved into place, so readers never see a partial file.
+        :param directory: directory to hold the job files, created if it does not exist
+        :param ttl: seconds a job is kept after it was last updated
+        :param max_entries: maximum number of finished jobs kept, the least recently updated jobs are evicted first
+        :param stale_timeout: seconds after which a queued or running job that has not been updated is presumed lost,
+        e.g. to a hung or killed worker, and is replaced by the next identical submission
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stale_timeout = stale_timeout
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_status_path(self, job_id):
+        return os.path.join(self.directory, job_id + '.status.json')
+
+    def get_template_path(self, job_id):
+        return os.path.join(self.directory, job_id + '.template.json')
+
+    def write_file(self, path, data, replace=True):
+        """
+        Atomically write a file
+        :param path: file to write
+        :param data: string to write
+        :param replace: False to leave an existing file in place
+        :return: True if the file was written, False if replace is False and the file already existed
+        """
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'w') as temp_file:
+                temp_file.write(data)
+            if replace:
+                os.replace(temp_path, path)
+                return True
+            try:
+                # a hard link is only created if the path does not exist, so exactly one process wins the create
+                os.link(temp_path, path)
+                return True
+            except FileExistsError:
+                return False
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def get_claim_path(self, job_id, status):
+        return os.path.join(self.directory, '{0}.{1!r}.claim'.format(job_id, status['updated']))
+
+    def create(self, job_id):
+        """
+        Create a queued job unless a job with the same id already exists. A failed or stale job is replaced, so the
+        submission is retried rather than coalesced onto a job that will never complete
+        :param job_id: content hash of the job inputs
+        :return: True if the job was created, False if the submission was coalesced onto an existing job
+        """
+        self.evict()
+        now = time.time()
+        status_data = json.dumps({'id': job_id, 'status': JOB_QUEUED, 'phases': [], 'error': None, 'created': now,
+                                  'updated': now})
+        if self.write_file(self.get_status_path(job_id), status_data, replace=False):
+            return True
+        status = self.get(job_id)
+        if status is None or not (status['status'] == JOB_FAILED or self.is_stale(status)):
+            return False
+        # only one process can claim a given version of the old job, the others coalesce onto its replacement
+        claim_path = self.get_claim_path(job_id, status)
+        try:
+            os.link(self.get_status_path(job_id), claim_path)
+        except (FileExistsError, FileNotFoundError):
+            return False
+        try:
+            self.write_file(self.get_status_path(job_id), status_data)
+        finally:
+            os.remove(claim_path)
+        return True
+
+    def is_stale(self, status):
+        """
+        :param status: status dictionary of a job
+        :return: True if the job is queued or running but has not been updated within the stale timeout
+        """
+        return status['status'] in JOB_ACTIVE and status['updated'] < time.time() - self.stale_timeout
+
+    def get(self, job_id):
+        """
+        :param job_id: id of the job
+        :return: the job's status dictionary, or None if there is no such job
+        """
+        if not job_id_pattern.match(job_id):
+            return None
+        try:
+            with open(self.get_status_path(job_id), 'r') as status_file:
+                return json.load(status_file)
+        except FileNotFoundError:
+            return None
+
+    def update(self, job_id, **changes):
+        """
+        Update the status of a job, only the worker running the job may update it
+        :param job_id: id of the job
+        :param changes: status values to change
+        """
+        status = self.get(job_id)
+        if status is None:
+            return
+        status.update(changes, updated=time.time())
+        self.write_file(self.get_status_path(job_id), json.dumps(status))
+
+    def add_phase(self, job_id, phase, seconds):
+        """
+        Record the progress of a running job
+        :param job_id: id of the job
+        :param phase: name of the generation phase that has ended
+        :param seconds: duration of the phase
+        """
+        status = self.get(job_id)
+        if status is None:
+            return
+        self.update(job_id, status=JOB_RUNNING, phases=status['phases'] + [{'phase': phase, 'seconds': seconds}])
+
+    def complete(self, job_id, template_data):
+        """
+        Store the template of a finished job
+        :param job_id: id of the job
+        :param template_data: cloud formation template json
+        """
+        # the template is in place before the job is reported complete
+        self.write_file(self.get_template_path(job_id), template_data)
+        self.update(job_id, status=JOB_COMPLETE)
+
+    def fail(self, job_id, error):
+        """
+        Record the error of a failed job
+        :param job_id: id of the job
+        :param error: error message
+        """
+        self.update(job_id, status=JOB_FAILED, error=error)
+
+    def get_template(self, job_id):
+        """
+        :param job_id: id of the job
+        :return: cloud formation template json of a complete job, or None if there is no template
+        """
+        if not job_id_pattern.match(job_id):
+            return None
+        try:
+            with open(self.get_template_path(job_id), 'r') as template_file:
+                return template_file.read()
+        except FileNotFoundError:
+            return None
+
+    def remove(self, job_id):
+        """
+        Remove a job and its template
+        :param job_id: id of the job
+        """
+        for path in (self.get_template_path(job_id), self.get_status_path(job_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def evict(self):
+        """
+        Remove jobs that have not been updated within the ttl, then the least recently updated finished jobs over
+        max_entries. Queued and running jobs are only removed once they expire. Templates left without a job, e.g. by
+        a job evicted while running, are removed, as are temporary and claim files abandoned for longer than the ttl
+        """
+        jobs = []
+        expiry = time.time() - self.ttl
+        file_names = os.listdir(self.directory)
+        for file_name in file_names:
+            if file_name.endswith('.status.json'):
+                try:
+                    jobs.append((os.path.getmtime(os.path.join(self.directory, file_name)),
+                                 file_name[:-len('.status.json')]))
+                except FileNotFoundError:
+                    pass
+        job_ids = set(job_id for _, job_id in jobs)
+        for file_name in file_names:
+            path = os.path.join(self.directory, file_name)
+            try:
+                if file_name.endswith('.template.json'):
+                    if file_name[:-len('.template.json')] not in job_ids:
+                        os.remove(path)
+                elif file_name.endswith(('.tmp', '.claim')) and os.path.getmtime(path) < expiry:
+                    # files still being written or claimed are left alone
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        jobs.sort()
+        expired = [job_id for updated, job_id in jobs if updated < expiry]
+        # leave room for the job about to be created
+        excess = max(len(jobs) - len(expired) - self.max_entries + 1, 0)
+        evicted = list(expired)
+        for _, job_id in jobs[len(expired):]:
+            if len(evicted) - len(expired) >= excess:
+                break
+            status = self.get(job_id)
+            if status is not None and status['status'] not in JOB_ACTIVE:
+                evicted.append(job_id)
+        for job_id in evicted:
+            self.remove(job_id)
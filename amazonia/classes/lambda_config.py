@@ -1,3 +1,5 @@
+from amazonia.classes.config_object import ConfigObject
+
 
 class InvalidLambdaConfigError(Exception):
     """
@@ -7,7 +9,10 @@ class InvalidLambdaConfigError(Exception):
         self.value = value
 
 
-class LambdaConfig(object):
+class LambdaConfig(ConfigObject):
+    __slots__ = ('lambda_s3_bucket', 'lambda_s3_key', 'lambda_description', 'lambda_function_name', 'lambda_handler',
+                 'lambda_memory_size', 'lambda_role_arn', 'lambda_runtime', 'lambda_timeout', 'lambda_schedule')
+
     def __init__(self, lambda_s3_bucket, lambda_s3_key, lambda_description, lambda_function_name, lambda_handler,
                  lambda_memory_size, lambda_role_arn, lambda_runtime, lambda_timeout, lambda_schedule):
         """
@@ -34,7 +39,10 @@ class LambdaConfig(object):
         self.lambda_timeout = lambda_timeout
         self.lambda_schedule = lambda_schedule
 
-        # Validate that minsize is less than maxsize
+    def validate(self):
+        """
+        Raise InvalidLambdaConfigError if the lambda unit's fields are not consistent
+        """
         if self.lambda_memory_size % 64 != 0:
             raise InvalidLambdaConfigError('Lambda unit memory size ({0}) must be multiple of 64'
                                            .format(self.lambda_memory_size))
\ No newline at end of file
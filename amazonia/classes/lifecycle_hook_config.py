@@ -0,0 +1,28 @@
+#!/usr/bin/python3
+
+from amazonia.classes.config_object import ConfigObject
+
+
+class LifecycleHookConfig(ConfigObject):
+    __slots__ = ('name', 'lifecycle_transition', 'default_result', 'heartbeat_timeout', 'notification_metadata',
+                 'role_arn')
+
+    def __init__(self, name, lifecycle_transition, default_result, heartbeat_timeout, notification_metadata, role_arn):
+        """
+        Lifecycle hook config object, holding instances in a wait state while they launch or terminate, e.g. until their
+        userdata has bootstrapped them or their in-flight work has finished
+
+        :param name: Name of the lifecycle hook, unique within the group
+        :param lifecycle_transition: autoscaling:EC2_INSTANCE_LAUNCHING | autoscaling:EC2_INSTANCE_TERMINATING
+        :param default_result: CONTINUE | ABANDON, what happens to the instance if the hook times out
+        :param heartbeat_timeout: Seconds an instance waits for the hook to be completed before the default result
+        :param notification_metadata: Text included in the notification of each transition
+        :param role_arn: ARN of an IAM role allowing autoscaling to publish to the stack's SNS topic, the hook sends no
+        notification if not set
+        """
+        self.name = name
+        self.lifecycle_transition = lifecycle_transition
+        self.default_result = default_result
+        self.heartbeat_timeout = heartbeat_timeout
+        self.notification_metadata = notification_metadata
+        self.role_arn = role_arn
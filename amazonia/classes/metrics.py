@@ -0,0 +1,208 @@
+#!/usr/bin/python3
+
+import threading
+
+
+class Metric(object):
+    metric_type = 'untyped'
+
+    def __init__(self, name, description, label_names=()):
+        """
+        Base class for metrics exposed in the prometheus text exposition format
+        https://prometheus.io/docs/instrumenting/exposition_formats/
+        :param name: metric name, e.g. 'amazonia_http_requests_total'
+        :param description: help text of the metric
+        :param label_names: names of the labels each sample of the metric is split by
+        """
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def get_label_values(self, labels):
+        """
+        Order label values by the metric's label names
+        :param labels: dictionary of label name to label value
+        :return: tuple of label values
+        """
+        if set(labels) != set(self.label_names):
+            raise ValueError('Metric {0} expects labels {1}, got {2}'.format(self.name, self.label_names,
+                                                                             sorted(labels)))
+        return tuple(str(labels[label_name]) for label_name in self.label_names)
+
+    def format_labels(self, label_values, extra_labels=()):
+        """
+        Format label values as a prometheus label set
+        :param label_values: tuple of label values ordered by the metric's label names
+        :param extra_labels: additional (name, value) pairs, e.g. a histogram bucket's 'le' label
+        :return: label set string, empty if the sample has no labels
+        """
+        labels = list(zip(self.label_names, label_values)) + list(extra_labels)
+        if not labels:
+            return ''
+        return '{' + ','.join('{0}="{1}"'.format(name, value.replace('\\', '\\\\').replace('"', '\\"')
+                                                 .replace('\n', '\\n')) for name, value in labels) + '}'
+
+    def get_samples(self):
+        """
+        :return: list of (sample name, label string, value) tuples
+        """
+        with self.lock:
+            return [(self.name, self.format_labels(label_values), value)
+                    for label_values, value in sorted(self.values.items())]
+
+    def render(self):
+        """
+        :return: metric in prometheus text exposition format
+        """
+        lines = ['# HELP {0} {1}'.format(self.name, self.description),
+                 '# TYPE {0} {1}'.format(self.name, self.metric_type)]
+        lines.extend('{0}{1} {2}'.format(name, labels, format_value(value))
+                     for name, labels, value in self.get_samples())
+        return '\n'.join(lines) + '\n'
+
+
+class Counter(Metric):
+    metric_type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        """
+        Increase the counter
+        :param amount: amount to increase the counter by
+        :param labels: label values of the sample to increase
+        """
+        label_values = self.get_label_values(labels)
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def get(self, **labels):
+        """
+        :param labels: label values of the sample
+        :return: current value of the sample
+        """
+        label_values = self.get_label_values(labels)
+        with self.lock:
+            return self.values.get(label_values, 0)
+
+
+class Gauge(Metric):
+    metric_type = 'gauge'
+
+    def __init__(self, name, description, label_names=(), function=None):
+        """
+        A value that can go up and down
+        :param name: metric name
+        :param description: help text of the metric
+        :param label_names: names of the labels each sample of the metric is split by
+        :param function: function returning the current value, for an unlabelled gauge read when rendered
+        """
+        super(Gauge, self).__init__(name, description, label_names)
+        self.function = function
+
+    def set(self, value, **labels):
+        """
+        Set the gauge
+        :param value: new value of the sample
+        :param labels: label values of the sample to set
+        """
+        label_values = self.get_label_values(labels)
+        with self.lock:
+            self.values[label_values] = value
+
+    def get_samples(self):
+        if self.function is not None:
+            return [(self.name, '', self.function())]
+        return super(Gauge, self).get_samples()
+
+
+class Histogram(Metric):
+    metric_type = 'histogram'
+
+    def __init__(self, name, description, buckets, label_names=()):
+        """
+        Counts observations into cumulative buckets
+        :param name: metric name
+        :param description: help text of the metric
+        :param buckets: ascending list of bucket upper bounds, an infinite bucket is always added
+        :param label_names: names of the labels each sample of the metric is split by
+        """
+        super(Histogram, self).__init__(name, description, label_names)
+        self.buckets = sorted(buckets)
+
+    def observe(self, value, **labels):
+        """
+        Record an observation
+        :param value: the observed value, e.g. a duration in seconds or a size in bytes
+        :param labels: label values of the sample
+        """
+        label_values = self.get_label_values(labels)
+        with self.lock:
+            bucket_counts, total, count = self.values.get(label_values, ([0] * len(self.buckets), 0, 0))
+            bucket_counts = [bucket_count + 1 if value <= bound else bucket_count
+                             for bucket_count, bound in zip(bucket_counts, self.buckets)]
+            self.values[label_values] = (bucket_counts, total + value, count + 1)
+
+    def get_count(self, **labels):
+        """
+        :param labels: label values of the sample
+        :return: number of observations recorded
+        """
+        label_values = self.get_label_values(labels)
+        with self.lock:
+            return self.values[label_values][2] if label_values in self.values else 0
+
+    def get_samples(self):
+        samples = []
+        with self.lock:
+            for label_values, (bucket_counts, total, count) in sorted(self.values.items()):
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    samples.append((self.name + '_bucket',
+                                    self.format_labels(label_values, [('le', format_value(bound))]), bucket_count))
+                samples.append((self.name + '_bucket', self.format_labels(label_values, [('le', '+Inf')]), count))
+                samples.append((self.name + '_sum', self.format_labels(label_values), total))
+                samples.append((self.name + '_count', self.format_labels(label_values), count))
+        return samples
+
+
+def format_value(value):
+    """
+    Format a sample value, integral values without a decimal point
+    :param value: number
+    :return: string
+    """
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+class MetricsRegistry(object):
+    def __init__(self):
+        """
+        In process collection of metrics that renders them all for a /metrics endpoint
+        """
+        self.metrics = []
+
+    def register(self, metric):
+        """
+        Add a metric to the registry
+        :param metric: the metric to add
+        :return: the metric
+        """
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, description, label_names=()):
+        return self.register(Counter(name, description, label_names))
+
+    def gauge(self, name, description, label_names=(), function=None):
+        return self.register(Gauge(name, description, label_names, function))
+
+    def histogram(self, name, description, buckets, label_names=()):
+        return self.register(Histogram(name, description, buckets, label_names))
+
+    def render(self):
+        """
+        :return: every metric in prometheus text exposition format
+        """
+        return ''.join(metric.render() for metric in self.metrics)
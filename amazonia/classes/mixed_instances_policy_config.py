@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+
+from amazonia.classes.config_object import ConfigObject
+
+
+class InvalidMixedInstancesPolicyConfigError(Exception):
+    """
+    Exception if invalid properties are supplied
+    """
+    def __init__(self, value):
+        self.value = value
+
+
+class MixedInstancesPolicyConfig(ConfigObject):
+    __slots__ = ('instance_types', 'on_demand_base_capacity', 'on_demand_percentage_above_base_capacity',
+                 'spot_allocation_strategy', 'spot_instance_pools', 'spot_max_price')
+
+    def __init__(self, instance_types, on_demand_base_capacity, on_demand_percentage_above_base_capacity,
+                 spot_allocation_strategy, spot_instance_pools, spot_max_price):
+        """
+        Mixed instances policy config object, spreading an autoscaling group over several instance types and over on
+        demand and spot instances
+
+        :param instance_types: List of instance types to launch in addition to the asg_config instance_type, in order of
+        preference for on demand instances
+        :param on_demand_base_capacity: Number of instances to launch on demand before launching any spot instances
+        :param on_demand_percentage_above_base_capacity: Percentage, 0 to 100, of instances beyond the base capacity to
+        launch on demand, the rest are spot instances
+        :param spot_allocation_strategy: lowest-price | capacity-optimized
+        :param spot_instance_pools: Number of cheapest instance types to spread spot instances over, lowest-price only
+        :param spot_max_price: Maximum hourly price to pay for a spot instance, the on demand price if not set
+        """
+        self.instance_types = instance_types
+        self.on_demand_base_capacity = on_demand_base_capacity
+        self.on_demand_percentage_above_base_capacity = on_demand_percentage_above_base_capacity
+        self.spot_allocation_strategy = spot_allocation_strategy
+        self.spot_instance_pools = spot_instance_pools
+        self.spot_max_price = spot_max_price
+
+    def validate(self):
+        """
+        Raise InvalidMixedInstancesPolicyConfigError if the mixed instances policy's fields are not consistent
+        """
+        if self.spot_instance_pools is not None and self.spot_allocation_strategy != 'lowest-price':
+            raise InvalidMixedInstancesPolicyConfigError('Mixed instances policy spot_instance_pools can only be set '
+                                                         'with the lowest-price spot_allocation_strategy')
@@ -0,0 +1,96 @@
+#!/usr/bin/python3
+
+from amazonia.classes.config_object import ConfigObject
+from amazonia.classes.util import get_cf_friendly_name
+
+
+class InvalidScheduledActionConfigError(Exception):
+    """
+    Exception if invalid properties are supplied
+    """
+    def __init__(self, value):
+        self.value = value
+
+
+class ScheduledActionConfig(ConfigObject):
+    __slots__ = ('name', 'recurrence', 'min_size', 'max_size', 'desired_capacity', 'time_zone', 'start_time',
+                 'end_time')
+
+    def __init__(self, name, recurrence, min_size, max_size, desired_capacity, time_zone, start_time, end_time):
+        """
+        Scheduled action config object, resizing an autoscaling group on a schedule
+
+        :param name: Human readable name of the scheduled action, unique within the group
+        :param recurrence: Cron expression of when to resize the group, e.g. '30 7 * * 1-5'
+        :param min_size: Minimum size of the group from the scheduled time
+        :param max_size: Maximum size of the group from the scheduled time
+        :param desired_capacity: Number of instances the group should have from the scheduled time
+        :param time_zone: IANA time zone of the recurrence, e.g. 'Australia/Sydney', UTC if not set
+        :param start_time: UTC time to first resize the group, e.g. '2017-01-01T00:00:00Z'
+        :param end_time: UTC time to stop resizing the group
+        """
+        self.name = name
+        self.recurrence = recurrence
+        self.min_size = min_size
+        self.max_size = max_size
+        self.desired_capacity = desired_capacity
+        self.time_zone = time_zone
+        self.start_time = start_time
+        self.end_time = end_time
+
+    def validate(self):
+        """
+        Raise InvalidScheduledActionConfigError if the scheduled action's fields are not consistent
+        """
+        if not self.name:
+            raise InvalidScheduledActionConfigError('Scheduled action with recurrence {0} must have a name'
+                                                    .format(self.recurrence))
+        if self.min_size is None and self.max_size is None and self.desired_capacity is None:
+            raise InvalidScheduledActionConfigError('Scheduled action {0} must set at least one of min_size, max_size '
+                                                    'and desired_capacity'.format(self.name))
+        if self.recurrence is None and self.start_time is None:
+            raise InvalidScheduledActionConfigError('Scheduled action {0} must set a recurrence or a start_time'
+                                                    .format(self.name))
+        # sizes may be references to template parameters, which can only be compared once the stack is created
+        minimum, maximum, desired = [int(size) if isinstance(size, (int, str)) and str(size).isdigit() else None
+                                     for size in (self.min_size, self.max_size, self.desired_capacity)]
+        if minimum is not None and maximum is not None and minimum > maximum:
+            raise InvalidScheduledActionConfigError('Scheduled action {0} min_size ({1}) cannot be larger than '
+                                                    'max_size ({2})'.format(self.name, self.min_size, self.max_size))
+        if desired is not None and ((minimum is not None and desired < minimum) or
+                                    (maximum is not None and desired > maximum)):
+            raise InvalidScheduledActionConfigError('Scheduled action {0} desired_capacity ({1}) must be between '
+                                                    'min_size and max_size'.format(self.name, self.desired_capacity))
+
+
+def get_scheduled_shutdown_actions(minsize, maxsize):
+    """
+    Scheduled actions of the ec2_scheduled_shutdown preset, which turns a group off outside work hours
+    :param minsize: minimum size of the group during work hours
+    :param maxsize: maximum size of the group during work hours
+    :return: list of scheduled action config objects
+    """
+    # Recurrence uses Cron syntax in UTC: https://en.wikipedia.org/wiki/Cron
+    return [
+        # turn off instances (max=0), 0900 UTC = 2000 AEDT
+        ScheduledActionConfig(name='OFF', recurrence='0 09 * * *', min_size=0, max_size=0, desired_capacity=None,
+                              time_zone=None, start_time=None, end_time=None),
+        # turn on instances (max=maxsize), 1900 UTC (previous day) = 0600 AEDT
+        ScheduledActionConfig(name='ON', recurrence='0 19 * * 0,1,2,3,4', min_size=minsize, max_size=maxsize,
+                              desired_capacity=None, time_zone=None, start_time=None, end_time=None)
+    ]
+
+
+def get_duplicate_scheduled_action_names(scheduled_actions, ec2_scheduled_shutdown):
+    """
+    Scheduled actions are titled after their names, find the names that would give two actions of a group the same
+    title
+    :param scheduled_actions: list of scheduled action config objects
+    :param ec2_scheduled_shutdown: True if the group also has the actions of the ec2_scheduled_shutdown preset
+    :return: sorted list of duplicated names
+    """
+    names = [scheduled_action.name for scheduled_action in scheduled_actions or []]
+    if ec2_scheduled_shutdown:
+        names += [scheduled_action.name for scheduled_action in get_scheduled_shutdown_actions(0, 0)]
+    titles = [get_cf_friendly_name(name) for name in names]
+    return sorted(set(name for name, title in zip(names, titles) if titles.count(title) > 1))
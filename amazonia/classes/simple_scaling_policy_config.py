@@ -1,7 +1,12 @@
 #!/usr/bin/python3
 
+from amazonia.classes.config_object import ConfigObject
+
+
+class SimpleScalingPolicyConfig(ConfigObject):
+    __slots__ = ('name', 'description', 'metric_name', 'comparison_operator', 'threshold', 'evaluation_periods',
+                 'period', 'scaling_adjustment', 'cooldown')
 
-class SimpleScalingPolicyConfig(object):
     def __init__(self, name, description, metric_name, comparison_operator,
                  threshold, evaluation_periods, period, scaling_adjustment, cooldown):
         """
@@ -18,8 +18,7 @@ class SingleInstance(LocalSecurityEnabledObject):
 
         super(SingleInstance, self).__init__(vpc=single_instance_config.vpc, title=title, template=template)
         self.sns_topic = single_instance_config.sns_topic
-        region = single_instance_config.availability_zone[:-1]
-        userdata = """#cloud-config
+        userdata_head = """#cloud-config
 # Capture all cloud-config output into a more readable logfile
 output: {all: '| tee -a /var/log/cloud-init-output.log'}
 # update and install packages, reboot if necessary
@@ -51,8 +50,11 @@ runcmd:
 # cloudwatch logs agent and forwarding config
  - curl https://s3.amazonaws.com/aws-cloudwatch/downloads/latest/awslogs-agent-setup.py -O
  - chmod +x ./awslogs-agent-setup.py
- - ./awslogs-agent-setup.py -n -r """ + region + """ -c /etc/awslogs.cfg
+ - ./awslogs-agent-setup.py -n -r """
+        userdata_tail = """ -c /etc/awslogs.cfg
 """
+        # the region is resolved when the stack is created, so the template can be deployed to any region
+        userdata = Join('', [userdata_head, Ref('AWS::Region'), userdata_tail])
 
         tags = Tags(Name=Join('', [Ref('AWS::StackName'), '-', title]))
         if single_instance_config.ec2_scheduled_shutdown:
@@ -1,5 +1,6 @@
 #!/usr/bin/python3
 
+from amazonia.classes.alb import get_shared_load_balancer_errors
 from amazonia.classes.amz_api_gateway import ApiGatewayUnit
 from amazonia.classes.amz_autoscaling import AutoscalingUnit
 from amazonia.classes.amz_cf_distribution import CFDistributionUnit
@@ -8,6 +9,8 @@ from amazonia.classes.amz_lambda import LambdaUnit
 from amazonia.classes.network import Network
 from amazonia.classes.stack_config import NetworkConfig
 from amazonia.classes.amz_zd_autoscaling import ZdAutoscalingUnit
+from amazonia.classes.elb_config import InvalidElbConfigError
+from amazonia.classes.util import get_insecure_variable_errors, InsecureVariableError
 from troposphere import Ref
 
 
@@ -49,6 +52,11 @@ class Stack(Network):
         :param nat_highly_available: True/False for whether or not to use a series of NAT gateways or a single NAT
         :param ec2_scheduled_shutdown: True/False for whether to schedule shutdown for EC2 instances outside work hours
         """
+        # stacks built without Yaml, or from config objects changed after it, are checked for insecure variables here
+        insecure_variable_errors = get_insecure_variable_errors(dict((name, value) for name, value in locals().items()
+                                                                     if name != 'self'))
+        if insecure_variable_errors:
+            raise InsecureVariableError('\n'.join(insecure_variable_errors))
 
         super(Stack, self).__init__(
             keypair, availability_zones, vpc_cidr, home_cidrs, public_cidr, jump_image_id,
@@ -65,9 +73,6 @@ class Stack(Network):
         self.units = {}
         self.network_config = None
 
-        for autoscaling_unit in self.autoscaling_units:
-            autoscaling_unit['ec2_scheduled_shutdown'] = ec2_scheduled_shutdown
-
         self.network_config = NetworkConfig(vpc=self.vpc,
                                             public_subnets=[Ref(subnet) for subnet in self.public_subnets],
                                             private_subnets=[Ref(subnet) for subnet in self.private_subnets],
@@ -87,11 +92,16 @@ class Stack(Network):
         # Add Database Units
         self.add_units(self.database_units, DatabaseUnit)
 
+        shared_load_balancer_errors = get_shared_load_balancer_errors(self.autoscaling_units,
+                                                                      self.zd_autoscaling_units)
+        if shared_load_balancer_errors:
+            raise InvalidElbConfigError('\n'.join(shared_load_balancer_errors))
+
         # Add ZD Autoscaling Units
         self.add_units(self.zd_autoscaling_units, ZdAutoscalingUnit)
 
         # Add Autoscaling Units
-        self.add_units(self.autoscaling_units, AutoscalingUnit)
+        self.add_units(self.autoscaling_units, AutoscalingUnit, ec2_scheduled_shutdown=ec2_scheduled_shutdown)
 
         # Add Lambda Units
         self.add_units(self.lambda_units, LambdaUnit)
@@ -102,16 +112,23 @@ class Stack(Network):
         # Add Cloudfront Units
         self.add_units(self.cf_distribution_units, CFDistributionUnit)
 
-    def add_units(self, unit_list, unit_constructor):
+    def add_units(self, unit_list, unit_constructor, **stack_params):
+        """
+        Create units from their unit dicts, the unit dicts are not changed
+        :param unit_list: list of unit dicts
+        :param unit_constructor: unit class to create
+        :param stack_params: stack values passed to every unit, overriding values of the same name in the unit dicts
+        """
         for unit in unit_list:  # type: dict
             unit_title = unit['unit_title']
             if unit_title in self.units:
                 raise DuplicateUnitNameError("Error: unit name '{0}' has already been specified, "
                                              'it must be unique.'.format(unit_title))
+            unit_params = dict(unit, **stack_params)
             self.units[unit_title] = unit_constructor(
                 template=self.template,
                 stack_config=self.network_config,
-                **unit
+                **unit_params
             )
 
 
@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+
+from amazonia.classes.config_object import ConfigObject
+
+
+class InvalidStepScalingPolicyConfigError(Exception):
+    """
+    Exception if invalid properties are supplied
+    """
+    def __init__(self, value):
+        self.value = value
+
+
+class StepScalingPolicyConfig(ConfigObject):
+    __slots__ = ('name', 'description', 'metric_name', 'namespace', 'statistic', 'comparison_operator', 'threshold',
+                 'evaluation_periods', 'period', 'adjustment_type', 'estimated_instance_warmup', 'step_adjustments')
+
+    def __init__(self, name, description, metric_name, namespace, statistic, comparison_operator, threshold,
+                 evaluation_periods, period, adjustment_type, estimated_instance_warmup, step_adjustments):
+        """
+        Step scaling policy config object, an alarm on a metric triggers the adjustment of the band the metric is in
+        http://docs.aws.amazon.com/AWSCloudFormation/latest/UserGuide/aws-properties-as-policy.html
+        :param name: Human readable name of scaling policy
+        :param description: Description of scaling policy
+        :param metric_name: metric of the autoscaling group to evaluate against, e.g. CPUUtilization
+        :param namespace: namespace of the metric, e.g. AWS/EC2
+        :param statistic: Average | Minimum | Maximum
+        :param comparison_operator: GreaterThanOrEqualToThreshold | GreaterThanThreshold | LessThanThreshold
+        | LessThanOrEqualToThreshold
+        :param threshold: Metric threshold of the alarm, step bounds are relative to it
+        :param evaluation_periods: How many consecutive periods must pass before alarm/policy is triggered
+        :param period: duration at threshold to trigger alarm/policy
+        :param adjustment_type: ChangeInCapacity | ExactCapacity | PercentChangeInCapacity
+        :param estimated_instance_warmup: seconds until a new instance contributes to the metric
+        :param step_adjustments: list of StepAdjustmentConfig bands
+        """
+        self.name = name
+        self.description = description
+        self.metric_name = metric_name
+        self.namespace = namespace
+        self.statistic = statistic
+        self.comparison_operator = comparison_operator
+        self.threshold = threshold
+        self.evaluation_periods = evaluation_periods
+        self.period = period
+        self.adjustment_type = adjustment_type
+        self.estimated_instance_warmup = estimated_instance_warmup
+        self.step_adjustments = step_adjustments
+
+    def validate(self):
+        """
+        Raise InvalidStepScalingPolicyConfigError if the step scaling policy's fields are not consistent
+        """
+        # bands must cover the metric's range without gaps or overlaps, only the outer bands may be unbounded
+        steps = sorted(self.step_adjustments or [],
+                       key=lambda step: float('-inf') if step.lower_bound is None else float(step.lower_bound))
+        if not steps:
+            raise InvalidStepScalingPolicyConfigError('Step scaling policy {0} must have at least one step adjustment'
+                                                      .format(self.name))
+        for lower_step, upper_step in zip(steps, steps[1:]):
+            if lower_step.upper_bound is None or upper_step.lower_bound is None or \
+                    float(lower_step.upper_bound) != float(upper_step.lower_bound):
+                raise InvalidStepScalingPolicyConfigError('Step scaling policy {0} step adjustments must not overlap '
+                                                          'or leave gaps, the step ending at {1} is followed by a step '
+                                                          'starting at {2}'.format(self.name, lower_step.upper_bound,
+                                                                                   upper_step.lower_bound))
+
+
+class StepAdjustmentConfig(ConfigObject):
+    __slots__ = ('lower_bound', 'upper_bound', 'adjustment')
+
+    def __init__(self, lower_bound, upper_bound, adjustment):
+        """
+        One band of a step scaling policy, bounds are relative to the alarm threshold
+        :param lower_bound: inclusive lower bound of the band, None for negative infinity
+        :param upper_bound: exclusive upper bound of the band, None for infinity
+        :param adjustment: capacity change while the metric is in the band
+        """
+        self.lower_bound = lower_bound
+        self.upper_bound = upper_bound
+        self.adjustment = adjustment
+
+    def validate(self):
+        """
+        Raise InvalidStepScalingPolicyConfigError if the step adjustment's fields are not consistent
+        """
+        if self.lower_bound is not None and self.upper_bound is not None and \
+                float(self.lower_bound) >= float(self.upper_bound):
+            raise InvalidStepScalingPolicyConfigError('Step adjustment lower_bound ({0}) must be less than its '
+                                                      'upper_bound ({1})'.format(self.lower_bound, self.upper_bound))
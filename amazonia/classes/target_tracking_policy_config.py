@@ -0,0 +1,57 @@
+#!/usr/bin/python3
+
+from amazonia.classes.config_object import ConfigObject
+
+
+class InvalidTargetTrackingPolicyConfigError(Exception):
+    """
+    Exception if invalid properties are supplied
+    """
+    def __init__(self, value):
+        self.value = value
+
+
+class TargetTrackingPolicyConfig(ConfigObject):
+    __slots__ = ('name', 'predefined_metric', 'resource_label', 'metric_name', 'namespace', 'statistic',
+                 'target_value', 'disable_scale_in', 'estimated_instance_warmup')
+
+    def __init__(self, name, predefined_metric, resource_label, metric_name, namespace, statistic, target_value,
+                 disable_scale_in, estimated_instance_warmup):
+        """
+        Target tracking scaling policy config object, the group is scaled to keep a metric at the target value
+        AWS Cloud Formation, page under https://docs.aws.amazon.com/AWSCloudFormation/latest/UserGuide/:
+        aws-properties-autoscaling-autoscalinggroup-targettrackingconfiguration.html
+        :param name: Human readable name of scaling policy
+        :param predefined_metric: ASGAverageCPUUtilization | ASGAverageNetworkIn | ASGAverageNetworkOut
+        | ALBRequestCountPerTarget, or None for a custom metric
+        :param resource_label: target group label to track ALBRequestCountPerTarget for, defaults to the target group
+        of the unit's own application load balancer
+        :param metric_name: name of a custom metric for the autoscaling group, or for the unit's load balancer if its
+        namespace is AWS/ELB or AWS/ApplicationELB
+        :param namespace: namespace of the custom metric
+        :param statistic: statistic of the custom metric, e.g. Average
+        :param target_value: value of the metric to keep the group at
+        :param disable_scale_in: True to only scale out, leaving scale in to another policy
+        :param estimated_instance_warmup: seconds until a new instance contributes to the metric
+        """
+        self.name = name
+        self.predefined_metric = predefined_metric
+        self.resource_label = resource_label
+        self.metric_name = metric_name
+        self.namespace = namespace
+        self.statistic = statistic
+        self.target_value = target_value
+        self.disable_scale_in = disable_scale_in
+        self.estimated_instance_warmup = estimated_instance_warmup
+
+    def validate(self):
+        """
+        Raise InvalidTargetTrackingPolicyConfigError if the target tracking policy's fields are not consistent
+        """
+        if (self.predefined_metric is None) == (self.metric_name is None):
+            raise InvalidTargetTrackingPolicyConfigError('Target tracking policy {0} must set one of '
+                                                         'predefined_metric or metric_name'.format(self.name))
+        if self.metric_name is not None and (self.namespace is None or self.statistic is None):
+            raise InvalidTargetTrackingPolicyConfigError('Target tracking policy {0} must set the namespace and '
+                                                         'statistic of custom metric {1}'
+                                                         .format(self.name, self.metric_name))
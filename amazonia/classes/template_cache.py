@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+
+import sqlite3
+import time
+from contextlib import closing
+
+import amazonia
+from amazonia.classes.util import get_content_hash
+
+
+class TemplateCache(object):
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, timeout=30):
+        """
+        Content addressed cache of generated templates in an sqlite database, shared by every process that opens the
+        same file, e.g. the amz.py command line and each web server worker. Writes are transactions, so readers never
+        see a partial template, and the write ahead log lets readers continue while another process writes.
+        :param path: path of the sqlite database file, created if it does not exist
+        :param max_bytes: maximum total size of the cached templates, least recently used templates are evicted first
+        :param timeout: seconds to wait for another process's write lock before giving up
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        with closing(self.connect()) as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS templates ('
+                               'key TEXT PRIMARY KEY, '
+                               'template TEXT NOT NULL, '
+                               'size INTEGER NOT NULL, '
+                               'last_access REAL NOT NULL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS templates_last_access ON templates (last_access)')
+
+    def connect(self):
+        """
+        Open a connection, a connection is opened per operation so that the cache can be used from any thread and
+        from processes forked after the cache was created
+        :return: sqlite3 connection in autocommit mode
+        """
+        return sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+
+    @staticmethod
+    def get_key(application, defaults_hash, version=amazonia.__version__, options=()):
+        """
+        Create the cache key of a template
+        :param application: application yaml text
+        :param defaults_hash: content hash of the defaults yaml
+        :param version: amazonia version that generates the template
+        :param options: strings for any generation options that change the template, e.g. parameterised fields
+        :return: hex digest identifying the template
+        """
+        return get_content_hash(version, defaults_hash, application, *options)
+
+    def get(self, key):
+        """
+        Return a cached template and mark it as recently used
+        :param key: cache key of the template
+        :return: cloud formation template json, or None if the template is not cached
+        """
+        with closing(self.connect()) as connection:
+            row = connection.execute('SELECT template FROM templates WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            connection.execute('UPDATE templates SET last_access = ? WHERE key = ?', (time.time(), key))
+            return row[0]
+
+    def put(self, key, template_data):
+        """
+        Cache a template, evicting the least recently used templates if the cache is over its size cap
+        :param key: cache key of the template
+        :param template_data: cloud formation template json
+        """
+        size = len(template_data.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with closing(self.connect()) as connection:
+            # take the write lock up front so concurrent writers evict against a consistent total size
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                connection.execute('INSERT OR REPLACE INTO templates (key, template, size, last_access) '
+                                   'VALUES (?, ?, ?, ?)', (key, template_data, size, time.time()))
+                total_size = connection.execute('SELECT COALESCE(SUM(size), 0) FROM templates').fetchone()[0]
+                if total_size > self.max_bytes:
+                    evicted = []
+                    for evict_key, evict_size in connection.execute(
+                            'SELECT key, size FROM templates WHERE key != ? ORDER BY last_access', (key,)):
+                        if total_size <= self.max_bytes:
+                            break
+                        evicted.append((evict_key,))
+                        total_size -= evict_size
+                    connection.executemany('DELETE FROM templates WHERE key = ?', evicted)
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+
+    def get_size(self):
+        """
+        :return: number of templates cached and their total size in bytes
+        """
+        with closing(self.connect()) as connection:
+            return connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM templates').fetchone()
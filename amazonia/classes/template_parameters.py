@@ -0,0 +1,159 @@
+#!/usr/bin/python3
+
+from collections import OrderedDict
+
+from amazonia.classes.yaml import Yaml
+from troposphere import Parameter, Ref
+
+# yaml fields that can become cloud formation parameters and the name of their parameter
+parameter_names = OrderedDict([
+    ('keypair', 'KeyPair'),
+    ('image_id', 'ImageId'),
+    ('instance_type', 'InstanceType'),
+    ('minsize', 'MinSize'),
+    ('maxsize', 'MaxSize'),
+    ('db_instance_type', 'DbInstanceType'),
+    ('blue_weight', 'BlueWeight'),
+    ('green_weight', 'GreenWeight')
+])
+
+# lower bounds of parameter fields that their cerberus schema does not constrain, as it also accepts strings
+parameter_min_values = {
+    'minsize': 0,
+    'maxsize': 0
+}
+
+# unit fields holding config objects with parameter fields, and the prefix of their parameter names
+parameter_unit_configs = OrderedDict([
+    ('autoscaling_units', [('asg_config', '')]),
+    ('zd_autoscaling_units', [('blue_asg_config', 'Blue'), ('green_asg_config', 'Green'),
+                              ('weighted_routing_config', '')]),
+    ('database_units', [('database_config', '')])
+])
+
+
+class ParameterRef(Ref):
+    def __init__(self, parameter, default):
+        """
+        Reference to a template parameter that keeps the merged value the parameter defaults to
+        :param parameter: troposphere Parameter
+        :param default: merged value of the field
+        """
+        super(ParameterRef, self).__init__(parameter)
+        self.default = default
+
+
+def get_literal_value(value):
+    """
+    :param value: field value, which may be a reference to a template parameter
+    :return: the value, or the merged value of the field if it is a reference to a template parameter
+    """
+    return value.default if isinstance(value, ParameterRef) else value
+
+
+class TemplateParameters(object):
+    def __init__(self, fields):
+        """
+        Turn selected yaml fields of a merged stack into cloud formation parameters, so that one template can serve
+        every environment. Each parameter defaults to its merged value, i.e. the defaults file value unless the
+        application overrides it, and is constrained by the field's cerberus schema rules. Checks across fields only
+        apply to the merged values, e.g. cloud formation can not check a minsize parameter is at most the maxsize, so
+        stack creation fails rather than amazonia rejecting a larger minsize.
+        :param fields: list of yaml field names to parameterise, see parameter_names
+        """
+        unknown_fields = set(fields) - set(parameter_names)
+        if unknown_fields:
+            raise ValueError('Error: {0} can not be parameters, choose from {1}'.format(sorted(unknown_fields),
+                                                                                        list(parameter_names)))
+        self.fields = [field for field in parameter_names if field in fields]
+        self.parameters = []
+
+    def parameterise(self, united_data):
+        """
+        Replace the selected fields of a merged stack with references to new parameters
+        :param united_data: merged stack dictionary, it is not changed
+        :return: merged stack dictionary referring to the parameters
+        """
+        self.parameters = []
+        united_data = dict(united_data)
+        for field in self.fields:
+            if field in united_data and united_data[field] is not None:
+                united_data[field] = self.add_parameter(parameter_names[field], united_data[field],
+                                                        self.get_field_schema(field, Yaml.cerberus_schema[field]),
+                                                        field)
+
+        for unit_key, unit_configs in parameter_unit_configs.items():
+            units = []
+            for unit in united_data.get(unit_key) or []:
+                unit = dict(unit)
+                for config_key, prefix in unit_configs:
+                    config = unit.get(config_key)
+                    if config is None:
+                        continue
+                    config_schema = Yaml.cerberus_schema[unit_key]['schema']['schema'][config_key]['schema']
+                    changes = {}
+                    for field in self.fields:
+                        if field in config.get_field_names() and getattr(config, field) is not None:
+                            changes[field] = self.add_parameter(
+                                unit['unit_title'] + prefix + parameter_names[field], getattr(config, field),
+                                self.get_field_schema(field, config_schema[field]),
+                                '{0} of {1} {2}'.format(field, unit['unit_title'], config_key))
+                    unit[config_key] = config.replace(**changes)
+                units.append(unit)
+            if unit_key in united_data:
+                united_data[unit_key] = units
+        return united_data
+
+    @staticmethod
+    def get_field_schema(field, field_schema):
+        """
+        :param field: yaml field name
+        :param field_schema: cerberus schema rules of the field
+        :return: schema rules of the field, with the parameter's lower bound if the schema has none
+        """
+        if field in parameter_min_values and 'min' not in field_schema:
+            return dict(field_schema, min=parameter_min_values[field])
+        return field_schema
+
+    def add_parameter(self, title, value, field_schema, description):
+        """
+        Create a parameter constrained by a field's cerberus schema rules
+        :param title: parameter name
+        :param value: merged value of the field, used as the parameter default
+        :param field_schema: cerberus schema rules of the field
+        :param description: description of the parameter
+        :return: reference to the parameter, holding the value as its default
+        """
+        schema_types = field_schema.get('type')
+        schema_types = schema_types if isinstance(schema_types, list) else [schema_types]
+        is_number = 'number' in schema_types and str(value).lstrip('-').replace('.', '', 1).isdigit()
+
+        parameter = Parameter(title, Type='Number' if is_number else 'String', Default=str(value),
+                              Description=description)
+        if 'allowed' in field_schema:
+            parameter.AllowedValues = [str(allowed) for allowed in field_schema['allowed']]
+        if is_number:
+            if 'min' in field_schema:
+                parameter.MinValue = field_schema['min']
+            if 'max' in field_schema:
+                parameter.MaxValue = field_schema['max']
+        else:
+            if 'regex' in field_schema:
+                parameter.AllowedPattern = field_schema['regex']
+                parameter.ConstraintDescription = 'must match the pattern {0}'.format(field_schema['regex'])
+            if field_schema.get('empty') is False:
+                parameter.MinLength = 1
+            if 'minlength' in field_schema:
+                parameter.MinLength = field_schema['minlength']
+            if 'maxlength' in field_schema:
+                parameter.MaxLength = field_schema['maxlength']
+        self.parameters.append(parameter)
+        return ParameterRef(parameter, value)
+
+    def add_to_template(self, template):
+        """
+        Add the parameters created by parameterise() to a template
+        :param template: troposphere template built from the parameterised stack
+        """
+        for parameter in self.parameters:
+            template.add_parameter(parameter)
@@ -0,0 +1,209 @@
+#!/usr/bin/python3
+
+"""
+Cloud formation properties that are missing from the pinned troposphere version, declared as subclasses of the
+troposphere objects they extend so that they can be removed once troposphere is upgraded
+"""
+from troposphere import AWSObject, AWSProperty, autoscaling, codedeploy, ec2
+from troposphere.validators import boolean, integer
+
+
+def double(x):
+    try:
+        float(x)
+    except (ValueError, TypeError):
+        raise ValueError('%r is not a valid double' % x)
+    else:
+        return x
+
+
+class CodeDeployAlarm(AWSProperty):
+    props = {
+        'Name': (str, False),
+    }
+
+
+class AlarmConfiguration(AWSProperty):
+    props = {
+        'Alarms': ([CodeDeployAlarm], False),
+        'Enabled': (boolean, False),
+        'IgnorePollAlarmFailure': (boolean, False),
+    }
+
+
+class AutoRollbackConfiguration(AWSProperty):
+    props = {
+        'Enabled': (boolean, False),
+        'Events': ([str], False),
+    }
+
+
+class DeploymentGroup(codedeploy.DeploymentGroup):
+    props = dict(codedeploy.DeploymentGroup.props,
+                 AlarmConfiguration=(AlarmConfiguration, False),
+                 AutoRollbackConfiguration=(AutoRollbackConfiguration, False))
+
+
+class MetricDimension(AWSProperty):
+    props = {
+        'Name': (str, True),
+        'Value': (str, True),
+    }
+
+
+class CustomizedMetricSpecification(AWSProperty):
+    props = {
+        'Dimensions': ([MetricDimension], False),
+        'MetricName': (str, True),
+        'Namespace': (str, True),
+        'Statistic': (str, True),
+        'Unit': (str, False),
+    }
+
+
+class PredefinedMetricSpecification(AWSProperty):
+    props = {
+        'PredefinedMetricType': (str, True),
+        'ResourceLabel': (str, False),
+    }
+
+
+class TargetTrackingConfiguration(AWSProperty):
+    props = {
+        'CustomizedMetricSpecification': (CustomizedMetricSpecification, False),
+        'DisableScaleIn': (boolean, False),
+        'PredefinedMetricSpecification': (PredefinedMetricSpecification, False),
+        'TargetValue': (double, True),
+    }
+
+
+class ScalingPolicy(autoscaling.ScalingPolicy):
+    # target tracking policies have no adjustment type
+    props = dict(autoscaling.ScalingPolicy.props,
+                 AdjustmentType=(str, False),
+                 TargetTrackingConfiguration=(TargetTrackingConfiguration, False))
+
+
+class IamInstanceProfile(ec2.IamInstanceProfile):
+    # launch templates may name the instance profile rather than give its arn
+    props = dict(ec2.IamInstanceProfile.props,
+                 Name=(str, False))
+
+
+class LaunchTemplateData(AWSProperty):
+    props = {
+        'BlockDeviceMappings': ([autoscaling.BlockDeviceMapping], False),
+        'IamInstanceProfile': (IamInstanceProfile, False),
+        'ImageId': (str, False),
+        'InstanceType': (str, False),
+        'KeyName': (str, False),
+        'Monitoring': (ec2.Monitoring, False),
+        'SecurityGroupIds': (list, False),
+        'UserData': (str, False),
+    }
+
+
+class LaunchTemplate(AWSObject):
+    resource_type = 'AWS::EC2::LaunchTemplate'
+
+    props = {
+        'LaunchTemplateData': (LaunchTemplateData, False),
+        'LaunchTemplateName': (str, False),
+    }
+
+
+class LaunchTemplateSpecification(AWSProperty):
+    props = {
+        'LaunchTemplateId': (str, False),
+        'LaunchTemplateName': (str, False),
+        'Version': (str, True),
+    }
+
+
+class LaunchTemplateOverrides(AWSProperty):
+    props = {
+        'InstanceType': (str, False),
+    }
+
+
+class MixedInstancesLaunchTemplate(AWSProperty):
+    props = {
+        'LaunchTemplateSpecification': (LaunchTemplateSpecification, True),
+        'Overrides': ([LaunchTemplateOverrides], False),
+    }
+
+
+class InstancesDistribution(AWSProperty):
+    props = {
+        'OnDemandAllocationStrategy': (str, False),
+        'OnDemandBaseCapacity': (integer, False),
+        'OnDemandPercentageAboveBaseCapacity': (integer, False),
+        'SpotAllocationStrategy': (str, False),
+        'SpotInstancePools': (integer, False),
+        'SpotMaxPrice': (str, False),
+    }
+
+
+class MixedInstancesPolicy(AWSProperty):
+    props = {
+        'InstancesDistribution': (InstancesDistribution, False),
+        'LaunchTemplate': (MixedInstancesLaunchTemplate, True),
+    }
+
+
+class LifecycleHookSpecification(AWSProperty):
+    props = {
+        'DefaultResult': (str, False),
+        'HeartbeatTimeout': (integer, False),
+        'LifecycleHookName': (str, True),
+        'LifecycleTransition': (str, True),
+        'NotificationMetadata': (str, False),
+        'NotificationTargetARN': (str, False),
+        'RoleARN': (str, False),
+    }
+
+
+class AutoScalingGroup(autoscaling.AutoScalingGroup):
+    props = dict(autoscaling.AutoScalingGroup.props,
+                 LaunchTemplate=(LaunchTemplateSpecification, False),
+                 LifecycleHookSpecificationList=([LifecycleHookSpecification], False),
+                 MixedInstancesPolicy=(MixedInstancesPolicy, False))
+
+    def validate(self):
+        launch_templates = [key for key in ('LaunchTemplate', 'MixedInstancesPolicy') if key in self.properties]
+        if not launch_templates:
+            return super(AutoScalingGroup, self).validate()
+        if len(launch_templates) > 1 or 'LaunchConfigurationName' in self.properties or \
+                'InstanceId' in self.properties:
+            raise ValueError('LaunchTemplate, MixedInstancesPolicy, LaunchConfigurationName and InstanceId are '
+                             'mutually exclusive.')
+        # the pinned validation requires a launch configuration or instance, the launch template stands in for it
+        properties = self.properties
+        self.properties = dict(properties, LaunchConfigurationName=properties[launch_templates[0]])
+        try:
+            return super(AutoScalingGroup, self).validate()
+        finally:
+            self.properties = properties
+
+
+class ScheduledAction(autoscaling.ScheduledAction):
+    props = dict(autoscaling.ScheduledAction.props,
+                 TimeZone=(str, False))
+
+
+class InstanceReusePolicy(AWSProperty):
+    props = {
+        'ReuseOnScaleIn': (boolean, False),
+    }
+
+
+class WarmPool(AWSObject):
+    resource_type = 'AWS::AutoScaling::WarmPool'
+
+    props = {
+        'AutoScalingGroupName': (str, True),
+        'InstanceReusePolicy': (InstanceReusePolicy, False),
+        'MaxGroupPreparedCapacity': (integer, False),
+        'MinSize': (integer, False),
+        'PoolState': (str, False),
+    }
@@ -1,12 +1,25 @@
+import hashlib
+import json
 import logging
+import os
 import re
+import stat
+import tempfile
+import time
 import inflection
 import yaml
+from amazonia.classes.config_object import ConfigObject
 
 logging.basicConfig(
     level=logging.INFO
 )
 
+# the libyaml C loader parses many times faster than the pure python loader, use it where pyyaml was built with it
+yaml_loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# directory to cache parsed yaml files in, caching is disabled if not set
+yaml_cache_directory = os.environ.get('AMAZONIA_YAML_CACHE')
+
 
 def get_cf_friendly_name(resource_name):
     """
@@ -18,30 +31,239 @@ def get_cf_friendly_name(resource_name):
     return inflection.camelize('_'.join(split_string))
 
 
-def read_yaml(user_yaml):
+def get_content_hash(*contents):
+    """
+    Create a hash that identifies a combination of inputs, e.g. application yaml, defaults yaml and amazonia version
+    :param contents: strings or bytes to hash, in order
+    :return: hex sha256 digest
+    """
+    content_hash = hashlib.sha256()
+    for content in contents:
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        # prefix each input with its length so that moving bytes between inputs changes the hash
+        content_hash.update(str(len(content)).encode('ascii') + b':')
+        content_hash.update(content)
+    return content_hash.hexdigest()
+
+
+def load_yaml(yaml_content):
+    """
+    Parse a yaml document with the safe loader
+    :param yaml_content: yaml text or file
+    :return: Json serialised version of Yaml
+    """
+    return yaml.load(yaml_content, Loader=yaml_loader)
+
+
+class LiteralBlockDumper(yaml.SafeDumper):
+    """
+    Safe yaml dumper that writes multi line strings as literal blocks, e.g. the files of cloud-config userdata
+    """
+
+
+LiteralBlockDumper.add_representer(
+    str, lambda dumper, value: dumper.represent_scalar('tag:yaml.org,2002:str', value,
+                                                       style='|' if '\n' in value else None))
+
+
+def dump_yaml(data):
+    """
+    Write data as a yaml document, keeping the order of dictionaries and writing multi line strings as literal blocks
+    :param data: yaml serialisable data
+    :return: yaml text
+    """
+    return yaml.dump(data, Dumper=LiteralBlockDumper, default_flow_style=False, sort_keys=False, width=float('inf'))
+
+
+def load_yaml_documents(yaml_content):
+    """
+    Parse every document of a yaml stream with the safe loader
+    :param yaml_content: yaml text or file
+    :return: list of Json serialised versions of each Yaml document
+    """
+    return list(yaml.load_all(yaml_content, Loader=yaml_loader))
+
+
+def read_yaml(user_yaml, cache_directory=None):
     """
     Load and return data from userdefined yaml file
     :param user_yaml: yaml file location
+    :param cache_directory: directory of parsed yaml files to reuse, defaults to the AMAZONIA_YAML_CACHE environment
+    variable, caching is disabled if neither is set
+    :return: Json serialised version of Yaml
+    """
+    cache_directory = cache_directory or yaml_cache_directory
+    if not cache_directory:
+        with open(user_yaml, 'r') as stack_yaml:
+            return load_yaml(stack_yaml)
+    return read_cached_yaml(user_yaml, cache_directory)
+
+
+def read_cached_yaml(user_yaml, cache_directory):
+    """
+    Load data from a yaml file, reusing the data parsed by a previous run if the file has not changed. A file with the
+    same modification time and size as when it was cached is not read at all, otherwise it is only parsed again if its
+    content hash has changed. Parsed data is cached as json, and the cache is only used if the directory and its files
+    belong to the user running amazonia and can not be written by anyone else, as cached data becomes templates.
+    :param user_yaml: yaml file location
+    :param cache_directory: directory of parsed yaml files, created readable only by the current user
     :return: Json serialised version of Yaml
     """
-    with open(user_yaml, 'r') as stack_yaml:
-        return yaml.safe_load(stack_yaml)
+    os.makedirs(cache_directory, mode=0o700, exist_ok=True)
+    if not is_private(os.stat(cache_directory)):
+        logging.warning('Not using yaml cache {0}, it must belong to the current user and not be writable by others'
+                        .format(cache_directory))
+        with open(user_yaml, 'r') as stack_yaml:
+            return load_yaml(stack_yaml)
+
+    user_yaml = os.path.abspath(user_yaml)
+    cache_path = os.path.join(cache_directory, get_content_hash(user_yaml) + '.json')
+    file_stat = os.stat(user_yaml)
+    file_stamp = [file_stat.st_mtime_ns, file_stat.st_size]
+
+    cached = None
+    try:
+        with open(cache_path, 'r') as cache_file:
+            if is_private(os.fstat(cache_file.fileno())):
+                cached = json.load(cache_file)
+    except Exception:
+        # a missing or unreadable cache file is a cache miss
+        cached = None
+    if cached is not None and cached['stamp'] == file_stamp:
+        return cached['data']
+
+    with open(user_yaml, 'rb') as stack_yaml:
+        content = stack_yaml.read()
+    content_hash = get_content_hash(content)
+    if cached is not None and cached['hash'] == content_hash:
+        data = cached['data']
+    else:
+        data = load_yaml(content.decode('utf-8'))
+
+    # yaml that json can not represent the same, e.g. dates or numeric keys, is parsed every time
+    try:
+        cache_data = json.dumps({'stamp': file_stamp, 'hash': content_hash, 'data': data})
+    except (TypeError, ValueError):
+        return data
+    if json.loads(cache_data)['data'] != data:
+        return data
+
+    # write to a temporary file and move it into place so concurrent runs never read a partial cache file
+    file_descriptor, temp_path = tempfile.mkstemp(dir=cache_directory, suffix='.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'w') as temp_file:
+            temp_file.write(cache_data)
+        os.replace(temp_path, cache_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return data
+
+
+def is_private(file_stat):
+    """
+    :param file_stat: os.stat_result of a file or directory
+    :return: True if the file belongs to the current user and can not be written by its group or others
+    """
+    # windows has no user ids, only the write permissions are checked there
+    if hasattr(os, 'getuid') and file_stat.st_uid != os.getuid():
+        return False
+    return not file_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+aws_access_id_pattern = re.compile('(?<![A-Z0-9])[A-Z0-9]{20}(?![A-Z0-9])')
+# every access id and secret key lies within a run of at least 20 secret key characters, so each string is scanned
+# once for these runs and only the few runs found are checked for a secret key length or an access id
+aws_secret_candidate_pattern = re.compile('[A-Za-z0-9/+=]{20,}')
+
+
+def find_unencrypted_access_keys(data):
+    """
+    Walk a data structure once and search every string in it for potential AWS access ids and secret keys
+    :param data: nested dictionaries, lists and config objects, e.g. Yaml.united_data
+    :return: list of (path, secret name) tuples in document order, e.g. ('autoscaling_units[0].asg_config.userdata',
+    'AWS access ID')
+    """
+    findings = []
+    # paths are kept as (parent path, key) pairs and only formatted for strings with a finding
+    stack = [(None, data)]
+    while stack:
+        path, value = stack.pop()
+        if isinstance(value, str):
+            # strings shorter than an access id cannot hold a secret
+            if len(value) < 20:
+                continue
+            secret_names = []
+            for match in aws_secret_candidate_pattern.finditer(value):
+                # runs are maximal, so a run of exactly 40 characters is a secret key
+                if match.end() - match.start() == 40 and 'AWS secret Key' not in secret_names:
+                    secret_names.append('AWS secret Key')
+                # search within the run without copying it out of the string
+                if 'AWS access ID' not in secret_names and \
+                        aws_access_id_pattern.search(value, match.start(), match.end()):
+                    secret_names.append('AWS access ID')
+                if len(secret_names) == 2:
+                    break
+            findings.extend((format_path(path), secret_name) for secret_name in secret_names)
+        elif isinstance(value, dict):
+            stack.extend(((path, key), item) for key, item in reversed(list(value.items())))
+        elif isinstance(value, (list, tuple)):
+            stack.extend(((path, index), item) for index, item in reversed(list(enumerate(value))))
+        elif isinstance(value, ConfigObject):
+            stack.extend(((path, key), item) for key, item in reversed(value.get_fields()))
+        elif hasattr(value, '__dict__'):
+            stack.extend(((path, key), item) for key, item in reversed(list(vars(value).items())))
+    return findings
 
 
-def detect_unencrypted_access_keys(userdata):
+def get_insecure_variable_errors(data):
     """
-    Searches userdata for potential AWS access ids and secret keys and substitutes entire userdata with error string
-    :param userdata: Userdata for each unit in the stack
+    Report every unencrypted AWS access id and secret key in a data structure
+    :param data: nested dictionaries, lists and config objects, e.g. Yaml.united_data
+    :return: list of error strings, empty if there are no unencrypted keys
     """
-    aws_access_id = re.compile('(?<![A-Z0-9])[A-Z0-9]{20}(?![A-Z0-9])')
-    aws_secret_key = re.compile('(?<![A-Za-z0-9/+=])[A-Za-z0-9/+=]{40}(?![A-Za-z0-9/+=])')
+    return ['Error: unencrypted {0} was found in {1}, please remove or encrypt.'.format(secret_name, path)
+            for path, secret_name in find_unencrypted_access_keys(data)]
+
+
+def format_path(path):
+    """
+    Format a path built by find_unencrypted_access_keys
+    :param path: nested (parent path, key) pairs, None for the root
+    :return: yaml path, e.g. 'autoscaling_units[0].asg_config.userdata'
+    """
+    keys = []
+    while path is not None:
+        path, key = path
+        keys.append(key)
+    formatted_path = ''
+    for key in reversed(keys):
+        if isinstance(key, int):
+            formatted_path += '[{0}]'.format(key)
+        else:
+            formatted_path += '.{0}'.format(key) if formatted_path else str(key)
+    return formatted_path
+
+
+class PhaseTimer(object):
+    def __init__(self, on_phase=None):
+        """
+        Times consecutive phases of work, e.g. the parse, validate, merge, build and serialize phases of generation
+        :param on_phase: function called with the name and duration in seconds of each phase as it ends
+        """
+        self.on_phase = on_phase
+        self.phase_start = time.perf_counter()
 
-    if aws_access_id.search(userdata):
-        raise InsecureVariableError('Error: unencrypted {0} was found in your userdata, please remove or encrypt.'
-                                    .format('AWS access ID'))
-    elif aws_secret_key.search(userdata):
-        raise InsecureVariableError('Error: unencrypted {0} was found in your userdata, please remove or encrypt.'
-                                    .format('AWS secret Key'))
+    def end(self, phase):
+        """
+        End the current phase and start the next one
+        :param phase: name of the phase that has ended
+        """
+        phase_end = time.perf_counter()
+        if self.on_phase is not None:
+            self.on_phase(phase, phase_end - self.phase_start)
+        self.phase_start = phase_end
 
 
 class InsecureVariableError(Exception):
@@ -0,0 +1,41 @@
+#!/usr/bin/python3
+
+from amazonia.classes.config_object import ConfigObject
+
+
+class InvalidWarmPoolConfigError(Exception):
+    """
+    Exception if invalid properties are supplied
+    """
+    def __init__(self, value):
+        self.value = value
+
+
+class WarmPoolConfig(ConfigObject):
+    __slots__ = ('pool_state', 'min_size', 'max_group_prepared_capacity', 'reuse_on_scale_in')
+
+    def __init__(self, pool_state, min_size, max_group_prepared_capacity, reuse_on_scale_in):
+        """
+        Warm pool config object, keeping instances that have already run their userdata beside an autoscaling group so
+        that it scales out without waiting for instances to bootstrap
+
+        :param pool_state: Stopped | Running | Hibernated, state of the instances waiting in the pool
+        :param min_size: Minimum number of instances in the pool
+        :param max_group_prepared_capacity: Maximum number of instances in the group and the pool together, the group's
+        maxsize if not set
+        :param reuse_on_scale_in: True to return instances to the pool on scale in rather than terminating them
+        """
+        self.pool_state = pool_state
+        self.min_size = min_size
+        self.max_group_prepared_capacity = max_group_prepared_capacity
+        self.reuse_on_scale_in = reuse_on_scale_in
+
+    def validate(self):
+        """
+        Raise InvalidWarmPoolConfigError if the warm pool's fields are not consistent
+        """
+        if self.min_size is not None and self.max_group_prepared_capacity is not None and \
+                int(self.min_size) > int(self.max_group_prepared_capacity):
+            raise InvalidWarmPoolConfigError('Warm pool min_size ({0}) cannot be larger than '
+                                             'max_group_prepared_capacity ({1})'
+                                             .format(self.min_size, self.max_group_prepared_capacity))
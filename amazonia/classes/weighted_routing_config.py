@@ -0,0 +1,38 @@
+#!/usr/bin/python3
+
+from amazonia.classes.config_object import ConfigObject
+
+
+class InvalidWeightedRoutingConfigError(Exception):
+    """
+    Exception if invalid properties are supplied
+    """
+    def __init__(self, value):
+        self.value = value
+
+
+class WeightedRoutingConfig(ConfigObject):
+    __slots__ = ('blue_weight', 'green_weight', 'ttl')
+
+    def __init__(self, blue_weight, green_weight, ttl):
+        """
+        Weighted routing config object, sharing requests to one name between the blue (prod) and green (pre) load
+        balancers of a zero downtime autoscaling unit
+
+        :param blue_weight: Relative weight, 0 to 255, of requests routed to the prod load balancer and blue group
+        :param green_weight: Relative weight, 0 to 255, of requests routed to the pre load balancer and green group
+        :param ttl: Seconds that resolvers cache the chosen load balancer, keep low to shift traffic quickly
+        """
+        self.blue_weight = blue_weight
+        self.green_weight = green_weight
+        self.ttl = ttl
+
+    def validate(self):
+        """
+        Raise InvalidWeightedRoutingConfigError if the weighted routing's fields are not consistent
+        """
+        # weights may be references to template parameters, which can only be checked once the stack is created
+        for colour, weight in (('blue', self.blue_weight), ('green', self.green_weight)):
+            if isinstance(weight, (int, str)) and str(weight).isdigit() and int(weight) > 255:
+                raise InvalidWeightedRoutingConfigError('Weighted routing {0}_weight ({1}) must be between 0 and 255'
+                                                        .format(colour, weight))
@@ -6,7 +6,9 @@ Overwrite defaults YAML with User YAML
 import os
 
 import cerberus
-from amazonia.classes.util import read_yaml
+from amazonia.classes.alb import get_shared_load_balancer_errors
+from amazonia.classes.scheduled_action_config import get_duplicate_scheduled_action_names
+from amazonia.classes.util import read_yaml, get_insecure_variable_errors, InsecureVariableError
 from amazonia.classes.yaml_fields import YamlFields
 
 
@@ -40,24 +42,54 @@ class Yaml(object):
     # cerberus schema file location
     cerberus_schema = read_yaml(os.path.join(__location__, '../schemas/cerberus_schema.yaml'))
 
-    def __init__(self, user_stack_data, default_data):
+    # share config objects derived wholly from the defaults between units rather than creating them for every unit
+    share_default_objects = True
+
+    def __init__(self, user_stack_data, default_data, collect_errors=False, validate=True):
         """
         Initializes united, user and default data dictionaries, these dictionaries form trees of values that are
         ultimately mapped to various Amazonia classes
         :param user_stack_data: User yaml document used to read stack values
         :param default_data: Company yaml to read in company default values
+        :param collect_errors: True to record validation errors in self.errors rather than raising on the first one
+        :param validate: False to skip schema validation of data that has already been validated
         """
         self.user_stack_data = user_stack_data
         self.default_data = default_data
         self.united_data = dict()
+        self.errors = [] if collect_errors else None
+        # config objects derived wholly from the defaults, keyed by field name and defaults dictionary
+        self.default_objects = {}
 
         # Validate user and default yaml against the provided schema before attempting to combine them.
-        self.validate_yaml(self.user_stack_data, self.cerberus_schema)
-        self.validate_yaml(self.default_data, self.cerberus_schema)
+        if collect_errors:
+            self.errors.extend(self.get_validation_errors(self.user_stack_data, self.cerberus_schema))
+            self.errors.extend('defaults: ' + error for error in
+                               self.get_validation_errors(self.default_data, self.cerberus_schema))
+            # values that fail the schema cannot be reliably merged, so stop at schema errors
+            if self.errors:
+                return
+        elif validate:
+            self.validate_yaml(self.user_stack_data, self.cerberus_schema)
+            self.validate_yaml(self.default_data, self.cerberus_schema)
 
         # Beginning with the "stack" object, process each field
-        for stack_key in YamlFields.stack_key_list:
-            self.united_data[stack_key] = self.set_value(stack_key, self.user_stack_data, self.default_data)
+        try:
+            for stack_key in YamlFields.stack_key_list:
+                self.united_data[stack_key] = self.set_value(stack_key, self.user_stack_data, self.default_data)
+        except InvalidYamlStructureError as error:
+            if not collect_errors:
+                raise
+            self.errors.append(str(error))
+            return
+
+        # check every merged value for insecure variables, e.g. userdata, lambda descriptions and cloudfront headers
+        insecure_variable_errors = get_insecure_variable_errors(self.united_data)
+        if collect_errors:
+            self.errors.extend(self.get_unit_errors(self.united_data))
+            self.errors.extend(insecure_variable_errors)
+        elif insecure_variable_errors:
+            raise InsecureVariableError('\n'.join(insecure_variable_errors))
 
     def set_value(self, current_key, user_values, default_values):
         """
@@ -71,44 +103,16 @@ class Yaml(object):
         # check if the current field corresponds is a complex object
         if current_key in YamlFields.complex_object_field_mapping:
             cofm = YamlFields.complex_object_field_mapping[current_key]
-            # if the current field is a list of complex objects
-            if cofm.is_list:
-                # initialise empty list to store field values in
-                value = []
-                # if the current field is set in user input and that it is a valid list
-                # Note: this assumes that a field of this type that has not been specified by the user will become an
-                # empty list
-                if current_key in user_values and isinstance(user_values[current_key], list):
-                    # subset of user values and build a parameter dictionary to initialise complex object constructor
-                    for nested_user_values in user_values[current_key]:
-                        complex_params = self.get_complex_params(current_key, nested_user_values, cofm.key_list,
-                                                                 default_values)
-                        # initialise complex object with parameter dictionary and append to list of values for this
-                        # field
-                        value.append(cofm.constructor(**complex_params))
-                # if users have not specified any config, but one should be derived from the defaults
-                elif cofm.is_defaulted:
-                    nested_user_values = {}
-                    complex_params = self.get_complex_params(current_key, nested_user_values, cofm.key_list,
-                                                             default_values)
-                    # initialise complex object with parameter dictionary and append to list of values for this
-                    # field
-                    value.append(cofm.constructor(**complex_params))
+            # a value the user has not set is derived wholly from the defaults and is the same for every unit, so it is
+            # created once and shared, config objects are immutable so units can not change each other's values
+            if self.share_default_objects and current_key not in user_values:
+                default_object_key = (current_key, id(default_values))
+                if default_object_key not in self.default_objects:
+                    self.default_objects[default_object_key] = self.set_complex_value(current_key, cofm, user_values,
+                                                                                      default_values)
+                value = self.default_objects[default_object_key]
             else:
-                nested_user_values = None
-                if cofm.is_defaulted:
-                    # initialise an empty dictionary to process against default values
-                    nested_user_values = {}
-                # replace empty dictionary with user values if specified
-                if current_key in user_values:
-                    nested_user_values = user_values[current_key]
-                if nested_user_values is not None:
-                    complex_params = self.get_complex_params(current_key, nested_user_values, cofm.key_list,
-                                                             default_values)
-                    # initialise complex
-                    value = cofm.constructor(**complex_params)
-                else:
-                    value = None
+                value = self.set_complex_value(current_key, cofm, user_values, default_values)
         # if simple field, return the user value or if not set the corresponding default value
         else:
             if default_values is not None and current_key in default_values:
@@ -118,6 +122,55 @@ class Yaml(object):
                                                 .format(current_key, default_values))
         return value
 
+    def set_complex_value(self, current_key, cofm, user_values, default_values):
+        """
+        Create the complex object, or list of complex objects, of a complex field
+        :param current_key: The current field to process
+        :param cofm: ComplexObjectFieldMapping of the current field
+        :param user_values: user supplied yaml dictionary
+        :param default_values: supplied defaults to interpose with user fields
+        :return: complex object, list of complex objects or None
+        """
+        # if the current field is a list of complex objects
+        if cofm.is_list:
+            # initialise empty list to store field values in
+            value = []
+            # if the current field is set in user input and that it is a valid list
+            # Note: this assumes that a field of this type that has not been specified by the user will become an
+            # empty list
+            if current_key in user_values and isinstance(user_values[current_key], list):
+                # subset of user values and build a parameter dictionary to initialise complex object constructor
+                for nested_user_values in user_values[current_key]:
+                    complex_params = self.get_complex_params(current_key, nested_user_values, cofm.key_list,
+                                                             default_values)
+                    # initialise complex object with parameter dictionary and append to list of values for this
+                    # field
+                    value.append(self.create_complex_object(cofm, complex_params))
+            # if users have not specified any config, but one should be derived from the defaults
+            elif cofm.is_defaulted:
+                nested_user_values = {}
+                complex_params = self.get_complex_params(current_key, nested_user_values, cofm.key_list,
+                                                         default_values)
+                # initialise complex object with parameter dictionary and append to list of values for this
+                # field
+                value.append(self.create_complex_object(cofm, complex_params))
+        else:
+            nested_user_values = None
+            if cofm.is_defaulted:
+                # initialise an empty dictionary to process against default values
+                nested_user_values = {}
+            # replace empty dictionary with user values if specified
+            if current_key in user_values:
+                nested_user_values = user_values[current_key]
+            if nested_user_values is not None:
+                complex_params = self.get_complex_params(current_key, nested_user_values, cofm.key_list,
+                                                         default_values)
+                # initialise complex
+                value = self.create_complex_object(cofm, complex_params)
+            else:
+                value = None
+        return value
+
     def get_complex_params(self, current_key, nested_user_values, complex_key_list, default_values):
         """
         For a given field of a complex object, determine if default is available in current "level" of default value
@@ -147,6 +200,118 @@ class Yaml(object):
             complex_params[complex_key] = self.set_value(complex_key, nested_user_values, nested_default_values)
         return complex_params
 
+    def create_complex_object(self, cofm, complex_params):
+        """
+        Initialise a complex object, recording any error raised by its constructor when collecting errors
+        :param cofm: ComplexObjectFieldMapping of the complex object
+        :param complex_params: dictionary of parameters to initialise the complex object with
+        :return: the complex object, or None if it could not be created while collecting errors
+        """
+        if self.errors is None:
+            return cofm.constructor(**complex_params)
+        try:
+            return cofm.constructor(**complex_params)
+        except Exception as error:
+            self.errors.append(str(error))
+            return None
+
+    @staticmethod
+    def get_unit_errors(united_data):
+        """
+        Check the relationships between units that can only be verified once all units have been merged: unique unit
+        titles, known dependency targets, shared application load balancers, hosted zones for weighted routing and a
+        single default cloudfront cache behavior
+        :param united_data: merged stack dictionary
+        :return: list of error strings
+        """
+        errors = []
+        unit_titles = set()
+        for unit_key in YamlFields.unit_key_list:
+            for unit in united_data.get(unit_key) or []:
+                if unit['unit_title'] in unit_titles:
+                    errors.append("Error: unit name '{0}' has already been specified, it must be unique."
+                                  .format(unit['unit_title']))
+                unit_titles.add(unit['unit_title'])
+
+        for unit_key in YamlFields.unit_key_list:
+            for unit in united_data.get(unit_key) or []:
+                for dependency in unit.get('dependencies') or []:
+                    if ':' not in dependency:
+                        errors.append("Error: dependency '{0}' of unit '{1}' must be in the form 'unit_title:port'."
+                                      .format(dependency, unit['unit_title']))
+                    elif dependency.split(':')[0] not in unit_titles:
+                        errors.append("Error: unit '{0}' depends on unknown unit '{1}'."
+                                      .format(unit['unit_title'], dependency.split(':')[0]))
+                for method in unit.get('method_config') or []:
+                    if method is not None and method.lambda_unit not in unit_titles:
+                        errors.append("Error: api gateway unit '{0}' method '{1}' refers to unknown lambda unit '{2}'."
+                                      .format(unit['unit_title'], method.method_name, method.lambda_unit))
+
+        errors.extend(get_shared_load_balancer_errors(united_data.get('autoscaling_units') or [],
+                                                      united_data.get('zd_autoscaling_units') or []))
+
+        # the stack's ec2_scheduled_shutdown adds the OFF and ON actions to every autoscaling unit
+        if united_data.get('ec2_scheduled_shutdown'):
+            for unit in united_data.get('autoscaling_units') or []:
+                if unit.get('asg_config') is None:
+                    continue
+                duplicate_names = get_duplicate_scheduled_action_names(unit['asg_config'].scheduled_actions, True)
+                if duplicate_names:
+                    errors.append("Error: autoscaling unit '{0}' scheduled action names {1} clash with the OFF and ON "
+                                  "actions of ec2_scheduled_shutdown.".format(unit['unit_title'], duplicate_names))
+
+        for unit in united_data.get('zd_autoscaling_units') or []:
+            if unit.get('weighted_routing_config') is not None and unit.get('elb_config') is not None and \
+                    unit['elb_config'].public_unit and not united_data.get('public_hosted_zone_name'):
+                errors.append("Error: weighted routing of public zd autoscaling unit '{0}' requires a "
+                              "public_hosted_zone_name.".format(unit['unit_title']))
+
+        for unit in united_data.get('cf_distribution_units') or []:
+            cache_behaviors = [cache_behavior for cache_behavior in unit['cf_cache_behavior_config'] or []
+                               if cache_behavior is not None]
+            default_count = len([cache_behavior for cache_behavior in cache_behaviors if cache_behavior.is_default])
+            if len(cache_behaviors) > default_count and default_count != 1:
+                errors.append('Error: cf_distribution_unit {0} must have exactly one default cache behavior.'
+                              .format(unit['unit_title']))
+        return errors
+
+    @staticmethod
+    def get_validation_errors(data, schema):
+        """
+        Validates a given data structure against a cerberus schema and returns every issue found
+        :param data:  inbound data structure to validate
+        :param schema: cerberus schema to validate against
+        :return: list of error strings in the form 'path.to.field: message'
+        """
+        validator = cerberus.Validator()
+
+        try:
+            if validator.validate(data, schema):
+                return []
+        except cerberus.DocumentError as error:
+            return [str(error)]
+        return ['{0}: {1}'.format(path, message) for path, message in Yaml.flatten_errors(validator.errors)]
+
+    @staticmethod
+    def flatten_errors(errors, path=''):
+        """
+        Flatten cerberus' nested error tree into (field path, message) pairs
+        :param errors: cerberus error dictionary, list or message
+        :param path: dotted path of the current level of the error tree
+        :return: list of (path, message) tuples
+        """
+        if isinstance(errors, dict):
+            flattened = []
+            for key in sorted(errors, key=str):
+                flattened.extend(Yaml.flatten_errors(errors[key], '{0}.{1}'.format(path, key) if path else str(key)))
+            return flattened
+        if isinstance(errors, list):
+            flattened = []
+            for error in errors:
+                flattened.extend(Yaml.flatten_errors(error, path))
+            return flattened
+        return [(path, errors)]
+
     @staticmethod
     def validate_yaml(data, schema):
         """
@@ -6,7 +6,14 @@ from amazonia.classes.cf_distribution_config import CFDistributionConfig, CFCach
 from amazonia.classes.database_config import DatabaseConfig
 from amazonia.classes.elb_config import ElbConfig, ElbListenersConfig
 from amazonia.classes.lambda_config import LambdaConfig
+from amazonia.classes.lifecycle_hook_config import LifecycleHookConfig
+from amazonia.classes.mixed_instances_policy_config import MixedInstancesPolicyConfig
+from amazonia.classes.scheduled_action_config import ScheduledActionConfig
 from amazonia.classes.simple_scaling_policy_config import SimpleScalingPolicyConfig
+from amazonia.classes.step_scaling_policy_config import StepScalingPolicyConfig, StepAdjustmentConfig
+from amazonia.classes.target_tracking_policy_config import TargetTrackingPolicyConfig
+from amazonia.classes.warm_pool_config import WarmPoolConfig
+from amazonia.classes.weighted_routing_config import WeightedRoutingConfig
 
 
 class ComplexObjectFieldMapping(object):
@@ -37,7 +44,17 @@ class YamlFields(object):
                            'unhealthy_threshold',
                            'interval',
                            'timeout',
-                           'owner'
+                           'owner',
+                           'load_balancer_type',
+                           'shared_load_balancer',
+                           'path_pattern',
+                           'host_header',
+                           'rule_priority',
+                           'slow_start',
+                           'cross_zone',
+                           'connection_draining_timeout',
+                           'idle_timeout',
+                           'access_log_emit_interval'
                            ]
 
     # elb_listeners_config field list
@@ -59,9 +76,24 @@ class YamlFields(object):
                            'iam_instance_profile_arn',
                            'block_devices_config',
                            'simple_scaling_policy_config',
+                           'target_tracking_policy_config',
+                           'step_scaling_policy_config',
                            'ec2_scheduled_shutdown',
                            'pausetime',
-                           'owner'
+                           'owner',
+                           'max_batch_size',
+                           'wait_on_resource_signals',
+                           'suspend_processes',
+                           'deployment_config',
+                           'minimum_healthy_hosts',
+                           'auto_rollback',
+                           'rollback_alarms',
+                           'detailed_monitoring',
+                           'launch_template',
+                           'mixed_instances_policy_config',
+                           'scheduled_actions',
+                           'lifecycle_hooks',
+                           'warm_pool_config'
                            ]
 
     # simple_scaling_policy field list
@@ -75,6 +107,68 @@ class YamlFields(object):
                                              'scaling_adjustment',
                                              'cooldown']
 
+    # target_tracking_policy field list
+    target_tracking_policy_config_key_list = ['name',
+                                              'predefined_metric',
+                                              'resource_label',
+                                              'metric_name',
+                                              'namespace',
+                                              'statistic',
+                                              'target_value',
+                                              'disable_scale_in',
+                                              'estimated_instance_warmup']
+
+    # step_scaling_policy field list
+    step_scaling_policy_config_key_list = ['name',
+                                           'description',
+                                           'metric_name',
+                                           'namespace',
+                                           'statistic',
+                                           'comparison_operator',
+                                           'threshold',
+                                           'evaluation_periods',
+                                           'period',
+                                           'adjustment_type',
+                                           'estimated_instance_warmup',
+                                           'step_adjustments']
+
+    # step_adjustments field list
+    step_adjustments_key_list = ['lower_bound',
+                                 'upper_bound',
+                                 'adjustment']
+
+    # mixed_instances_policy_config field list
+    mixed_instances_policy_config_key_list = ['instance_types',
+                                              'on_demand_base_capacity',
+                                              'on_demand_percentage_above_base_capacity',
+                                              'spot_allocation_strategy',
+                                              'spot_instance_pools',
+                                              'spot_max_price']
+
+    # scheduled_actions field list
+    scheduled_actions_key_list = ['name',
+                                  'recurrence',
+                                  'min_size',
+                                  'max_size',
+                                  'desired_capacity',
+                                  'time_zone',
+                                  'start_time',
+                                  'end_time']
+
+    # lifecycle_hooks field list
+    lifecycle_hooks_key_list = ['name',
+                                'lifecycle_transition',
+                                'default_result',
+                                'heartbeat_timeout',
+                                'notification_metadata',
+                                'role_arn']
+
+    # warm_pool_config field list
+    warm_pool_config_key_list = ['pool_state',
+                                 'min_size',
+                                 'max_group_prepared_capacity',
+                                 'reuse_on_scale_in']
+
     # block_devices_config field list
     block_devices_config_key_list = ['device_name',
                                      'ebs_volume_size',
@@ -190,6 +284,16 @@ class YamlFields(object):
         'owner'
     ]
 
+    # stack fields holding lists of units
+    unit_key_list = [
+        'database_units',
+        'zd_autoscaling_units',
+        'autoscaling_units',
+        'lambda_units',
+        'api_gateway_units',
+        'cf_distribution_units'
+    ]
+
     # autoscaling unit parameter field list
     autoscaling_unit_key_list = [
         'unit_title',
@@ -218,9 +322,16 @@ class YamlFields(object):
         'dependencies',
         'elb_config',
         'blue_asg_config',
-        'green_asg_config'
+        'green_asg_config',
+        'weighted_routing_config'
     ]
 
+    # weighted_routing_config field list
+    weighted_routing_config_key_list = ['blue_weight',
+                                        'green_weight',
+                                        'ttl'
+                                        ]
+
     # api parameter field list
     api_gateway_unit_key_list = [
         'unit_title',
@@ -260,12 +371,28 @@ class YamlFields(object):
             ComplexObjectFieldMapping(AsgConfig, False, True, asg_config_key_list),
         'green_asg_config':
             ComplexObjectFieldMapping(AsgConfig, False, True, asg_config_key_list),
+        'weighted_routing_config':
+            ComplexObjectFieldMapping(WeightedRoutingConfig, False, False, weighted_routing_config_key_list),
         'database_config':
             ComplexObjectFieldMapping(DatabaseConfig, False, True, database_config_key_list),
         'block_devices_config':
             ComplexObjectFieldMapping(BlockDevicesConfig, True, False, block_devices_config_key_list),
         'simple_scaling_policy_config':
             ComplexObjectFieldMapping(SimpleScalingPolicyConfig, True, False, simple_scaling_policy_config_key_list),
+        'target_tracking_policy_config':
+            ComplexObjectFieldMapping(TargetTrackingPolicyConfig, True, False, target_tracking_policy_config_key_list),
+        'step_scaling_policy_config':
+            ComplexObjectFieldMapping(StepScalingPolicyConfig, True, False, step_scaling_policy_config_key_list),
+        'step_adjustments':
+            ComplexObjectFieldMapping(StepAdjustmentConfig, True, False, step_adjustments_key_list),
+        'mixed_instances_policy_config':
+            ComplexObjectFieldMapping(MixedInstancesPolicyConfig, False, False, mixed_instances_policy_config_key_list),
+        'scheduled_actions':
+            ComplexObjectFieldMapping(ScheduledActionConfig, True, False, scheduled_actions_key_list),
+        'lifecycle_hooks':
+            ComplexObjectFieldMapping(LifecycleHookConfig, True, False, lifecycle_hooks_key_list),
+        'warm_pool_config':
+            ComplexObjectFieldMapping(WarmPoolConfig, False, False, warm_pool_config_key_list),
         'autoscaling_units':
             ComplexObjectFieldMapping(dict, True, False, autoscaling_unit_key_list),
         'zd_autoscaling_units':
@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+
+"""
+Measure template generation throughput.
+
+Without --url the generator pool is driven directly with an increasing number of worker processes, showing how
+throughput scales with cpu cores. With --url, concurrent requests are sent to a running web/api.py server.
+"""
+import argparse
+import os
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from amazonia.classes.generator_pool import GeneratorPool
+
+__location__ = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
+
+
+def run_pool(workers, requests, application_text, default_path):
+    """
+    Generate templates through a generator pool with the given number of workers
+    :param workers: number of worker processes
+    :param requests: number of templates to generate
+    :param application_text: application yaml to generate
+    :param default_path: path to the defaults yaml file
+    :return: templates generated per second
+    """
+    pool = GeneratorPool(default_path, workers=workers, max_queue=requests)
+    try:
+        start = time.time()
+        wait([pool.submit(application_text) for _ in range(requests)])
+        return requests / (time.time() - start)
+    finally:
+        pool.shutdown()
+
+
+def post(url, application_text):
+    """
+    Post an application to the api
+    :param url: url of the /yaml endpoint
+    :param application_text: application yaml to post
+    :return: http status code
+    """
+    try:
+        with urllib.request.urlopen(url, data=application_text.encode('utf-8')) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as error:
+        return error.code
+
+
+def run_http(url, concurrency, requests, application_text):
+    """
+    Send concurrent requests to a running api server
+    :param url: url of the /yaml endpoint
+    :param concurrency: number of concurrent clients
+    :param requests: total number of requests
+    :param application_text: application yaml to post
+    :return: requests per second, Counter of http status codes
+    """
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        start = time.time()
+        statuses = Counter(clients.map(lambda _: post(url, application_text), range(requests)))
+        return requests / (time.time() - start), statuses
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-y', '--yaml', default=os.path.join(__location__, '../../amazonia/application.yaml'),
+                        help='Path to the application yaml to generate')
+    parser.add_argument('-d', '--default', default=os.path.join(__location__, '../../amazonia/defaults.yaml'),
+                        help='Path to the defaults yaml file')
+    parser.add_argument('-n', '--requests', type=int, default=64, help='Number of templates to generate')
+    parser.add_argument('-c', '--concurrency', type=int, default=16, help='Concurrent clients when using --url')
+    parser.add_argument('--url', help='Url of a running /yaml endpoint, e.g. http://localhost:5000/yaml')
+    args = parser.parse_args()
+
+    with open(args.yaml) as application_yaml:
+        application_text = application_yaml.read()
+
+    if args.url:
+        throughput, statuses = run_http(args.url, args.concurrency, args.requests, application_text)
+        print('{0:.1f} requests/s, status codes: {1}'.format(throughput, dict(statuses)))
+        return
+
+    baseline = None
+    worker_counts = sorted({1, 2, 4, 8, 16, os.cpu_count()})
+    for workers in [count for count in worker_counts if count <= os.cpu_count()]:
+        throughput = run_pool(workers, args.requests, application_text, args.default)
+        baseline = baseline or throughput
+        print('{0:>3} workers: {1:7.1f} templates/s ({2:.2f}x)'.format(workers, throughput, throughput / baseline))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+
+"""
+Measure the time and memory taken to merge large applications with the defaults.
+
+An application with the given number of autoscaling units is merged with config objects derived from the defaults
+shared between units, and again with a fresh config object created for every unit. Units either set nothing but their
+title, or override only their userdata so that their asg_config must be copied while the rest is shared.
+"""
+import argparse
+import copy
+import os
+import time
+import tracemalloc
+
+from amazonia.classes.util import read_yaml
+from amazonia.classes.yaml import Yaml
+
+__location__ = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
+
+
+def create_application(application, unit_count, override_userdata):
+    """
+    Create an application with many copies of its first autoscaling unit
+    :param application: application yaml data
+    :param unit_count: number of autoscaling units to create
+    :param override_userdata: True to give each unit its own userdata, False to leave every config to the defaults
+    :return: application yaml data
+    """
+    application = copy.deepcopy(application)
+    units = []
+    for index in range(unit_count):
+        unit = {'unit_title': 'app{0}'.format(index)}
+        if override_userdata:
+            unit['asg_config'] = {'userdata': '#cloud-config\nhostname: app{0}\n'.format(index)}
+        units.append(unit)
+    application['autoscaling_units'] = units
+    application['zd_autoscaling_units'] = []
+    application['cf_distribution_units'] = []
+    application['api_gateway_units'] = []
+    application['lambda_units'] = []
+    application['database_units'] = []
+    return application
+
+
+def run_merge(application, default_data, share_default_objects, repeat):
+    """
+    Merge an application with the defaults
+    :param application: application yaml data
+    :param default_data: defaults yaml data
+    :param share_default_objects: True to share config objects derived from the defaults between units
+    :param repeat: number of times to merge the application
+    :return: seconds per merge, bytes allocated by the merged data, number of distinct config objects
+    """
+    Yaml.share_default_objects = share_default_objects
+    try:
+        start = time.time()
+        for _ in range(repeat):
+            Yaml(application, default_data, validate=False)
+        seconds = (time.time() - start) / repeat
+
+        tracemalloc.start()
+        snapshot_start = tracemalloc.take_snapshot()
+        united_data = Yaml(application, default_data, validate=False).united_data
+        allocated = sum(stat.size_diff for stat in
+                        tracemalloc.take_snapshot().compare_to(snapshot_start, 'filename'))
+        tracemalloc.stop()
+    finally:
+        Yaml.share_default_objects = True
+
+    config_objects = set()
+    for unit in united_data['autoscaling_units']:
+        for config in (unit['elb_config'], unit['asg_config']):
+            config_objects.add(id(config))
+        config_objects.update(id(listener) for listener in unit['elb_config'].elb_listeners_config)
+    return seconds, allocated, len(config_objects)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-y', '--yaml', default=os.path.join(__location__, '../../amazonia/application.yaml'),
+                        help='Path to the application yaml whose first autoscaling unit is copied')
+    parser.add_argument('-d', '--default', default=os.path.join(__location__, '../../amazonia/defaults.yaml'),
+                        help='Path to the defaults yaml file')
+    parser.add_argument('-u', '--units', type=int, nargs='+', default=[10, 100, 1000],
+                        help='Numbers of autoscaling units to merge')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Number of merges to time')
+    args = parser.parse_args()
+
+    application = read_yaml(args.yaml)
+    default_data = read_yaml(args.default)
+
+    for override_userdata in (False, True):
+        print('units {0}'.format('overriding userdata' if override_userdata else 'using only defaults'))
+        for unit_count in args.units:
+            unit_application = create_application(application, unit_count, override_userdata)
+            for share_default_objects in (False, True):
+                seconds, allocated, config_objects = run_merge(unit_application, default_data,
+                                                               share_default_objects, args.repeat)
+                print('{0:>6} units, {1:<7} {2:8.2f} ms {3:10.1f} KiB {4:>6} config objects'
+                      .format(unit_count, 'shared' if share_default_objects else 'fresh', seconds * 1000,
+                              allocated / 1024, config_objects))
+
+
+if __name__ == '__main__':
+    main()
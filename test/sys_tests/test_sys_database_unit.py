@@ -29,7 +29,7 @@ def main():
                  )
 
     # Test RDS with SnapshotID
-    database_config.db_snapshot_id = 'amazonia-verbose-snapshot'
+    database_config = database_config.replace(db_snapshot_id='amazonia-verbose-snapshot')
 
     DatabaseUnit(unit_title='MyDb2',
                  stack_config=network_config,
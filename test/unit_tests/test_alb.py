@@ -0,0 +1,169 @@
+#!/usr/bin/python3
+
+from amazonia.classes.alb import Alb, SharedAlb, get_shared_load_balancer_errors
+from amazonia.classes.elb import Elb, create_load_balancer
+from amazonia.classes.elb_config import ElbConfig, ElbListenersConfig, InvalidElbConfigError
+from network_setup import get_network_config
+from nose.tools import *
+from troposphere import Ref
+
+
+def create_elb_config(loadbalancer_protocol='HTTP', instance_protocol='HTTP', elb_health_check='HTTP:80/index.html',
+                      sticky_app_cookie=None, load_balancer_type='application', shared_load_balancer=None,
+                      path_pattern=None, host_header=None, rule_priority=None, slow_start=None, cross_zone=None,
+                      connection_draining_timeout=None, idle_timeout=None, access_log_emit_interval=None):
+    """
+    Helper function to create an application load balancer elb_config
+    :param loadbalancer_protocol: protocol for traffic into the load balancer from World
+    :param instance_protocol: protocol for traffic into ASG from the load balancer
+    :param elb_health_check: path to test page
+    :param sticky_app_cookie: Name of application cookie used for stickiness
+    :param load_balancer_type: classic or application
+    :param shared_load_balancer: title of the unit whose application load balancer is shared
+    :param path_pattern: path of requests to route to the unit on the shared load balancer
+    :param host_header: host name of requests to route to the unit on the shared load balancer
+    :param rule_priority: priority of the unit's routing rule on the shared load balancer
+    :param slow_start: seconds over which targets receive a linearly increasing share of requests
+    :param cross_zone: False to disable cross zone load balancing
+    :param connection_draining_timeout: seconds to drain connections from deregistering targets
+    :param idle_timeout: seconds a connection can be idle before it is closed
+    :param access_log_emit_interval: minutes between publishing access logs
+    :return: ElbConfig object
+    """
+    return ElbConfig(
+        elb_listeners_config=[
+            ElbListenersConfig(instance_port='80', loadbalancer_port='80', loadbalancer_protocol=loadbalancer_protocol,
+                               instance_protocol=instance_protocol, sticky_app_cookie=sticky_app_cookie)
+        ],
+        elb_health_check=elb_health_check,
+        elb_log_bucket='my-s3-bucket',
+        public_unit=True,
+        ssl_certificate_id=None,
+        healthy_threshold=10,
+        unhealthy_threshold=2,
+        interval=300,
+        timeout=30,
+        owner='ga.autobots@gmail.com',
+        load_balancer_type=load_balancer_type,
+        shared_load_balancer=shared_load_balancer,
+        path_pattern=path_pattern,
+        host_header=host_header,
+        rule_priority=rule_priority,
+        slow_start=slow_start,
+        cross_zone=cross_zone,
+        connection_draining_timeout=connection_draining_timeout,
+        idle_timeout=idle_timeout,
+        access_log_emit_interval=access_log_emit_interval
+    )
+
+
+def test_alb():
+    """
+    Test that an application load balancer forwards each listener to a target group with the elb health check
+    """
+    network_config, template = get_network_config()
+    alb = Alb(title='web', template=template, network_config=network_config,
+              elb_config=create_elb_config(slow_start=60))
+
+    assert_equals(alb.trop_elb.title, 'web')
+    assert_equals(alb.trop_elb.Scheme, 'internet-facing')
+    assert_equals(alb.trop_elb.LoadBalancerAttributes[1].Value, 'my-s3-bucket')
+    assert_equals(len(alb.target_groups), 1)
+    target_group = alb.target_groups[0]
+    assert_equals(target_group.title, 'webTg80')
+    assert_equals(target_group.HealthCheckProtocol, 'HTTP')
+    assert_equals(target_group.HealthCheckPort, '80')
+    assert_equals(target_group.HealthCheckPath, '/index.html')
+    assert_equals(target_group.TargetGroupAttributes[0].Key, 'slow_start.duration_seconds')
+    assert_equals(target_group.TargetGroupAttributes[0].Value, '60')
+    assert_equals(alb.listeners[0].title, 'webListener80')
+    assert_equals(alb.listeners[0].DefaultActions[0].TargetGroupArn.data, Ref(target_group).data)
+    assert_equals(alb.targets, alb.target_groups)
+    assert_equals(alb.target_dependencies, ['webListener80'])
+    assert_equals(alb.security_group.data, {'Ref': 'webSg'})
+
+
+def test_alb_connection_settings():
+    """
+    Test that connection draining sets the target group deregistration delay and idle timeout the load balancer's
+    """
+    network_config, template = get_network_config()
+    alb = Alb(title='web', template=template, network_config=network_config,
+              elb_config=create_elb_config(connection_draining_timeout=30, idle_timeout=120))
+
+    assert_equals(alb.trop_elb.LoadBalancerAttributes[3].Key, 'idle_timeout.timeout_seconds')
+    assert_equals(alb.trop_elb.LoadBalancerAttributes[3].Value, '120')
+    assert_equals(alb.target_groups[0].TargetGroupAttributes[0].Key, 'deregistration_delay.timeout_seconds')
+    assert_equals(alb.target_groups[0].TargetGroupAttributes[0].Value, '30')
+
+
+def test_shared_alb():
+    """
+    Test that a unit sharing an application load balancer adds a listener rule to its listener
+    """
+    network_config, template = get_network_config()
+    shared_alb = SharedAlb(title='api', template=template, network_config=network_config,
+                           elb_config=create_elb_config(shared_load_balancer='web', path_pattern='/api/*',
+                                                        rule_priority=10))
+
+    assert_equals(shared_alb.target_groups[0].title, 'apiTg80')
+    listener_rule = shared_alb.listener_rules[0]
+    assert_equals(listener_rule.title, 'apiRule80')
+    assert_equals(listener_rule.ListenerArn.data, {'Ref': 'webListener80'})
+    assert_equals(listener_rule.Priority, 10)
+    assert_equals(listener_rule.Conditions[0].Field, 'path-pattern')
+    assert_equals(listener_rule.Conditions[0].Values, ['/api/*'])
+    assert_equals(shared_alb.security_group.data, {'Ref': 'webSg'})
+    assert_equals(shared_alb.target_dependencies, ['apiRule80'])
+
+
+def test_create_load_balancer():
+    """
+    Test that the load balancer type of a unit is selected by its elb_config
+    """
+    network_config, template = get_network_config()
+    assert_is_instance(create_load_balancer('app1', template, network_config,
+                                            create_elb_config(load_balancer_type='classic')), Elb)
+    assert_is_instance(create_load_balancer('app2', template, network_config, create_elb_config()), Alb)
+    assert_is_instance(create_load_balancer('app3', template, network_config,
+                                            create_elb_config(shared_load_balancer='app2', host_header='api.test.com',
+                                                              rule_priority=1)), SharedAlb)
+
+
+def test_invalid_elb_config():
+    """
+    Test that elb_configs the load balancer type does not support are rejected
+    """
+    assert_raises(InvalidElbConfigError, create_elb_config, loadbalancer_protocol='TCP', instance_protocol='TCP')
+    assert_raises(InvalidElbConfigError, create_elb_config, sticky_app_cookie='JSESSION')
+    assert_raises(InvalidElbConfigError, create_elb_config, elb_health_check='TCP:80')
+    assert_raises(InvalidElbConfigError, create_elb_config, load_balancer_type='classic', slow_start=60)
+    assert_raises(InvalidElbConfigError, create_elb_config, path_pattern='/api/*', rule_priority=10)
+    assert_raises(InvalidElbConfigError, create_elb_config, cross_zone=False)
+    assert_raises(InvalidElbConfigError, create_elb_config, access_log_emit_interval=5)
+    assert_raises(InvalidElbConfigError, create_elb_config, shared_load_balancer='web', path_pattern='/api/*',
+                  rule_priority=10, idle_timeout=120)
+    assert_raises(InvalidElbConfigError, create_elb_config, shared_load_balancer='web', rule_priority=10)
+    assert_raises(InvalidElbConfigError, create_elb_config, shared_load_balancer='web', path_pattern='/api/*')
+    assert_raises(InvalidElbConfigError, create_elb_config, load_balancer_type='classic', shared_load_balancer='web',
+                  path_pattern='/api/*', rule_priority=10)
+
+
+def test_shared_load_balancer_errors():
+    """
+    Test that units can only share an existing application load balancer with unique rule priorities
+    """
+    web = {'unit_title': 'web', 'elb_config': create_elb_config()}
+    api = {'unit_title': 'api', 'elb_config': create_elb_config(shared_load_balancer='web', path_pattern='/api/*',
+                                                                 rule_priority=10)}
+    admin = {'unit_title': 'admin', 'elb_config': create_elb_config(shared_load_balancer='web',
+                                                                     path_pattern='/admin/*', rule_priority=10)}
+    classic = {'unit_title': 'classic', 'elb_config': create_elb_config(load_balancer_type='classic')}
+    other = {'unit_title': 'other', 'elb_config': create_elb_config(shared_load_balancer='classic',
+                                                                     path_pattern='/other/*', rule_priority=20)}
+
+    assert_equals(get_shared_load_balancer_errors([web, api]), [])
+    assert_equals(len(get_shared_load_balancer_errors([api])), 1)
+    assert_equals(len(get_shared_load_balancer_errors([web, api, admin])), 1)
+    assert_equals(len(get_shared_load_balancer_errors([classic, other])), 1)
+    assert_equals(len(get_shared_load_balancer_errors([web], [dict(api, unit_title='zd')])), 1)
@@ -73,7 +73,7 @@ def test_method_config():
     assert_equals(method.method_name, methodname)
     assert_equals(method.lambda_unit, lambda_title)
     assert_equals(method.request, request)
-    assert_equals(method.responses, [response])
+    assert_equals(method.responses, (response,))
     assert_equals(method.httpmethod, httpmethod)
     assert_equals(method.authorizationtype, authorizationtype)
 
@@ -216,7 +216,7 @@ def test_custom_origin():
     assert_equal(origin_protocol_policy, helper_cf_origin.origin_protocol_policy)
     assert_equal(http_port, helper_cf_origin.http_port)
     assert_equal(https_port, helper_cf_origin.https_port)
-    assert_equal(origin_ssl_protocols, helper_cf_origin.origin_ssl_protocols)
+    assert_equal(tuple(origin_ssl_protocols), helper_cf_origin.origin_ssl_protocols)
 
 
 def test_cf_cache_behavior():
@@ -253,15 +253,15 @@ def test_cf_cache_behavior():
 
     assert_equal(is_default, helper_cf_cache_behavior.is_default)
     assert_equal(path_pattern, helper_cf_cache_behavior.path_pattern)
-    assert_equal(allowed_methods, helper_cf_cache_behavior.allowed_methods)
-    assert_equal(cached_methods, helper_cf_cache_behavior.cached_methods)
+    assert_equal(tuple(allowed_methods), helper_cf_cache_behavior.allowed_methods)
+    assert_equal(tuple(cached_methods), helper_cf_cache_behavior.cached_methods)
     assert_equal(target_origin_id, helper_cf_cache_behavior.target_origin_id)
     assert_equal(forward_cookies, helper_cf_cache_behavior.forward_cookies)
-    assert_equal(forwarded_headers, helper_cf_cache_behavior.forwarded_headers)
+    assert_equal(tuple(forwarded_headers), helper_cf_cache_behavior.forwarded_headers)
     assert_equal(min_ttl, helper_cf_cache_behavior.min_ttl)
     assert_equal(default_ttl, helper_cf_cache_behavior.default_ttl)
     assert_equal(max_ttl, helper_cf_cache_behavior.max_ttl)
-    assert_equal(trusted_signers, helper_cf_cache_behavior.trusted_signers)
+    assert_equal(tuple(trusted_signers), helper_cf_cache_behavior.trusted_signers)
     assert_equal(query_string, helper_cf_cache_behavior.query_string)
 
 
@@ -290,7 +290,7 @@ def test_cf_distribution_config():
                                                    minimum_protocol_version=minimum_protocol_version,
                                                    ssl_support_method=ssl_support_method)
 
-    assert_equal(aliases, cf_dist_config.aliases)
+    assert_equal(tuple(aliases), cf_dist_config.aliases)
     assert_equal(comment, cf_dist_config.comment)
     assert_equal(default_root_object, cf_dist_config.default_root_object)
     assert_equal(enabled, cf_dist_config.enabled)
@@ -307,7 +307,7 @@ def test_cf_distribution_unit():
     cf_dist_config = create_cf_distribution_config()
     origins = [create_s3_origin(), create_s3_origin()]
     default_behaviour = create_cache_behavior()
-    default_behaviour.is_default = True
+    default_behaviour = default_behaviour.replace(is_default=True)
     cache_behaviors = [default_behaviour, create_cache_behavior()]
     unit_title = 'testcf'
     cf_dist_unit = CFDistributionUnit(unit_title=unit_title,
@@ -327,7 +327,7 @@ def test_cf_distribution_tree():
     cf_dist_config = create_cf_distribution_config()
     origins = [create_s3_origin(), create_s3_origin()]
     default_behaviour = create_cache_behavior()
-    default_behaviour.is_default = True
+    default_behaviour = default_behaviour.replace(is_default=True)
     cache_behaviors = [default_behaviour, create_cache_behavior()]
     leaf_title = 'testcf'
     tree_name = 'testtree'
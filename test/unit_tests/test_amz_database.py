@@ -87,7 +87,7 @@ def test_databse_snapshot():
     """ Tests correct structure of Database provisioned from snapshot.
         """
     global network_config, database_config, template
-    database_config.db_snapshot_id = 'ss123456789v00-final-snapshot'
+    database_config = database_config.replace(db_snapshot_id='ss123456789v00-final-snapshot')
 
     db = DatabaseUnit(unit_title='MyDb',
                       stack_config=network_config,
@@ -2,6 +2,7 @@ from amazonia.classes.amz_zd_autoscaling import ZdAutoscalingUnit, ZdAutoscaling
 from amazonia.classes.asg_config import AsgConfig
 from amazonia.classes.block_devices_config import BlockDevicesConfig
 from amazonia.classes.elb_config import ElbConfig, ElbListenersConfig
+from amazonia.classes.weighted_routing_config import WeightedRoutingConfig, InvalidWeightedRoutingConfigError
 from network_setup import get_network_config
 from nose.tools import *
 from troposphere import Ref
@@ -175,11 +176,45 @@ def test_leaf_association():
     assert_equals(len(leaf.prod_elb.egress), 2)
 
 
-def create_zdtd_autoscaling_unit(title, blue_asg_config, green_asg_config, dependencies=None):
+@with_setup(setup_resources)
+def test_weighted_routing():
+    """Test that weighted routing shares one name between the prod and pre elbs"""
+    unit = create_zdtd_autoscaling_unit(title='app',
+                                        blue_asg_config=common_asg_config,
+                                        green_asg_config=common_asg_config,
+                                        weighted_routing_config=WeightedRoutingConfig(blue_weight=95, green_weight=5,
+                                                                                      ttl=30))
+    assert_equals(unit.weighted_r53.title, 'liveappR53')
+    assert_equals(unit.weighted_r53.HostedZoneName, public_hosted_zone_name)
+    blue_record, green_record = unit.weighted_r53.RecordSets
+    assert_equals(blue_record.SetIdentifier, 'blue')
+    assert_equals(blue_record.Weight, 95)
+    assert_equals(blue_record.ResourceRecords[0].data, {'Fn::GetAtt': ['app', 'DNSName']})
+    assert_equals(green_record.SetIdentifier, 'green')
+    assert_equals(green_record.Weight, 5)
+    assert_equals(green_record.ResourceRecords[0].data, {'Fn::GetAtt': ['preapp', 'DNSName']})
+    assert_equals(green_record.TTL, '30')
+    assert_equals(blue_record.Type, 'CNAME')
+
+    unit = create_zdtd_autoscaling_unit(title='app2',
+                                        blue_asg_config=common_asg_config,
+                                        green_asg_config=common_asg_config)
+    assert_is_none(unit.weighted_r53)
+
+    network_config.public_hosted_zone_name = None
+    assert_raises(InvalidWeightedRoutingConfigError, create_zdtd_autoscaling_unit, title='app3',
+                  blue_asg_config=common_asg_config, green_asg_config=common_asg_config,
+                  weighted_routing_config=WeightedRoutingConfig(blue_weight=95, green_weight=5, ttl=30))
+    assert_raises(InvalidWeightedRoutingConfigError, WeightedRoutingConfig, blue_weight=256, green_weight=0, ttl=60)
+
+
+def create_zdtd_autoscaling_unit(title, blue_asg_config, green_asg_config, dependencies=None,
+                                 weighted_routing_config=None):
     """Helper function to create unit
     :param title: title of unit
     :param blue_asg_config: blue specific asg config
     :param green_asg_config: green specific asg config
+    :param weighted_routing_config: weights of the prod and pre elbs
     :return new zdtd_autoscaling unit
     """
     return ZdAutoscalingUnit(
@@ -189,7 +224,8 @@ def create_zdtd_autoscaling_unit(title, blue_asg_config, green_asg_config, depen
         blue_asg_config=blue_asg_config,
         green_asg_config=green_asg_config,
         elb_config=elb_config,
-        stack_config=network_config
+        stack_config=network_config,
+        weighted_routing_config=weighted_routing_config
     )
 
 
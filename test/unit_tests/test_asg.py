@@ -1,9 +1,21 @@
 import troposphere.elasticloadbalancing as elb
+from amazonia.classes.alb import Alb
 from amazonia.classes.asg import Asg
-from amazonia.classes.asg_config import AsgConfig
+from amazonia.classes.asg_config import AsgConfig, InvalidAsgConfigError
 from amazonia.classes.block_devices_config import BlockDevicesConfig
+from amazonia.classes.elb import Elb
+from amazonia.classes.lifecycle_hook_config import LifecycleHookConfig
+from amazonia.classes.mixed_instances_policy_config import MixedInstancesPolicyConfig, \
+    InvalidMixedInstancesPolicyConfigError
+from amazonia.classes.scheduled_action_config import ScheduledActionConfig, InvalidScheduledActionConfigError
 from amazonia.classes.simple_scaling_policy_config import SimpleScalingPolicyConfig
+from amazonia.classes.step_scaling_policy_config import StepScalingPolicyConfig, StepAdjustmentConfig, \
+    InvalidStepScalingPolicyConfigError
+from amazonia.classes.target_tracking_policy_config import TargetTrackingPolicyConfig, \
+    InvalidTargetTrackingPolicyConfigError
+from amazonia.classes.warm_pool_config import WarmPoolConfig, InvalidWarmPoolConfigError
 from network_setup import get_network_config
+from test_alb import create_elb_config
 from nose.tools import *
 from troposphere import Ref, Join, Base64
 from troposphere.policies import AutoScalingRollingUpdate
@@ -172,13 +184,394 @@ def test_no_userdata():
     """
 
     global asg_config
-    asg_config.userdata = None
+    asg_config = asg_config.replace(userdata=None)
 
     asg = create_asg('nouserdata')
 
     assert_equals(asg.lc.UserData, '')
 
 
+@with_setup(setup_resources)
+def test_rolling_update_signals():
+    """
+    Tests rolling update batches and that instances signal cloud formation when the group waits on resource signals
+    """
+    global asg_config
+    asg_config = asg_config.replace(max_batch_size='5', suspend_processes=['AlarmNotification'],
+                                    wait_on_resource_signals=True)
+
+    asg = create_asg('signals')
+
+    rolling_update = asg.trop_asg.resource['UpdatePolicy'].AutoScalingRollingUpdate
+    assert_equals(rolling_update.MaxBatchSize, 5)
+    assert_list_equal(rolling_update.SuspendProcesses, ['AlarmNotification'])
+    assert_equals(rolling_update.WaitOnResourceSignals, 'true')
+    resource_signal = asg.trop_asg.resource['CreationPolicy'].ResourceSignal
+    assert_equals(resource_signal.Count, 1)
+    assert_equals(resource_signal.Timeout, 'PT10M')
+    userdata = asg.lc.UserData.data['Fn::Base64'].data['Fn::Join'][1]
+    assert_true(userdata[0].startswith('#cloud-config\n'))
+    assert_in('- service httpd start\n- /opt/aws/bin/cfn-signal -e $? --stack ', userdata[0])
+    assert_equals(userdata[1].data, {'Ref': 'AWS::StackName'})
+    assert_equals(userdata[2], ' --resource signalsAsg --region ')
+    assert_equals(userdata[3].data, {'Ref': 'AWS::Region'})
+
+    asg_config = asg_config.replace(userdata='#!/bin/bash\nyum install -y httpd\n')
+    userdata = create_asg('script').lc.UserData.data['Fn::Base64'].data['Fn::Join'][1]
+    assert_equals(userdata[0], '#!/bin/bash\nyum install -y httpd\n/opt/aws/bin/cfn-signal -e $? --stack ')
+
+    asg_config = asg_config.replace(userdata=None)
+    userdata = create_asg('nouserdata').lc.UserData.data['Fn::Base64'].data['Fn::Join'][1]
+    assert_equals(userdata[0], '#!/bin/bash\n/opt/aws/bin/cfn-signal -e 0 --stack ')
+
+    assert_raises(InvalidAsgConfigError, AsgConfig, userdata='yum install -y httpd', health_check_grace_period=300,
+                  health_check_type='ELB', iam_instance_profile_arn=None, image_id='ami-dc361ebf',
+                  instance_type='t2.micro', maxsize=2, minsize=1, block_devices_config=None,
+                  simple_scaling_policy_config=None, ec2_scheduled_shutdown=None, pausetime='10', owner='owner',
+                  wait_on_resource_signals=True)
+
+
+@with_setup(setup_resources)
+def test_deployment_config():
+    """
+    Tests code deploy deployment configurations and rollback on alarms
+    """
+    global asg_config
+    asg = create_asg('default')
+    assert_equals(asg.cd_deploygroup.DeploymentConfigName, 'CodeDeployDefault.OneAtATime')
+    assert_is_none(asg.cd_deploy_config)
+    assert_not_in('AlarmConfiguration', asg.cd_deploygroup.properties)
+    assert_not_in('AutoRollbackConfiguration', asg.cd_deploygroup.properties)
+
+    asg_config = asg_config.replace(deployment_config='HalfAtATime')
+    assert_equals(create_asg('half').cd_deploygroup.DeploymentConfigName, 'CodeDeployDefault.HalfAtATime')
+
+    asg_config = asg_config.replace(deployment_config=None, minimum_healthy_hosts='75%', auto_rollback=True,
+                                    rollback_alarms=['heavy - load'])
+    asg = create_asg('percent')
+    assert_equals(asg.cd_deploy_config.MinimumHealthyHosts.Type, 'FLEET_PERCENT')
+    assert_equals(asg.cd_deploy_config.MinimumHealthyHosts.Value, 75)
+    assert_equals(asg.cd_deploygroup.DeploymentConfigName.data, {'Ref': 'percentAsgCdc'})
+    assert_equals(asg.cd_deploygroup.AlarmConfiguration.Alarms[0].Name.data, {'Ref': 'percentAsgHeavyLoadCwa'})
+    assert_list_equal(asg.cd_deploygroup.AutoRollbackConfiguration.Events,
+                      ['DEPLOYMENT_FAILURE', 'DEPLOYMENT_STOP_ON_ALARM'])
+
+    asg_config = asg_config.replace(minimum_healthy_hosts=2, rollback_alarms=None)
+    asg = create_asg('count')
+    assert_equals(asg.cd_deploy_config.MinimumHealthyHosts.Type, 'HOST_COUNT')
+    assert_list_equal(asg.cd_deploygroup.AutoRollbackConfiguration.Events, ['DEPLOYMENT_FAILURE'])
+
+    asg_params = dict(asg_config.get_fields())
+    asg_params.update(deployment_config='AllAtOnce')
+    assert_raises(InvalidAsgConfigError, AsgConfig, **asg_params)
+    asg_params.update(deployment_config=None, rollback_alarms=['unknown'])
+    assert_raises(InvalidAsgConfigError, AsgConfig, **asg_params)
+
+
+@with_setup(setup_resources)
+def test_scaling_policies():
+    """
+    Tests target tracking and step scaling policies
+    """
+    global asg_config
+    target_tracking_params = dict(name='cpu target', predefined_metric='ASGAverageCPUUtilization',
+                                  resource_label=None, metric_name=None, namespace=None, statistic=None,
+                                  target_value=50, disable_scale_in=False, estimated_instance_warmup=None)
+    step_scaling_params = dict(name='cpu steps', description='Scale on cpu steps', metric_name='CPUUtilization',
+                               namespace='AWS/EC2', statistic='Average',
+                               comparison_operator='GreaterThanOrEqualToThreshold', threshold=60,
+                               evaluation_periods=1, period=300, adjustment_type='ChangeInCapacity',
+                               estimated_instance_warmup=120,
+                               step_adjustments=[StepAdjustmentConfig(lower_bound=0, upper_bound=20, adjustment=1),
+                                                 StepAdjustmentConfig(lower_bound=20, upper_bound=None,
+                                                                      adjustment=3)])
+    asg_config = asg_config.replace(
+        target_tracking_policy_config=[
+            TargetTrackingPolicyConfig(**target_tracking_params),
+            TargetTrackingPolicyConfig(**dict(target_tracking_params, name='queue depth', predefined_metric=None,
+                                              metric_name='QueueDepth', namespace='MyApp', statistic='Average'))],
+        step_scaling_policy_config=[StepScalingPolicyConfig(**step_scaling_params)],
+        auto_rollback=True, rollback_alarms=['cpu steps'])
+    asg = create_asg('policies')
+    policies = dict((policy.title, policy) for policy in asg.scaling_polices)
+
+    cpu_target = policies['policiesAsgCpuTargetSp']
+    assert_equals(cpu_target.PolicyType, 'TargetTrackingScaling')
+    assert_not_in('AdjustmentType', cpu_target.properties)
+    assert_equals(cpu_target.TargetTrackingConfiguration.PredefinedMetricSpecification.PredefinedMetricType,
+                  'ASGAverageCPUUtilization')
+    assert_equals(cpu_target.TargetTrackingConfiguration.TargetValue, 50)
+    queue_depth = policies['policiesAsgQueueDepthSp'].TargetTrackingConfiguration.CustomizedMetricSpecification
+    assert_equals(queue_depth.MetricName, 'QueueDepth')
+    assert_equals(queue_depth.Dimensions[0].Value.data, {'Ref': 'policiesAsg'})
+
+    cpu_steps = policies['policiesAsgCpuStepsSp']
+    assert_equals(cpu_steps.PolicyType, 'StepScaling')
+    assert_equals(cpu_steps.EstimatedInstanceWarmup, 120)
+    assert_equals(len(cpu_steps.StepAdjustments), 2)
+    assert_not_in('MetricIntervalUpperBound', cpu_steps.StepAdjustments[1].properties)
+    alarm = asg.scaling_policy_alarms['cpu steps']
+    assert_equals(alarm.Threshold, '60')
+    assert_equals(alarm.AlarmActions[0].data, {'Ref': 'policiesAsgCpuStepsSp'})
+    assert_equals(asg.cd_deploygroup.AlarmConfiguration.Alarms[0].Name.data, {'Ref': 'policiesAsgCpuStepsCwa'})
+
+    assert_raises(InvalidTargetTrackingPolicyConfigError, TargetTrackingPolicyConfig,
+                  **dict(target_tracking_params, metric_name='QueueDepth'))
+    asg_config = asg_config.replace(target_tracking_policy_config=[
+        TargetTrackingPolicyConfig(**dict(target_tracking_params, predefined_metric='ALBRequestCountPerTarget'))])
+    assert_raises(InvalidAsgConfigError, create_asg, 'norequests')
+    assert_raises(InvalidStepScalingPolicyConfigError, StepScalingPolicyConfig,
+                  **dict(step_scaling_params, step_adjustments=[]))
+    assert_raises(InvalidStepScalingPolicyConfigError, StepScalingPolicyConfig,
+                  **dict(step_scaling_params,
+                         step_adjustments=[StepAdjustmentConfig(lower_bound=0, upper_bound=20, adjustment=1),
+                                           StepAdjustmentConfig(lower_bound=10, upper_bound=None, adjustment=3)]))
+    assert_raises(InvalidStepScalingPolicyConfigError, StepAdjustmentConfig, lower_bound=20, upper_bound=10,
+                  adjustment=1)
+
+
+@with_setup(setup_resources)
+def test_load_balancer_target_tracking():
+    """
+    Tests request count policies track the unit's own load balancer, whose names are only known once it is created
+    """
+    target_tracking_params = dict(name='requests', predefined_metric='ALBRequestCountPerTarget', resource_label=None,
+                                  metric_name=None, namespace=None, statistic=None, target_value=1000,
+                                  disable_scale_in=False, estimated_instance_warmup=None)
+    alb = Alb(title='web', template=template, network_config=network_config, elb_config=create_elb_config())
+    asg = Asg(title='web', template=template, network_config=network_config, load_balancers=alb.targets,
+              load_balancer=alb, asg_config=asg_config.replace(target_tracking_policy_config=[
+                  TargetTrackingPolicyConfig(**target_tracking_params),
+                  TargetTrackingPolicyConfig(**dict(target_tracking_params, name='labelled requests',
+                                                    resource_label='app/web/1/targetgroup/web/2'))]))
+    policies = dict((policy.title, policy) for policy in asg.scaling_polices)
+    resource_label = policies['webAsgRequestsSp'].TargetTrackingConfiguration.PredefinedMetricSpecification\
+        .ResourceLabel.data['Fn::Join']
+    assert_equals(resource_label[0], '/')
+    assert_equals([name.data for name in resource_label[1]], [{'Fn::GetAtt': ['web', 'LoadBalancerFullName']},
+                                                              {'Fn::GetAtt': ['webTg80', 'TargetGroupFullName']}])
+    assert_equals(policies['webAsgLabelledRequestsSp'].TargetTrackingConfiguration.PredefinedMetricSpecification
+                  .ResourceLabel, 'app/web/1/targetgroup/web/2')
+
+    classic_elb = Elb(title='classic', template=template, network_config=network_config,
+                      elb_config=create_elb_config(load_balancer_type='classic'))
+    custom_params = dict(target_tracking_params, predefined_metric=None, metric_name='RequestCount',
+                         namespace='AWS/ELB', statistic='Sum')
+    asg = Asg(title='classic', template=template, network_config=network_config, load_balancers=classic_elb.targets,
+              load_balancer=classic_elb, asg_config=asg_config.replace(target_tracking_policy_config=[
+                  TargetTrackingPolicyConfig(**custom_params),
+                  TargetTrackingPolicyConfig(**dict(custom_params, name='queue depth', metric_name='QueueDepth',
+                                                    namespace='MyApp', statistic='Average'))]))
+    policies = dict((policy.title, policy) for policy in asg.scaling_polices)
+    request_dimensions = policies['classicAsgRequestsSp'].TargetTrackingConfiguration.CustomizedMetricSpecification\
+        .Dimensions
+    assert_equals([(dimension.Name, dimension.Value.data) for dimension in request_dimensions],
+                  [('LoadBalancerName', {'Ref': 'classic'})])
+    queue_dimensions = policies['classicAsgQueueDepthSp'].TargetTrackingConfiguration.CustomizedMetricSpecification\
+        .Dimensions
+    assert_equals(queue_dimensions[0].Name, 'AutoScalingGroupName')
+
+
+@with_setup(setup_resources)
+def test_detailed_monitoring():
+    """
+    Tests detailed monitoring is configurable and allows scaling policy periods down to 60 seconds
+    """
+    global asg_config
+    assert_equals(create_asg('basic').lc.InstanceMonitoring, 'false')
+
+    asg_config = asg_config.replace(detailed_monitoring=True)
+    asg_config = asg_config.replace(simple_scaling_policy_config=[
+        scaling_policy.replace(period=60) for scaling_policy in asg_config.simple_scaling_policy_config])
+    asg = create_asg('detailed')
+    assert_equals(asg.lc.InstanceMonitoring, 'true')
+    assert_equals(asg.cw_alarms[0].Period, 60)
+
+    asg_params = dict(asg_config.get_fields())
+    asg_params.update(detailed_monitoring=False)
+    assert_raises(InvalidAsgConfigError, AsgConfig, **asg_params)
+    asg_params.update(detailed_monitoring=True, simple_scaling_policy_config=[
+        asg_config.simple_scaling_policy_config[0].replace(period=90)])
+    assert_raises(InvalidAsgConfigError, AsgConfig, **asg_params)
+
+    # step scaling policies, whose default period was 60 seconds before detailed monitoring, follow the same rules
+    step_scaling_policy = StepScalingPolicyConfig(
+        name='cpu steps', description='Scale on cpu steps', metric_name='CPUUtilization', namespace='AWS/EC2',
+        statistic='Average', comparison_operator='GreaterThanOrEqualToThreshold', threshold=60, evaluation_periods=1,
+        period=60, adjustment_type='ChangeInCapacity', estimated_instance_warmup=None,
+        step_adjustments=[StepAdjustmentConfig(lower_bound=0, upper_bound=None, adjustment=1)])
+    asg_params.update(simple_scaling_policy_config=asg_config.simple_scaling_policy_config,
+                      step_scaling_policy_config=[step_scaling_policy])
+    assert_equals(AsgConfig(**asg_params).step_scaling_policy_config[0].period, 60)
+    asg_params.update(detailed_monitoring=False)
+    assert_raises(InvalidAsgConfigError, AsgConfig, **asg_params)
+
+
+@with_setup(setup_resources)
+def test_launch_template():
+    """
+    Tests launch templates and mixed instances policies
+    """
+    global asg_config
+    asg_config = asg_config.replace(launch_template=True, detailed_monitoring=True)
+    asg = create_asg('template')
+    assert_is_none(asg.lc)
+    assert_not_in('LaunchConfigurationName', asg.trop_asg.properties)
+    assert_equals(asg.trop_asg.LaunchTemplate.LaunchTemplateId.data, {'Ref': 'templateAsgLt'})
+    launch_template_data = asg.launch_template.LaunchTemplateData
+    assert_equals(launch_template_data.ImageId, 'ami-dc361ebf')
+    assert_equals(launch_template_data.InstanceType, 't2.micro')
+    assert_equals(launch_template_data.IamInstanceProfile.Arn,
+                  'arn:aws:iam::123456789:instance-profile/iam-instance-profile')
+    assert_equals(launch_template_data.Monitoring.Enabled, 'true')
+    assert_is(type(launch_template_data.UserData), Base64)
+    assert_equals(launch_template_data.BlockDeviceMappings[0].DeviceName, '/dev/xvda')
+    asg.trop_asg.validate()
+
+    # an instance profile given by name rather than arn
+    asg_config = asg_config.replace(iam_instance_profile_arn='iam-instance-profile')
+    launch_template_data = create_asg('named').launch_template.LaunchTemplateData
+    assert_equals(launch_template_data.IamInstanceProfile.Name, 'iam-instance-profile')
+    assert_not_in('Arn', launch_template_data.IamInstanceProfile.properties)
+
+    mixed_instances_policy_params = dict(instance_types=['t3.micro', 't2.micro', 't3a.micro'],
+                                         on_demand_base_capacity=1, on_demand_percentage_above_base_capacity=0,
+                                         spot_allocation_strategy='lowest-price', spot_instance_pools=2,
+                                         spot_max_price=None)
+    asg_config = asg_config.replace(launch_template=None, mixed_instances_policy_config=MixedInstancesPolicyConfig(
+        **mixed_instances_policy_params))
+    asg = create_asg('mixed')
+    assert_not_in('LaunchTemplate', asg.trop_asg.properties)
+    mixed_instances_policy = asg.trop_asg.MixedInstancesPolicy
+    assert_equals(mixed_instances_policy.LaunchTemplate.LaunchTemplateSpecification.LaunchTemplateId.data,
+                  {'Ref': 'mixedAsgLt'})
+    assert_list_equal([override.InstanceType for override in mixed_instances_policy.LaunchTemplate.Overrides],
+                      ['t2.micro', 't3.micro', 't3a.micro'])
+    assert_equals(mixed_instances_policy.InstancesDistribution.OnDemandPercentageAboveBaseCapacity, 0)
+    assert_equals(mixed_instances_policy.InstancesDistribution.SpotInstancePools, 2)
+    assert_not_in('SpotMaxPrice', mixed_instances_policy.InstancesDistribution.properties)
+    asg.trop_asg.validate()
+
+    asg.trop_asg.LaunchConfigurationName = 'launchConfig'
+    assert_raises(ValueError, asg.trop_asg.validate)
+    assert_raises(InvalidMixedInstancesPolicyConfigError, MixedInstancesPolicyConfig,
+                  **dict(mixed_instances_policy_params, spot_allocation_strategy='capacity-optimized'))
+
+
+@with_setup(setup_resources)
+def test_scheduled_actions():
+    """
+    Tests scheduled actions and the ec2_scheduled_shutdown preset
+    """
+    global asg_config
+    scheduled_action_params = dict(name='pre warm', recurrence='30 8 * * 1-5', min_size=2, max_size=4,
+                                   desired_capacity=None, time_zone='Australia/Perth', start_time=None, end_time=None)
+    asg_config = asg_config.replace(maxsize=4, scheduled_actions=[ScheduledActionConfig(**scheduled_action_params)])
+    asg = create_asg('scheduled')
+    assert_equals(len(asg.scheduled_actions), 1)
+    scheduled_action = asg.scheduled_actions[0]
+    assert_equals(scheduled_action.title, 'scheduledAsgSchedActPreWarm')
+    assert_equals(scheduled_action.Recurrence, '30 8 * * 1-5')
+    assert_equals(scheduled_action.TimeZone, 'Australia/Perth')
+    assert_equals(scheduled_action.MinSize, 2)
+    assert_not_in('DesiredCapacity', scheduled_action.properties)
+
+    asg_config = asg_config.replace(scheduled_actions=None, ec2_scheduled_shutdown=True)
+    asg = create_asg('shutdown')
+    assert_list_equal([scheduled_action.title for scheduled_action in asg.scheduled_actions],
+                      ['shutdownAsgSchedActOFF', 'shutdownAsgSchedActON'])
+    assert_equals(asg.scheduled_actions[0].MaxSize, 0)
+    assert_equals(asg.scheduled_actions[1].Recurrence, '0 19 * * 0,1,2,3,4')
+    assert_equals(asg.scheduled_actions[1].MaxSize, 4)
+    assert_not_in('TimeZone', asg.scheduled_actions[1].properties)
+
+    assert_raises(InvalidScheduledActionConfigError, ScheduledActionConfig,
+                  **dict(scheduled_action_params, min_size=None, max_size=None))
+    assert_raises(InvalidScheduledActionConfigError, ScheduledActionConfig,
+                  **dict(scheduled_action_params, min_size=5))
+    assert_raises(InvalidScheduledActionConfigError, ScheduledActionConfig,
+                  **dict(scheduled_action_params, desired_capacity='6'))
+    assert_raises(InvalidScheduledActionConfigError, ScheduledActionConfig,
+                  **dict(scheduled_action_params, recurrence=None))
+    assert_raises(InvalidScheduledActionConfigError, ScheduledActionConfig,
+                  **dict(scheduled_action_params, name=None))
+
+
+@with_setup(setup_resources)
+def test_scheduled_action_names():
+    """
+    Tests that scheduled actions of a group have unique names, including the ec2_scheduled_shutdown preset's
+    """
+    global asg_config
+    scheduled_action_params = dict(name='pre warm', recurrence='30 8 * * 1-5', min_size=2, max_size=4,
+                                   desired_capacity=None, time_zone=None, start_time=None, end_time=None)
+    scheduled_actions = [ScheduledActionConfig(**scheduled_action_params),
+                         ScheduledActionConfig(**dict(scheduled_action_params, name='cool down',
+                                                      recurrence='0 18 * * 1-5'))]
+    asg_config = asg_config.replace(maxsize=4, scheduled_actions=scheduled_actions)
+    asg = create_asg('twice')
+    assert_list_equal([scheduled_action.title for scheduled_action in asg.scheduled_actions],
+                      ['twiceAsgSchedActPreWarm', 'twiceAsgSchedActCoolDown'])
+
+    asg_config_params = dict((field, getattr(asg_config, field)) for field in asg_config.get_field_names())
+    assert_raises(InvalidAsgConfigError, AsgConfig, **dict(
+        asg_config_params, scheduled_actions=[scheduled_actions[0], scheduled_actions[0].replace(name='pre_warm')]))
+    off_action = scheduled_actions[0].replace(name='OFF')
+    assert_raises(InvalidAsgConfigError, AsgConfig, **dict(
+        asg_config_params, scheduled_actions=[off_action], ec2_scheduled_shutdown=True))
+
+    # the stack sets ec2_scheduled_shutdown with replace(), which validates the changed copy
+    assert_raises(InvalidAsgConfigError, asg_config.replace, scheduled_actions=[off_action],
+                  ec2_scheduled_shutdown=True)
+
+
+@with_setup(setup_resources)
+def test_lifecycle_hooks_and_warm_pool():
+    """
+    Tests lifecycle hooks, which notify the sns topic when they have a role, and warm pools
+    """
+    global asg_config
+    lifecycle_hook_params = dict(name='bootstrap', lifecycle_transition='autoscaling:EC2_INSTANCE_LAUNCHING',
+                                 default_result='CONTINUE', heartbeat_timeout=600, notification_metadata=None,
+                                 role_arn='arn:aws:iam::123456789012:role/LifecycleHookRole')
+    warm_pool_config = WarmPoolConfig(pool_state='Stopped', min_size=1, max_group_prepared_capacity=None,
+                                      reuse_on_scale_in=True)
+    asg_config = asg_config.replace(
+        lifecycle_hooks=[LifecycleHookConfig(**lifecycle_hook_params),
+                         LifecycleHookConfig(**dict(lifecycle_hook_params, name='drain', role_arn=None,
+                                                    lifecycle_transition='autoscaling:EC2_INSTANCE_TERMINATING'))],
+        warm_pool_config=warm_pool_config)
+    asg = create_asg('hooked')
+    bootstrap_hook, drain_hook = asg.trop_asg.LifecycleHookSpecificationList
+    assert_equals(bootstrap_hook.LifecycleHookName, 'bootstrap')
+    assert_equals(bootstrap_hook.HeartbeatTimeout, 600)
+    assert_equals(bootstrap_hook.RoleARN, 'arn:aws:iam::123456789012:role/LifecycleHookRole')
+    assert_equals(bootstrap_hook.NotificationTargetARN, network_config.sns_topic)
+    assert_equals(drain_hook.LifecycleTransition, 'autoscaling:EC2_INSTANCE_TERMINATING')
+    assert_not_in('NotificationTargetARN', drain_hook.properties)
+    assert_not_in('NotificationMetadata', drain_hook.properties)
+    assert_equals(asg.warm_pool.title, 'hookedAsgWarmPool')
+    assert_equals(asg.warm_pool.PoolState, 'Stopped')
+    assert_equals(asg.warm_pool.MinSize, 1)
+    assert_not_in('MaxGroupPreparedCapacity', asg.warm_pool.properties)
+    assert_equals(asg.warm_pool.InstanceReusePolicy.ReuseOnScaleIn, 'true')
+
+    asg_config = asg_config.replace(lifecycle_hooks=None, warm_pool_config=None)
+    asg = create_asg('unhooked')
+    assert_not_in('LifecycleHookSpecificationList', asg.trop_asg.properties)
+    assert_is_none(asg.warm_pool)
+
+    assert_raises(InvalidWarmPoolConfigError, WarmPoolConfig, pool_state='Stopped', min_size=3,
+                  max_group_prepared_capacity=2, reuse_on_scale_in=False)
+    asg_config_params = dict((field, getattr(asg_config, field)) for field in asg_config.get_field_names())
+    assert_raises(InvalidAsgConfigError, AsgConfig, **dict(
+        asg_config_params, lifecycle_hooks=[LifecycleHookConfig(**lifecycle_hook_params)] * 2))
+    assert_raises(InvalidAsgConfigError, AsgConfig, **dict(
+        asg_config_params, warm_pool_config=warm_pool_config, mixed_instances_policy_config=MixedInstancesPolicyConfig(
+            instance_types=['t3.small'], on_demand_base_capacity=1, on_demand_percentage_above_base_capacity=50,
+            spot_allocation_strategy='capacity-optimized', spot_instance_pools=None, spot_max_price=None)))
+
+
 def create_asg(title):
     """
     Helper function to create ASG Troposhpere object.
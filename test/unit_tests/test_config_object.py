@@ -0,0 +1,103 @@
+import copy
+import pickle
+
+from amazonia.classes.config_object import ImmutableConfigError
+from amazonia.classes.elb_config import ElbConfig, ElbListenersConfig
+from amazonia.classes.api_gateway_config import ApiGatewayResponseConfig
+from amazonia.classes.step_scaling_policy_config import StepAdjustmentConfig, InvalidStepScalingPolicyConfigError
+from amazonia.classes.weighted_routing_config import WeightedRoutingConfig, InvalidWeightedRoutingConfigError
+from nose.tools import *
+from troposphere import Join, Parameter, Ref
+
+
+def create_elb_config(instance_port='80'):
+    return ElbConfig(elb_listeners_config=[ElbListenersConfig(instance_protocol='HTTP', loadbalancer_protocol='HTTP',
+                                                              instance_port=instance_port, loadbalancer_port='80',
+                                                              sticky_app_cookie=None)],
+                     elb_health_check='HTTP:80/index.html', public_unit=True, elb_log_bucket=None,
+                     ssl_certificate_id=None, healthy_threshold=10, unhealthy_threshold=2, interval=300, timeout=30,
+                     owner='ningaloo')
+
+
+def test_immutable():
+    """
+    Test config objects can not be changed once created, and that replace creates a changed copy
+    """
+    elb_config = create_elb_config()
+    assert_raises(ImmutableConfigError, setattr, elb_config, 'public_unit', False)
+    assert_raises(ImmutableConfigError, setattr, elb_config, 'unknown_field', False)
+    assert_raises(ImmutableConfigError, delattr, elb_config, 'public_unit')
+    assert_false(hasattr(elb_config, '__dict__'))
+
+    private_elb_config = elb_config.replace(public_unit=False)
+    assert_true(elb_config.public_unit)
+    assert_false(private_elb_config.public_unit)
+    assert_is(private_elb_config.elb_listeners_config, elb_config.elb_listeners_config)
+    assert_raises(ImmutableConfigError, setattr, private_elb_config, 'public_unit', True)
+    assert_raises(ImmutableConfigError, elb_config.replace, unknown_field=False)
+
+
+def test_structural_equality():
+    """
+    Test config objects are equal and hash the same when their values are equal, including nested config objects
+    """
+    elb_config = create_elb_config()
+    assert_equals(elb_config, create_elb_config())
+    assert_equals(hash(elb_config), hash(create_elb_config()))
+    assert_equals(elb_config.fingerprint(), create_elb_config().fingerprint())
+    assert_not_equal(elb_config, create_elb_config(instance_port='8080'))
+    assert_not_equal(elb_config.fingerprint(), create_elb_config(instance_port='8080').fingerprint())
+    assert_not_equal(elb_config.fingerprint(), elb_config.replace(public_unit=False).fingerprint())
+    assert_equals(len({elb_config, create_elb_config(), create_elb_config(instance_port='8080')}), 2)
+    assert_not_equal(WeightedRoutingConfig(1, 0, 60), WeightedRoutingConfig(1.0, 0, 60))
+    assert_equals(len({WeightedRoutingConfig(1, 0, 60), WeightedRoutingConfig(1.0, 0, 60)}), 2)
+
+    assert_equals(pickle.loads(pickle.dumps(elb_config)), elb_config)
+    assert_equals(copy.deepcopy(elb_config), elb_config)
+    assert_raises(ImmutableConfigError, setattr, copy.deepcopy(elb_config), 'public_unit', False)
+
+
+def test_inherited_fields():
+    """
+    Test fields declared by a parent config class are part of the child's fields
+    """
+    response_config = ApiGatewayResponseConfig(templates=['{}'], parameters={}, statuscode='200', models=None,
+                                               selectionpattern='')
+    assert_list_equal(list(response_config.get_field_names()),
+                      ['templates', 'parameters', 'statuscode', 'models', 'selectionpattern'])
+    assert_raises(ImmutableConfigError, setattr, response_config, 'templates', [])
+
+
+def test_frozen_lists():
+    """
+    Test list fields, including nested lists, are stored as tuples so they can not be changed either
+    """
+    response_config = ApiGatewayResponseConfig(templates=['{}', ['[]']], parameters={}, statuscode='200',
+                                               models=None, selectionpattern='')
+    assert_equals(response_config.templates, ('{}', ('[]',)))
+    assert_equals(response_config.replace(templates=['{}']).templates, ('{}',))
+    assert_equals(response_config, pickle.loads(pickle.dumps(response_config)))
+
+
+def test_troposphere_fingerprint():
+    """
+    Test config objects holding troposphere objects, e.g. references to template parameters, fingerprint by the
+    objects' json rather than their identity
+    """
+    blue_weight = Parameter('BlueWeight', Type='Number')
+    weighted_routing_config = WeightedRoutingConfig(Ref(blue_weight), 0, 60)
+    assert_equals(weighted_routing_config, WeightedRoutingConfig(Ref(Parameter('BlueWeight', Type='Number')), 0, 60))
+    assert_not_equal(weighted_routing_config, WeightedRoutingConfig(Ref('GreenWeight'), 0, 60))
+    assert_not_equal(weighted_routing_config, WeightedRoutingConfig(Join('', [Ref(blue_weight)]), 0, 60))
+
+
+def test_validated_replace():
+    """
+    Test replace validates the changed copy like the constructor does
+    """
+    weighted_routing_config = WeightedRoutingConfig(1, 0, 60)
+    assert_raises(InvalidWeightedRoutingConfigError, weighted_routing_config.replace, blue_weight=256)
+    assert_equals(weighted_routing_config.replace(blue_weight=Ref('BlueWeight')).blue_weight.data,
+                  {'Ref': 'BlueWeight'})
+    step_adjustment_config = StepAdjustmentConfig(lower_bound=0, upper_bound=10, adjustment=1)
+    assert_raises(InvalidStepScalingPolicyConfigError, step_adjustment_config.replace, upper_bound=0)
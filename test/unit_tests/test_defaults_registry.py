@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+from contextlib import closing
+
+from amazonia.classes.defaults_registry import DefaultsRegistry, UnknownDefaultsError
+from amazonia.classes.util import get_content_hash
+from amazonia.classes.yaml import InvalidYamlValueError
+from nose.tools import *
+
+__location__ = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
+default_path = os.path.join(__location__, '../../amazonia/defaults.yaml')
+
+
+def test_defaults_registry():
+    """
+    Test defaults are registered by content hash and the least recently used defaults are evicted
+    """
+    with open(default_path) as default_yaml:
+        defaults = default_yaml.read()
+    registry = DefaultsRegistry(max_entries=2)
+
+    defaults_hash = registry.add(defaults)
+    assert_equals(defaults_hash, get_content_hash(defaults))
+    assert_equals(registry.get(defaults_hash)['keypair'], 'INSERT_YOUR_KEYPAIR_HERE')
+
+    team_defaults = [defaults.replace('INSERT_YOUR_KEYPAIR_HERE', keypair) for keypair in ('team1', 'team2')]
+    team1_hash = registry.add(team_defaults[0])
+    registry.get(defaults_hash)
+    team2_hash = registry.add(team_defaults[1])
+    assert_equals(registry.get(team2_hash)['keypair'], 'team2')
+    assert_equals(registry.get(defaults_hash)['keypair'], 'INSERT_YOUR_KEYPAIR_HERE')
+    assert_raises(UnknownDefaultsError, registry.get, team1_hash)
+
+    assert_raises(InvalidYamlValueError, registry.add, 'keypair: 1')
+    assert_raises(InvalidYamlValueError, registry.add, '- keypair')
+
+
+def test_shared_defaults_registry():
+    """
+    Test defaults registered with one registry are found by another registry using the same database, as each web
+    server and generator process has its own registry
+    """
+    with open(default_path) as default_yaml:
+        defaults = default_yaml.read()
+    registry_directory = tempfile.mkdtemp()
+    try:
+        registry_path = os.path.join(registry_directory, 'defaults.sqlite')
+        registry = DefaultsRegistry(max_entries=2, path=registry_path)
+        other_registry = DefaultsRegistry(max_entries=2, path=registry_path)
+
+        team_defaults = [defaults.replace('INSERT_YOUR_KEYPAIR_HERE', keypair) for keypair in ('team1', 'team2')]
+        team1_hash = registry.add(team_defaults[0])
+        assert_equals(other_registry.get(team1_hash)['keypair'], 'team1')
+        assert_raises(UnknownDefaultsError, DefaultsRegistry().get, team1_hash)
+
+        # the least recently used defaults are evicted from the database too
+        defaults_hash = other_registry.add(defaults)
+        team2_hash = other_registry.add(team_defaults[1])
+        assert_equals(DefaultsRegistry(path=registry_path).get(team2_hash)['keypair'], 'team2')
+        assert_raises(UnknownDefaultsError, DefaultsRegistry(path=registry_path).get, team1_hash)
+
+        # defaults that do not match the hash they are stored under are not trusted
+        with closing(registry.connect()) as connection:
+            connection.execute('UPDATE defaults SET defaults = ? WHERE hash = ?', (team_defaults[1], defaults_hash))
+        assert_raises(UnknownDefaultsError, DefaultsRegistry(path=registry_path).get, defaults_hash)
+    finally:
+        shutil.rmtree(registry_directory)
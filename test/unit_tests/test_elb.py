@@ -13,7 +13,8 @@ from troposphere import Ref
 def create_elb(instance_port='80', loadbalancer_port='80', loadbalancer_protocol='HTTP', instance_protocol='HTTP',
                hosted_zone_name=None, elb_health_check='HTTP:80/index.html', elb_log_bucket=None, public_unit=True,
                ssl_certificate_id=None, healthy_threshold=10, unhealthy_threshold=2, interval=300, timeout=30,
-               sticky_app_cookie='SESSIONTOKEN'):
+               sticky_app_cookie='SESSIONTOKEN', cross_zone=None, connection_draining_timeout=None, idle_timeout=None,
+               access_log_emit_interval=None):
     """
     Helper function to create Elb Troposhpere object to interate through.
     :param instance_port - port for traffic to instances from the load balancer
@@ -26,6 +27,10 @@ def create_elb(instance_port='80', loadbalancer_port='80', loadbalancer_protocol
     :param public_unit: Boolean to determine if the elb scheme will be internet-facing or private
     :param ssl_certificate_id: SSL Certificate to attach to elb for https using AWS Certificate Manager
     :param sticky_app_cookie: Name of application cookie used for stickiness
+    :param cross_zone: False to disable cross zone load balancing
+    :param connection_draining_timeout: seconds to drain connections from deregistering instances, 0 disables draining
+    :param idle_timeout: seconds a connection can be idle before it is closed
+    :param access_log_emit_interval: minutes between publishing access logs
     :return: Troposphere object for Elb
     """
     network_config, template = get_network_config()
@@ -49,7 +54,11 @@ def create_elb(instance_port='80', loadbalancer_port='80', loadbalancer_protocol
         unhealthy_threshold=unhealthy_threshold,
         interval=interval,
         timeout=timeout,
-        owner='ga.autobots@gmail.com'
+        owner='ga.autobots@gmail.com',
+        cross_zone=cross_zone,
+        connection_draining_timeout=connection_draining_timeout,
+        idle_timeout=idle_timeout,
+        access_log_emit_interval=access_log_emit_interval
     )
 
     elb = Elb(title='elb',
@@ -253,3 +262,26 @@ def test_sticky_app_cookies():
     elb_with_no_sticky_cookies = create_elb(sticky_app_cookie=empty_app_cookie)
     with assert_raises(AttributeError) as context:
         elb_with_no_sticky_cookies.trop_elb.AppCookieStickinessPolicy
+
+
+def test_connection_settings():
+    """
+    Test that cross zone load balancing, connection draining, idle timeout and the access log emit interval are set
+    from the elb_config
+    """
+    helper_elb = create_elb(elb_log_bucket='my_elb_log_bucket')
+    assert_equals(helper_elb.trop_elb.CrossZone, 'true')
+    assert_equals(helper_elb.trop_elb.AccessLoggingPolicy.EmitInterval, '60')
+    assert_not_in('ConnectionDrainingPolicy', helper_elb.trop_elb.properties)
+    assert_not_in('ConnectionSettings', helper_elb.trop_elb.properties)
+
+    helper_elb = create_elb(elb_log_bucket='my_elb_log_bucket', cross_zone=False, connection_draining_timeout=120,
+                            idle_timeout=300, access_log_emit_interval=5)
+    assert_equals(helper_elb.trop_elb.CrossZone, 'false')
+    assert_equals(helper_elb.trop_elb.AccessLoggingPolicy.EmitInterval, '5')
+    assert_true(helper_elb.trop_elb.ConnectionDrainingPolicy.Enabled)
+    assert_equals(helper_elb.trop_elb.ConnectionDrainingPolicy.Timeout, 120)
+    assert_equals(helper_elb.trop_elb.ConnectionSettings.IdleTimeout, 300)
+
+    helper_elb = create_elb(connection_draining_timeout=0)
+    assert_false(helper_elb.trop_elb.ConnectionDrainingPolicy.Enabled)
@@ -0,0 +1,182 @@
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+from amazonia.classes.defaults_registry import DefaultsRegistry, UnknownDefaultsError
+from amazonia.classes.generator_pool import GeneratorPool, GeneratorPoolBusyError, GeneratorTimeoutError, \
+    fail_lost_job, get_batch_applications
+from amazonia.classes.job_store import JobStore, JOB_COMPLETE, JOB_FAILED, JOB_RUNNING
+from amazonia.classes.util import read_yaml
+from nose.tools import *
+
+__location__ = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
+default_path = os.path.join(__location__, '../../amazonia/defaults.yaml')
+application_path = os.path.join(__location__, '../../amazonia/application.yaml')
+
+
+def test_generator_pool():
+    """
+    Test templates are generated from yaml text and parsed yaml by the worker processes
+    """
+    pool = GeneratorPool(default_path, workers=2, max_queue=2, timeout=60)
+    try:
+        with open(application_path) as application_yaml:
+            template = json.loads(pool.generate(application_yaml.read()))
+        assert_in('app1Asg', template['Resources'])
+
+        template = json.loads(pool.generate(read_yaml(application_path),
+                                            default_overrides={'jump_instance_type': 't2.micro'}))
+        assert_equals(template['Resources']['Jump']['Properties']['InstanceType'], 't2.micro')
+
+        # overriding one field of a nested default keeps its other defaults
+        template = json.loads(pool.generate(read_yaml(application_path),
+                                            default_overrides={'asg_config': {'instance_type': 't2.large'}}))
+        launch_config = template['Resources']['app1AsgLc']['Properties']
+        assert_equals(launch_config['InstanceType'], 't2.large')
+        assert_equals(launch_config['ImageId'], 'ami-dc361ebf')
+
+        results = dict((index, (template, error)) for index, template, error in
+                       pool.generate_unordered([read_yaml(application_path), {'keypair': 1}, {}]))
+        assert_list_equal(sorted(results), [0, 1, 2])
+        assert_not_in('\n', results[0][0])
+        assert_is_none(results[0][1])
+        assert_is_none(results[1][0])
+        assert_is_instance(results[1][1], Exception)
+    finally:
+        pool.shutdown()
+
+
+def test_generator_pool_backpressure():
+    """
+    Test requests are rejected once every worker and queue slot is taken, and that slow requests time out
+    """
+    pool = GeneratorPool(default_path, workers=1, max_queue=0, timeout=0.001)
+    try:
+        application = read_yaml(application_path)
+        future = pool.submit(application)
+        assert_raises(GeneratorPoolBusyError, pool.submit, application)
+        template, timings = future.result()
+        assert_list_equal([phase for phase, _ in timings], ['parse', 'validate', 'merge', 'build', 'serialize'])
+
+        assert_raises(GeneratorTimeoutError, pool.generate, application)
+    finally:
+        pool.shutdown()
+
+
+def test_generator_pool_jobs():
+    """
+    Test jobs record their phases and template, or their error, in the job store
+    """
+    job_directory = tempfile.mkdtemp()
+    pool = GeneratorPool(default_path, workers=1)
+    try:
+        job_store = JobStore(job_directory)
+        job_store.create('a' * 64)
+        job_store.create('b' * 64)
+        with open(application_path) as application_yaml:
+            pool.submit_job(job_directory, 'a' * 64, application_yaml.read()).result()
+        assert_raises(Exception, pool.submit_job(job_directory, 'b' * 64, {'keypair': 1}).result)
+
+        status = job_store.get('a' * 64)
+        assert_equals(status['status'], JOB_COMPLETE)
+        assert_list_equal([phase['phase'] for phase in status['phases']],
+                          ['parse', 'validate', 'merge', 'build', 'serialize'])
+        assert_in('app1Asg', json.loads(job_store.get_template('a' * 64))['Resources'])
+        assert_equals(job_store.get('b' * 64)['status'], JOB_FAILED)
+    finally:
+        pool.shutdown()
+        shutil.rmtree(job_directory)
+
+
+def test_broken_pool():
+    """
+    Test the pool replaces its worker processes when one dies, without leaking the slots of failed requests
+    """
+    pool = GeneratorPool(default_path, workers=1, max_queue=1, timeout=60)
+    try:
+        for _ in range(3):
+            # a worker exiting breaks the pool, as a worker killed for running out of memory would
+            assert_raises(BrokenProcessPool, pool.submit_task(os._exit, (1,), False).result)
+            template = json.loads(pool.generate(read_yaml(application_path)))
+            assert_in('app1Asg', template['Resources'])
+        assert_equals(pool.pending, 0)
+    finally:
+        pool.shutdown()
+
+
+def test_registered_defaults():
+    """
+    Test workers read registered defaults by their hash from the shared defaults registry
+    """
+    registry_directory = tempfile.mkdtemp()
+    registry_path = os.path.join(registry_directory, 'defaults.sqlite')
+    pool = GeneratorPool(default_path, workers=1, max_queue=1, timeout=60, defaults_registry_path=registry_path)
+    try:
+        with open(default_path) as default_yaml:
+            defaults = default_yaml.read().replace("jump_instance_type: 't2.nano'",
+                                                      "jump_instance_type: 't2.micro'")
+        # registered by another process after the workers started
+        defaults_hash = DefaultsRegistry(path=registry_path).add(defaults)
+        for _ in range(2):
+            template = json.loads(pool.generate(read_yaml(application_path), defaults_hash=defaults_hash))
+            assert_equals(template['Resources']['Jump']['Properties']['InstanceType'], 't2.micro')
+        assert_raises(UnknownDefaultsError, pool.generate, read_yaml(application_path), defaults_hash='unknown')
+    finally:
+        pool.shutdown()
+        shutil.rmtree(registry_directory)
+
+
+def test_fail_lost_job():
+    """
+    Test a job is marked failed when its worker dies or it is cancelled, without replacing the worker's own result
+    """
+    job_directory = tempfile.mkdtemp()
+    try:
+        job_store = JobStore(job_directory)
+        job_store.create('a' * 64)
+        job_store.update('a' * 64, status=JOB_RUNNING)
+        future = Future()
+        future.set_exception(BrokenProcessPool('A process in the process pool was terminated abruptly'))
+        fail_lost_job(job_directory, 'a' * 64, future)
+        status = job_store.get('a' * 64)
+        assert_equals(status['status'], JOB_FAILED)
+        assert_in('terminated abruptly', status['error'])
+
+        job_store.create('b' * 64)
+        future = Future()
+        future.cancel()
+        fail_lost_job(job_directory, 'b' * 64, future)
+        assert_equals(job_store.get('b' * 64)['status'], JOB_FAILED)
+
+        job_store.create('c' * 64)
+        job_store.complete('c' * 64, '{}')
+        future = Future()
+        future.set_result(('{}', []))
+        fail_lost_job(job_directory, 'c' * 64, future)
+        assert_equals(job_store.get('c' * 64)['status'], JOB_COMPLETE)
+    finally:
+        shutil.rmtree(job_directory)
+
+
+def test_get_batch_applications():
+    """
+    Test that a leading defaults document is merged under the defaults of an applications document
+    """
+    app1, app2 = {'stack_title': 'app1'}, {'stack_title': 'app2'}
+
+    assert_equals(get_batch_applications([app1, app2]), ([app1, app2], {}))
+    assert_equals(get_batch_applications([[app1, app2]]), ([app1, app2], {}))
+    assert_equals(get_batch_applications([{'defaults': {'jump_instance_type': 't2.micro'}}, app1]),
+                  ([app1], {'jump_instance_type': 't2.micro'}))
+
+    applications, default_overrides = get_batch_applications([
+        {'defaults': {'jump_instance_type': 't2.micro', 'asg_config': {'instance_type': 't2.large'}}},
+        {'applications': [app1, app2], 'defaults': {'asg_config': {'image_id': 'ami-12345678'},
+                                                    'jump_instance_type': 't2.nano'}}
+    ])
+    assert_equals(applications, [app1, app2])
+    assert_equals(default_overrides, {'jump_instance_type': 't2.nano',
+                                      'asg_config': {'instance_type': 't2.large', 'image_id': 'ami-12345678'}})
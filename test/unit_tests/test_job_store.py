@@ -0,0 +1,131 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from amazonia.classes.job_store import JobStore, JOB_QUEUED, JOB_RUNNING, JOB_COMPLETE, JOB_FAILED
+from nose.tools import *
+
+job_directory = None
+
+
+def setup_resources():
+    global job_directory
+    job_directory = tempfile.mkdtemp()
+
+
+def teardown_resources():
+    shutil.rmtree(job_directory)
+
+
+@with_setup(setup_resources, teardown_resources)
+def test_job_lifecycle():
+    """
+    Test identical submissions are coalesced and a job records its phases and template
+    """
+    job_store = JobStore(job_directory)
+    job_id = 'a' * 64
+
+    assert_true(job_store.create(job_id))
+    assert_false(job_store.create(job_id))
+    assert_equals(job_store.get(job_id)['status'], JOB_QUEUED)
+    assert_is_none(job_store.get_template(job_id))
+
+    job_store.add_phase(job_id, 'parse', 0.1)
+    job_store.add_phase(job_id, 'validate', 0.2)
+    status = job_store.get(job_id)
+    assert_equals(status['status'], JOB_RUNNING)
+    assert_list_equal([phase['phase'] for phase in status['phases']], ['parse', 'validate'])
+
+    job_store.complete(job_id, '{}')
+    assert_equals(job_store.get(job_id)['status'], JOB_COMPLETE)
+    assert_equals(job_store.get_template(job_id), '{}')
+
+    job_store.fail('b' * 64, 'Error')
+    assert_is_none(job_store.get('b' * 64))
+    assert_true(job_store.create('b' * 64))
+    job_store.fail('b' * 64, 'Error')
+    assert_equals(job_store.get('b' * 64)['status'], JOB_FAILED)
+    assert_equals(job_store.get('b' * 64)['error'], 'Error')
+
+    assert_is_none(job_store.get('../' + job_id))
+    assert_list_equal([file_name for file_name in os.listdir(job_directory) if file_name.endswith('.tmp')], [])
+
+
+@with_setup(setup_resources, teardown_resources)
+def test_evict():
+    """
+    Test jobs are evicted after their ttl and the least recently updated finished jobs are evicted beyond max entries
+    """
+    job_store = JobStore(job_directory, ttl=60, max_entries=2)
+    job_ids = [character * 64 for character in 'abcdef']
+
+    job_store.create(job_ids[0])
+    job_store.complete(job_ids[0], '{}')
+    expired = time.time() - 120
+    os.utime(job_store.get_status_path(job_ids[0]), (expired, expired))
+    job_store.create(job_ids[1])
+    assert_is_none(job_store.get(job_ids[0]))
+    assert_is_none(job_store.get_template(job_ids[0]))
+
+    job_store.create(job_ids[2])
+    older = time.time() - 30
+    os.utime(job_store.get_status_path(job_ids[1]), (older, older))
+    job_store.fail(job_ids[2], 'Error')
+    job_store.create(job_ids[3])
+    assert_is_not_none(job_store.get(job_ids[1]))
+    assert_is_none(job_store.get(job_ids[2]))
+    assert_is_not_none(job_store.get(job_ids[3]))
+
+    # queued and running jobs are kept beyond max entries until they expire
+    job_store.create(job_ids[4])
+    assert_equals(len([job_id for job_id in job_ids if job_store.get(job_id)]), 3)
+    os.utime(job_store.get_status_path(job_ids[1]), (expired, expired))
+    job_store.create(job_ids[5])
+    assert_is_none(job_store.get(job_ids[1]))
+
+
+@with_setup(setup_resources, teardown_resources)
+def test_evict_orphans():
+    """
+    Test templates without a job and abandoned temporary files are removed
+    """
+    job_store = JobStore(job_directory, ttl=60)
+    job_store.write_file(job_store.get_template_path('a' * 64), '{}')
+    expired = time.time() - 120
+    for file_name, updated in (('abandoned.tmp', expired), ('writing.tmp', time.time())):
+        with open(os.path.join(job_directory, file_name), 'w'):
+            pass
+        os.utime(os.path.join(job_directory, file_name), (updated, updated))
+
+    job_store.create('b' * 64)
+    assert_list_equal(sorted(os.listdir(job_directory)), ['b' * 64 + '.status.json', 'writing.tmp'])
+
+
+@with_setup(setup_resources, teardown_resources)
+def test_replace_lost_jobs():
+    """
+    Test submissions replace failed and stale jobs rather than coalescing onto them
+    """
+    job_store = JobStore(job_directory, stale_timeout=60)
+    job_id = 'a' * 64
+
+    job_store.create(job_id)
+    job_store.update(job_id, status=JOB_RUNNING)
+    assert_false(job_store.create(job_id))
+    status = job_store.get(job_id)
+    status['updated'] = time.time() - 120
+    job_store.write_file(job_store.get_status_path(job_id), json.dumps(status))
+    assert_true(job_store.is_stale(job_store.get(job_id)))
+    assert_true(job_store.create(job_id))
+    assert_equals(job_store.get(job_id)['status'], JOB_QUEUED)
+    assert_false(job_store.create(job_id))
+
+    job_store.fail(job_id, 'Error')
+    assert_true(job_store.create(job_id))
+    status = job_store.get(job_id)
+    assert_equals(status['status'], JOB_QUEUED)
+    assert_is_none(status['error'])
+    assert_false(job_store.create(job_id))
+    assert_list_equal(sorted(os.listdir(job_directory)), [job_id + '.status.json'])
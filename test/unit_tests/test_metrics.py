@@ -0,0 +1,58 @@
+from amazonia.classes.metrics import MetricsRegistry
+from nose.tools import *
+
+
+def test_counter():
+    """
+    Test counters are split by label and rendered in the prometheus text format
+    """
+    metrics = MetricsRegistry()
+    requests = metrics.counter('amazonia_http_requests_total', 'HTTP requests', ['endpoint', 'status'])
+    requests.inc(endpoint='/yaml', status=200)
+    requests.inc(endpoint='/yaml', status=200)
+    requests.inc(endpoint='/yaml', status=503)
+
+    assert_equals(requests.get(endpoint='/yaml', status=200), 2)
+    assert_equals(requests.get(endpoint='/metrics', status=200), 0)
+    assert_raises(ValueError, requests.inc, endpoint='/yaml')
+    assert_equals(metrics.render(), '# HELP amazonia_http_requests_total HTTP requests\n'
+                                    '# TYPE amazonia_http_requests_total counter\n'
+                                    'amazonia_http_requests_total{endpoint="/yaml",status="200"} 2\n'
+                                    'amazonia_http_requests_total{endpoint="/yaml",status="503"} 1\n')
+
+
+def test_gauge():
+    """
+    Test gauges report set values or the value of their function when rendered
+    """
+    metrics = MetricsRegistry()
+    queue_depth = [3]
+    metrics.gauge('amazonia_generator_queue_depth', 'Queued requests', function=lambda: queue_depth[0])
+    ratio = metrics.gauge('amazonia_template_cache_hit_ratio', 'Cache hit ratio')
+    ratio.set(0.25)
+
+    assert_in('amazonia_generator_queue_depth 3\n', metrics.render())
+    queue_depth[0] = 0
+    assert_in('amazonia_generator_queue_depth 0\n', metrics.render())
+    assert_in('amazonia_template_cache_hit_ratio 0.25\n', metrics.render())
+
+
+def test_histogram():
+    """
+    Test histogram buckets are cumulative and include an infinite bucket, sum and count
+    """
+    metrics = MetricsRegistry()
+    phases = metrics.histogram('amazonia_generation_phase_seconds', 'Phase latency', [0.1, 1], ['phase'])
+    phases.observe(0.05, phase='build')
+    phases.observe(0.5, phase='build')
+    phases.observe(5, phase='build')
+
+    assert_equals(phases.get_count(phase='build'), 3)
+    assert_equals(phases.get_count(phase='merge'), 0)
+    assert_equals(metrics.render(), '# HELP amazonia_generation_phase_seconds Phase latency\n'
+                                    '# TYPE amazonia_generation_phase_seconds histogram\n'
+                                    'amazonia_generation_phase_seconds_bucket{phase="build",le="0.1"} 1\n'
+                                    'amazonia_generation_phase_seconds_bucket{phase="build",le="1"} 2\n'
+                                    'amazonia_generation_phase_seconds_bucket{phase="build",le="+Inf"} 3\n'
+                                    'amazonia_generation_phase_seconds_sum{phase="build"} 5.55\n'
+                                    'amazonia_generation_phase_seconds_count{phase="build"} 3\n')
@@ -7,7 +7,7 @@ from amazonia.classes.database_config import DatabaseConfig
 from amazonia.classes.elb_config import ElbConfig, ElbListenersConfig
 from amazonia.classes.lambda_config import LambdaConfig
 from amazonia.classes.stack import Stack, DuplicateUnitNameError
-from amazonia.classes.util import get_cf_friendly_name
+from amazonia.classes.util import get_cf_friendly_name, InsecureVariableError
 from nose.tools import *
 from troposphere import Tags, Ref
 
@@ -279,6 +279,16 @@ def test_duplicate_unit_names():
     })
 
 
+@with_setup(setup_resources)
+def test_insecure_variables():
+    """
+    Test stacks built without Yaml are checked for unencrypted AWS keys
+    """
+    global userdata
+    userdata += 'export AWS_ACCESS_KEY_ID=AKI3ISW6DFTLGVWEDYMQ\n'
+    assert_raises(InsecureVariableError, create_stack)
+
+
 def create_stack(nat_highly_available=False):
     """
     Helper function to create a stack with default values
@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+from multiprocessing import Pool
+
+from amazonia.classes.template_cache import TemplateCache
+from nose.tools import *
+
+cache_directory = None
+
+
+def setup_resources():
+    global cache_directory
+    cache_directory = tempfile.mkdtemp()
+
+
+def teardown_resources():
+    shutil.rmtree(cache_directory)
+
+
+def put_templates(cache_path, worker):
+    template_cache = TemplateCache(cache_path)
+    for index in range(20):
+        template_cache.put('{0}-{1}'.format(worker, index), '{{"worker": {0}}}'.format(worker))
+        template_cache.get('{0}-{1}'.format(worker, index))
+
+
+def test_get_key():
+    """
+    Test the cache key changes with the application, defaults and amazonia version
+    """
+    key = TemplateCache.get_key('keypair: key', 'defaults', '1.0.0')
+    assert_equals(key, TemplateCache.get_key('keypair: key', 'defaults', '1.0.0'))
+    assert_not_equal(key, TemplateCache.get_key('keypair: key2', 'defaults', '1.0.0'))
+    assert_not_equal(key, TemplateCache.get_key('keypair: key', 'defaults2', '1.0.0'))
+    assert_not_equal(key, TemplateCache.get_key('keypair: key', 'defaults', '1.0.1'))
+
+
+@with_setup(setup_resources, teardown_resources)
+def test_lru_eviction():
+    """
+    Test templates are evicted least recently used first once the cache is over its size cap
+    """
+    template_cache = TemplateCache(os.path.join(cache_directory, 'cache.db'), max_bytes=30)
+    template_cache.put('a', 'a' * 10)
+    template_cache.put('b', 'b' * 10)
+    template_cache.put('c', 'c' * 10)
+    assert_equals(template_cache.get('a'), 'a' * 10)
+
+    template_cache.put('d', 'd' * 10)
+    assert_is_none(template_cache.get('b'))
+    assert_equals(template_cache.get('a'), 'a' * 10)
+    assert_equals(template_cache.get_size(), (3, 30))
+
+    template_cache.put('e', 'e' * 31)
+    assert_is_none(template_cache.get('e'))
+    assert_equals(template_cache.get_size(), (3, 30))
+
+
+@with_setup(setup_resources, teardown_resources)
+def test_concurrent_processes():
+    """
+    Test several processes can write to and read from the same cache at once
+    """
+    cache_path = os.path.join(cache_directory, 'cache.db')
+    TemplateCache(cache_path)
+    with Pool(4) as pool:
+        pool.starmap(put_templates, [(cache_path, worker) for worker in range(4)])
+
+    template_cache = TemplateCache(cache_path)
+    assert_equals(template_cache.get_size()[0], 80)
+    assert_equals(template_cache.get('3-19'), '{"worker": 3}')
@@ -0,0 +1,74 @@
+import json
+import os
+
+from amazonia.amz import generate_template
+from amazonia.classes.template_parameters import TemplateParameters
+from amazonia.classes.util import read_yaml
+from amazonia.classes.yaml import Yaml
+from nose.tools import *
+
+__location__ = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
+application = read_yaml(os.path.join(__location__, 'test_yaml_complete_valid.yaml'))
+default_data = read_yaml(os.path.join(__location__, '../../amazonia/defaults.yaml'))
+
+
+def test_parameterise():
+    """
+    Test selected fields are replaced with references to parameters defaulting to their merged values
+    """
+    united_data = Yaml(application, default_data).united_data
+    template_parameters = TemplateParameters(['db_instance_type', 'image_id', 'keypair', 'minsize'])
+    parameterised_data = template_parameters.parameterise(united_data)
+
+    assert_equals(parameterised_data['keypair'].data, {'Ref': 'KeyPair'})
+    assert_equals(parameterised_data['autoscaling_units'][0]['asg_config'].image_id.data, {'Ref': 'app1ImageId'})
+    assert_equals(parameterised_data['zd_autoscaling_units'][0]['green_asg_config'].minsize.data,
+                  {'Ref': 'zdapp1GreenMinSize'})
+    assert_equals(parameterised_data['database_units'][0]['database_config'].db_instance_type.data,
+                  {'Ref': 'db1DbInstanceType'})
+    assert_equals(parameterised_data['autoscaling_units'][0]['asg_config'].instance_type,
+                  united_data['autoscaling_units'][0]['asg_config'].instance_type)
+    # the merged stack is not changed
+    assert_equals(united_data['keypair'], application['keypair'])
+
+    parameters = dict((parameter.title, parameter.properties) for parameter in template_parameters.parameters)
+    assert_equals(parameters['KeyPair']['Default'], application['keypair'])
+    assert_equals(parameters['KeyPair']['MinLength'], 1)
+    assert_equals(parameters['app1ImageId']['AllowedPattern'], '^(ami-[a-zA-Z0-9]+$)')
+    assert_equals(parameters['app1MinSize']['Type'], 'Number')
+    assert_equals(parameters['app1MinSize']['MinValue'], 0)
+    assert_equals(parameters['app1MinSize']['Default'],
+                  str(united_data['autoscaling_units'][0]['asg_config'].minsize))
+
+    assert_raises(ValueError, TemplateParameters, ['userdata'])
+
+
+def test_generate_parameterised_template():
+    """
+    Test a parameterised template declares and refers to its parameters
+    """
+    amazonia_application = read_yaml(os.path.join(__location__, '../../amazonia/application.yaml'))
+    amazonia_application['zd_autoscaling_units'] = [{'unit_title': 'zdapp1'}]
+    template = json.loads(generate_template(amazonia_application, default_data,
+                                            parameters=['instance_type', 'maxsize']))
+
+    assert_in('app1InstanceType', template['Parameters'])
+    assert_in('zdapp1BlueMaxSize', template['Parameters'])
+    assert_not_in('KeyPair', template['Parameters'])
+    assert_equals(template['Resources']['app1Asg']['Properties']['MaxSize'], {'Ref': 'app1MaxSize'})
+
+
+def test_parameterised_minsize_policies():
+    """
+    Test the creation and update policies keep the merged minsize when minsize is a parameter, as the parameter's
+    value is not validated against them
+    """
+    amazonia_application = read_yaml(os.path.join(__location__, '../../amazonia/application.yaml'))
+    amazonia_application['autoscaling_units'][0]['asg_config'] = {'wait_on_resource_signals': True}
+    template = json.loads(generate_template(amazonia_application, default_data, parameters=['minsize']))
+
+    asg = template['Resources']['app1Asg']
+    assert_equals(asg['Properties']['MinSize'], {'Ref': 'app1MinSize'})
+    assert_equals(template['Parameters']['app1MinSize']['Default'], '1')
+    assert_equals(asg['UpdatePolicy']['AutoScalingRollingUpdate']['MinInstancesInService'], '1')
+    assert_equals(asg['CreationPolicy']['ResourceSignal']['Count'], '1')
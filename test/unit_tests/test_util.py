@@ -1,13 +1,115 @@
-from amazonia.classes.util import detect_unencrypted_access_keys, InsecureVariableError
+import datetime
+import os
+import shutil
+import stat
+import tempfile
+
+import yaml
+from amazonia.classes.asg_config import AsgConfig
+from amazonia.classes.util import get_content_hash, find_unencrypted_access_keys, read_yaml, load_yaml
 from nose.tools import *
 
+__location__ = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
+
 
-def test_detect_unencrypted_access_keys():
+def test_find_unencrypted_access_keys_in_string():
     """
     Detect unencrypted AWS access ID and AWS secret key
     """
-    assert_raises(InsecureVariableError, detect_unencrypted_access_keys,
-                  **{'userdata': '9VJrJAil2XtEC/B7g+Y+/Fmerk3iqyDH/UIhKjXk'})
+    assert_list_equal(find_unencrypted_access_keys('9VJrJAil2XtEC/B7g+Y+/Fmerk3iqyDH/UIhKjXk'),
+                      [('', 'AWS secret Key')])
+    assert_list_equal(find_unencrypted_access_keys('AKI3ISW6DFTLGVWEDYMQ'), [('', 'AWS access ID')])
+
+
+def test_find_unencrypted_access_keys():
+    """
+    Find every unencrypted AWS access ID and AWS secret key in a merged configuration, with the path of each
+    """
+    asg_config = AsgConfig(health_check_grace_period=300, health_check_type='ELB', minsize=1, maxsize=1,
+                           image_id='ami-dc361ebf', instance_type='t2.nano',
+                           userdata='#cloud-config\nkey: AKI3ISW6DFTLGVWEDYMQ\n' + 'a' * 500000,
+                           iam_instance_profile_arn=None, block_devices_config=None, simple_scaling_policy_config=None,
+                           ec2_scheduled_shutdown=None, pausetime=10, owner='ningaloo')
+    united_data = {'keypair': 'pipeline',
+                   'autoscaling_units': [{'unit_title': 'app1', 'asg_config': asg_config}],
+                   'lambda_units': [{'unit_title': 'lambda1',
+                                     'lambda_config': {
+                                         'lambda_description': 'key 9VJrJAil2XtEC/B7g+Y+/Fmerk3iqyDH/UIhKjXk'}}],
+                   'cf_distribution_units': [{'cf_origins_config': [{'custom_headers': ['AKI3ISW6DFTLGVWEDYMQ',
+                                                                                        'AKI3ISW6DFTLGVWEDYMQ']}]}]}
+
+    assert_list_equal(find_unencrypted_access_keys(united_data),
+                      [('autoscaling_units[0].asg_config.userdata', 'AWS access ID'),
+                       ('lambda_units[0].lambda_config.lambda_description', 'AWS secret Key'),
+                       ('cf_distribution_units[0].cf_origins_config[0].custom_headers[0]', 'AWS access ID'),
+                       ('cf_distribution_units[0].cf_origins_config[0].custom_headers[1]', 'AWS access ID')])
+    assert_list_equal(find_unencrypted_access_keys({'keypair': 'pipeline', 'userdata': None}), [])
+
+
+def test_get_content_hash():
+    """
+    Test content hashes are stable and distinguish inputs split at different boundaries
+    """
+    assert_equals(get_content_hash('1.4.48', 'defaults', 'application'),
+                  get_content_hash(b'1.4.48', b'defaults', 'application'))
+    assert_not_equal(get_content_hash('ab', 'c'), get_content_hash('a', 'bc'))
+    assert_equals(len(get_content_hash('')), 64)
 
-    assert_raises(InsecureVariableError, detect_unencrypted_access_keys,
-                  **{'userdata': 'AKI3ISW6DFTLGVWEDYMQ'})
+
+def test_read_yaml_cache():
+    """
+    Test parsed yaml is reused until the file changes
+    """
+    cache_directory = tempfile.mkdtemp()
+    try:
+        yaml_path = os.path.join(cache_directory, 'application.yaml')
+        with open(yaml_path, 'w') as yaml_file:
+            yaml_file.write('keypair: key1\n')
+        assert_equals(read_yaml(yaml_path, cache_directory), {'keypair': 'key1'})
+        assert_equals(read_yaml(yaml_path, cache_directory), {'keypair': 'key1'})
+        cache_files = [file_name for file_name in os.listdir(cache_directory) if file_name.endswith('.json')]
+        assert_equals(len(cache_files), 1)
+
+        # a cache file others can write is not trusted
+        cache_path = os.path.join(cache_directory, cache_files[0])
+        with open(cache_path) as cache_file:
+            tampered = cache_file.read().replace('key1', 'key3')
+        with open(cache_path, 'w') as cache_file:
+            cache_file.write(tampered)
+        os.chmod(cache_path, 0o666)
+        assert_equals(read_yaml(yaml_path, cache_directory), {'keypair': 'key1'})
+        assert_equals(stat.S_IMODE(os.stat(cache_path).st_mode), 0o600)
+
+        with open(yaml_path, 'w') as yaml_file:
+            yaml_file.write('keypair: key22\n')
+        assert_equals(read_yaml(yaml_path, cache_directory), {'keypair': 'key22'})
+        assert_equals(read_yaml(yaml_path), {'keypair': 'key22'})
+
+        # yaml that does not survive json is parsed every time
+        with open(yaml_path, 'w') as yaml_file:
+            yaml_file.write('start_time: 2017-01-01\n1: one\n')
+        assert_equals(read_yaml(yaml_path, cache_directory), {'start_time': datetime.date(2017, 1, 1), 1: 'one'})
+        assert_equals(read_yaml(yaml_path, cache_directory), {'start_time': datetime.date(2017, 1, 1), 1: 'one'})
+
+        # the cache is created private, and not used in a directory others can write
+        private_directory = os.path.join(cache_directory, 'private')
+        assert_equals(read_yaml(yaml_path, private_directory)[1], 'one')
+        assert_equals(stat.S_IMODE(os.stat(private_directory).st_mode) & 0o077, 0)
+        shared_directory = os.path.join(cache_directory, 'shared')
+        os.mkdir(shared_directory)
+        os.chmod(shared_directory, 0o777)
+        with open(yaml_path, 'w') as yaml_file:
+            yaml_file.write('keypair: key4\n')
+        assert_equals(read_yaml(yaml_path, shared_directory), {'keypair': 'key4'})
+        assert_list_equal(os.listdir(shared_directory), [])
+    finally:
+        shutil.rmtree(cache_directory)
+
+
+def test_load_yaml():
+    """
+    Test the fast loader parses the defaults the same as the pure python safe loader
+    """
+    with open(os.path.join(__location__, '../../amazonia/defaults.yaml')) as default_yaml:
+        defaults = default_yaml.read()
+    assert_equals(load_yaml(defaults), yaml.safe_load(defaults))
@@ -273,3 +273,64 @@ def test_bad_defaults():
     valid_stack_data = open_yaml_file('test_yaml_complete_valid.yaml')
     assert_raises(InvalidYamlStructureError, Yaml, **{'user_stack_data': valid_stack_data,
                                                       'default_data': bad_default_data})
+
+
+@with_setup(setup_resources)
+def test_collect_errors():
+    """
+    Test that every config error is reported in a single pass rather than raising on the first one
+    """
+    global default_data
+    valid_stack_data = open_yaml_file('../../amazonia/application.yaml')
+    assert_list_equal(Yaml(valid_stack_data, default_data, collect_errors=True).errors, [])
+
+    invalid_stack_data = {'autoscaling_units': [
+        {'unit_title': 'app1',
+         'dependencies': ['missing:80', 'app2'],
+         'asg_config': {'minsize': '2', 'maxsize': '1'}},
+        {'unit_title': 'app1',
+         'asg_config': {'userdata': 'echo "AKI3ISW6DFTLGVWEDYMQ" > naughty.file'}}
+    ]}
+    errors = Yaml(invalid_stack_data, default_data, collect_errors=True).errors
+
+    assert_equals(len(errors), 5)
+    assert_in('Autoscaling unit minsize (2) cannot be larger than maxsize (1)', errors)
+    assert_true(any('AWS access ID' in error for error in errors))
+    assert_true(any("unit name 'app1' has already been specified" in error for error in errors))
+    assert_true(any("depends on unknown unit 'missing'" in error for error in errors))
+    assert_true(any("dependency 'app2' of unit 'app1'" in error for error in errors))
+
+
+@with_setup(setup_resources)
+def test_shared_default_objects():
+    """
+    Test config objects derived wholly from the defaults are shared between units and that a unit overriding a field
+    gets its own copy
+    """
+    global default_data
+    stack_data = {'autoscaling_units': [{'unit_title': 'app1'},
+                                        {'unit_title': 'app2'},
+                                        {'unit_title': 'app3', 'asg_config': {'userdata': 'echo app3'}}]}
+    units = Yaml(stack_data, default_data).united_data['autoscaling_units']
+
+    assert_is(units[0]['elb_config'], units[1]['elb_config'])
+    assert_is(units[0]['elb_config'], units[2]['elb_config'])
+    assert_is(units[0]['asg_config'], units[1]['asg_config'])
+    assert_is_not(units[0]['asg_config'], units[2]['asg_config'])
+    assert_equals(units[2]['asg_config'].userdata, 'echo app3')
+    assert_equals(units[0]['asg_config'].replace(userdata='echo app3'), units[2]['asg_config'])
+    assert_is(units[0]['asg_config'].block_devices_config, units[2]['asg_config'].block_devices_config)
+
+
+@with_setup(setup_resources)
+def test_collect_schema_errors():
+    """
+    Test that every schema error is reported with the path of the offending field
+    """
+    global default_data
+    invalid_stack_data = open_yaml_file('test_yaml_invalid_key_autoscaling_unit.yaml')
+    errors = Yaml(invalid_stack_data, default_data, collect_errors=True).errors
+
+    assert_in('autoscaling_units.0.blah: unknown field', errors)
+    assert_in('autoscaling_units.0.elb_config.instance_port: unknown field', errors)
+    assert_equals(len(errors), 5)
@@ -1,28 +1,418 @@
 #!/usr/bin/python3
 
+import argparse
+import gzip
+import json
 import os
+import tempfile
+import threading
+import time
+import zlib
 
-from flask import Flask, request, make_response, jsonify, Response
+from flask import Flask, request, make_response, jsonify, Response, g
 from flask_cors import CORS
 from amazonia import amz
+from amazonia.classes.util import get_content_hash, load_yaml, load_yaml_documents
+from amazonia.classes.defaults_registry import DefaultsRegistry, UnknownDefaultsError
+from amazonia.classes.generator_pool import GeneratorPool, GeneratorPoolBusyError, GeneratorTimeoutError, \
+    get_batch_applications
+from amazonia.classes.job_store import JobStore, JOB_COMPLETE, JOB_FAILED
+from amazonia.classes.metrics import MetricsRegistry
+from amazonia.classes.template_cache import TemplateCache
 import yaml
 
+__location__ = os.path.realpath(
+    os.path.join(os.getcwd(), os.path.dirname(__file__)))
+
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['ETag', 'Content-Location'])
+
+# generator pool settings, these can be set from the environment when the app is run by an external wsgi server
+app.config.update(
+    DEFAULT_YAML_PATH=os.path.join(__location__, '../amazonia/defaults.yaml'),
+    GENERATOR_WORKERS=int(os.environ.get('AMAZONIA_WORKERS', 0)) or None,
+    GENERATOR_MAX_QUEUE=int(os.environ['AMAZONIA_MAX_QUEUE']) if 'AMAZONIA_MAX_QUEUE' in os.environ else None,
+    GENERATOR_TIMEOUT=float(os.environ.get('AMAZONIA_TIMEOUT', 60)),
+    RETRY_AFTER=int(os.environ.get('AMAZONIA_RETRY_AFTER', 5)),
+    TEMPLATE_MAX_AGE=int(os.environ.get('AMAZONIA_MAX_AGE', 86400)),
+    JOB_DIRECTORY=os.environ.get('AMAZONIA_JOB_DIR', os.path.join(tempfile.gettempdir(), 'amazonia-jobs')),
+    JOB_TTL=int(os.environ.get('AMAZONIA_JOB_TTL', 3600)),
+    JOB_MAX_ENTRIES=int(os.environ.get('AMAZONIA_JOB_MAX_ENTRIES', 1000)),
+    JOB_STALE_TIMEOUT=int(os.environ.get('AMAZONIA_JOB_STALE_TIMEOUT', 600)),
+    TEMPLATE_CACHE_PATH=os.environ.get('AMAZONIA_TEMPLATE_CACHE'),
+    TEMPLATE_CACHE_MAX_BYTES=int(os.environ.get('AMAZONIA_TEMPLATE_CACHE_MAX_BYTES', 256 * 1024 * 1024)),
+    DEFAULTS_MAX_ENTRIES=int(os.environ.get('AMAZONIA_DEFAULTS_MAX_ENTRIES', 64)),
+    # registered defaults are shared through this database by every server and generator process
+    DEFAULTS_REGISTRY_PATH=os.environ.get('AMAZONIA_DEFAULTS_REGISTRY',
+                                          os.path.join(tempfile.gettempdir(), 'amazonia-defaults.sqlite'))
+)
+
+# warm worker processes that generate templates, created on first use
+generator_pool = None
+generator_pool_lock = threading.Lock()
+
+# metrics are kept in process and exposed at /metrics in the prometheus text format
+metrics = MetricsRegistry()
+latency_buckets = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+http_requests = metrics.counter('amazonia_http_requests_total', 'HTTP requests by endpoint and status code',
+                                ['endpoint', 'status'])
+http_request_duration = metrics.histogram('amazonia_http_request_duration_seconds',
+                                          'HTTP request latency by endpoint', latency_buckets, ['endpoint'])
+generation_phase_duration = metrics.histogram('amazonia_generation_phase_seconds',
+                                              'Template generation latency by phase', latency_buckets, ['phase'])
+template_size = metrics.histogram('amazonia_template_size_bytes', 'Size of generated templates',
+                                  [1024 * 2 ** exponent for exponent in range(0, 12, 2)])
+template_cache_requests = metrics.counter('amazonia_template_cache_requests_total',
+                                          'Template requests answered with 304 Not Modified or 412 '
+                                          'Precondition Failed (hit), or the template (miss)',
+                                          ['result'])
+metrics.gauge('amazonia_template_cache_hit_ratio', 'Ratio of template requests answered from the client cache',
+              function=lambda: get_cache_hit_ratio())
+metrics.gauge('amazonia_generator_workers', 'Number of template generator processes',
+              function=lambda: generator_pool.workers if generator_pool else 0)
+metrics.gauge('amazonia_generator_workers_busy', 'Number of template generator processes generating a template',
+              function=lambda: generator_pool.busy if generator_pool else 0)
+metrics.gauge('amazonia_generator_queue_depth', 'Number of requests waiting for a template generator process',
+              function=lambda: generator_pool.queued if generator_pool else 0)
+shared_cache_requests = metrics.counter('amazonia_shared_cache_requests_total',
+                                        'Templates read from the shared template cache (hit) or generated (miss)',
+                                        ['result'])
+generator_busy_seconds = metrics.counter('amazonia_generator_busy_seconds_total',
+                                         'Seconds spent by generator processes generating templates')
+
+
+def get_generator_pool():
+    """
+    Return the generator pool, starting its worker processes if they are not already running
+    :return: GeneratorPool
+    """
+    global generator_pool
+    with generator_pool_lock:
+        if generator_pool is None:
+            generator_pool = GeneratorPool(app.config['DEFAULT_YAML_PATH'],
+                                           workers=app.config['GENERATOR_WORKERS'],
+                                           max_queue=app.config['GENERATOR_MAX_QUEUE'],
+                                           timeout=app.config['GENERATOR_TIMEOUT'],
+                                           on_generated=record_generation,
+                                           defaults_registry_path=app.config['DEFAULTS_REGISTRY_PATH'])
+        return generator_pool
+
+
+def get_job_store():
+    """
+    Return the store of asynchronous generation jobs
+    :return: JobStore
+    """
+    return JobStore(app.config['JOB_DIRECTORY'], ttl=app.config['JOB_TTL'],
+                    max_entries=app.config['JOB_MAX_ENTRIES'], stale_timeout=app.config['JOB_STALE_TIMEOUT'])
+
+
+def get_defaults_registry():
+    """
+    Return the registry of defaults uploaded by clients, referenced by their content hash
+    :return: DefaultsRegistry
+    """
+    if 'DEFAULTS_REGISTRY' not in app.config:
+        app.config['DEFAULTS_REGISTRY'] = DefaultsRegistry(app.config['DEFAULTS_MAX_ENTRIES'],
+                                                           path=app.config['DEFAULTS_REGISTRY_PATH'])
+    return app.config['DEFAULTS_REGISTRY']
+
+
+def get_template_cache():
+    """
+    Return the template cache shared with other server processes, if one is configured
+    :return: TemplateCache, or None
+    """
+    if app.config['TEMPLATE_CACHE_PATH'] is None:
+        return None
+    if 'TEMPLATE_CACHE' not in app.config:
+        app.config['TEMPLATE_CACHE'] = TemplateCache(app.config['TEMPLATE_CACHE_PATH'],
+                                                     max_bytes=app.config['TEMPLATE_CACHE_MAX_BYTES'])
+    return app.config['TEMPLATE_CACHE']
+
+
+def generate_cached_template(template_hash, text_content, registered_defaults_hash=None):
+    """
+    Return a template from the shared template cache, generating and caching it if it is not cached
+    :param template_hash: cache key of the template
+    :param text_content: application yaml text
+    :param registered_defaults_hash: content hash of registered defaults, or None for the server's defaults
+    :return: cloud formation template json
+    """
+    template_cache = get_template_cache()
+    if template_cache is None:
+        return get_generator_pool().generate(text_content, defaults_hash=registered_defaults_hash)
+    template_data = template_cache.get(template_hash)
+    if template_data is not None:
+        shared_cache_requests.inc(result='hit')
+        return template_data
+    shared_cache_requests.inc(result='miss')
+    template_data = get_generator_pool().generate(text_content, defaults_hash=registered_defaults_hash)
+    template_cache.put(template_hash, template_data)
+    return template_data
+
+
+def record_generation(template_data, timings):
+    """
+    Record the phase latencies and size of a generated template
+    :param template_data: cloud formation template json
+    :param timings: list of (phase, seconds) tuples
+    """
+    for phase, seconds in timings:
+        generation_phase_duration.observe(seconds, phase=phase)
+    generator_busy_seconds.inc(sum(seconds for _, seconds in timings))
+    template_size.observe(len(template_data.encode('utf-8')))
+
+
+def get_cache_hit_ratio():
+    """
+    :return: ratio of template requests answered with 304 Not Modified or 412 Precondition Failed, 0 if there have
+    been no template requests
+    """
+    hits = template_cache_requests.get(result='hit')
+    total = hits + template_cache_requests.get(result='miss')
+    return hits / total if total else 0
+
+
+def get_defaults_hash():
+    """
+    Return the content hash of the defaults file, read once
+    :return: hex digest of the defaults file
+    """
+    if 'DEFAULT_YAML_HASH' not in app.config:
+        with open(app.config['DEFAULT_YAML_PATH'], 'rb') as default_yaml:
+            app.config['DEFAULT_YAML_HASH'] = get_content_hash(default_yaml.read())
+    return app.config['DEFAULT_YAML_HASH']
+
+
+def get_request_defaults():
+    """
+    Return the defaults a request references by hash in its 'defaults' query parameter or X-Amazonia-Defaults header
+    :return: content hash of the defaults, content hash of the registered defaults or None if the request uses the
+    server's defaults
+    """
+    defaults_hash = request.args.get('defaults') or request.headers.get('X-Amazonia-Defaults')
+    if defaults_hash is None:
+        return get_defaults_hash(), None
+    # unknown defaults are rejected before any work is queued, generators read the defaults from the registry
+    get_defaults_registry().get(defaults_hash)
+    return defaults_hash, defaults_hash
+
+
+def get_content_encoding():
+    """
+    Choose the compression to apply to a response from the request's Accept-Encoding header
+    :return: 'gzip', 'deflate' or None
+    """
+    encodings = [(request.accept_encodings[encoding], encoding) for encoding in ('gzip', 'deflate')
+                 if request.accept_encodings[encoding] > 0]
+    return max(encodings)[1] if encodings else None
+
+
+def get_stored_template(template_hash):
+    """
+    Return a template already generated for its content hash, from the shared template cache or a complete job
+    :param template_hash: content hash of the amazonia version, defaults and application yaml
+    :return: cloud formation template json, or None if the template is not stored
+    """
+    template_cache = get_template_cache()
+    template_data = template_cache.get(template_hash) if template_cache is not None else None
+    if template_data is None:
+        template_data = get_job_store().get_template(template_hash)
+    return template_data
+
+
+def make_template_response(template_hash, template_data=None):
+    """
+    Create a template response that can be revalidated by clients and cached by intermediaries. The ETag is derived
+    from the request inputs rather than the template, so a matching If-None-Match is answered before generation, with
+    304 Not Modified for GET and HEAD requests and, as POST requests are not conditional reads, 412 Precondition Failed
+    for POST. Every response points at GET /templates/<hash>, where shared caches can reuse the template.
+    :param template_hash: content hash of the amazonia version, defaults and application yaml
+    :param template_data: function returning the template json, called only if the client needs the template
+    :return: Response
+    """
+    content_encoding = get_content_encoding()
+    # each encoding is a different representation, so it needs its own strong ETag
+    etag = template_hash + '-' + content_encoding if content_encoding else template_hash
+
+    if request.if_none_match.contains_weak(etag):
+        template_cache_requests.inc(result='hit')
+        response = Response(status=304 if request.method in ('GET', 'HEAD') else 412)
+    else:
+        template_cache_requests.inc(result='miss')
+        data = template_data().encode('utf-8')
+        if content_encoding == 'gzip':
+            data = gzip.compress(data, compresslevel=6)
+        elif content_encoding == 'deflate':
+            data = zlib.compress(data, 6)
+        response = Response(data, mimetype='Application/json')
+        if content_encoding:
+            response.headers['Content-Encoding'] = content_encoding
+
+    response.set_etag(etag)
+    # the template of a content hash never changes, so clients and shared caches can keep it for as long as they like
+    response.headers['Cache-Control'] = 'public, max-age={0}, s-maxage={0}'.format(app.config['TEMPLATE_MAX_AGE'])
+    response.headers['Content-Location'] = '/templates/{0}'.format(template_hash)
+    response.vary.add('Accept-Encoding')
+    return response
 
 
 @app.route('/yaml', methods=['POST', 'OPTIONS'])
 def get_cloud_formation():
 
-    __location__ = os.path.realpath(
-        os.path.join(os.getcwd(), os.path.dirname(__file__)))
     text_content = request.get_data(as_text=True)
-    json_content = yaml.safe_load(text_content)
-    default_yaml = amz.read_yaml(os.path.join(__location__, '../amazonia/defaults.yaml'))
+    defaults_hash, registered_defaults_hash = get_request_defaults()
+    template_hash = TemplateCache.get_key(text_content, defaults_hash)
+
+    # yaml is parsed in the worker process along with the rest of the cpu bound generation
+    return make_template_response(template_hash, lambda: generate_cached_template(template_hash, text_content,
+                                                                                  registered_defaults_hash))
+
+
+@app.route('/templates/<template_hash>', methods=['GET'])
+def get_template(template_hash):
+    """
+    Return a template by the content hash of its inputs, as given in the Content-Location of /yaml and job template
+    responses. The template must be in the shared template cache or belong to a complete job.
+    """
+    template_data = get_stored_template(template_hash)
+    if template_data is None:
+        return not_found(None)
+    return make_template_response(template_hash, lambda: template_data)
+
 
-    result = amz.generate_template(json_content, default_yaml)
+@app.route('/defaults', methods=['PUT', 'OPTIONS'])
+def put_defaults():
+    """
+    Register a defaults document, requests then reference it by the returned hash in a 'defaults' query parameter or
+    X-Amazonia-Defaults header rather than using the server's defaults
+    """
+    defaults_hash = get_defaults_registry().add(request.get_data(as_text=True))
+    return make_response(jsonify({'hash': defaults_hash}), 201)
 
-    return Response(result, mimetype='Application/json')
+
+@app.route('/yaml/validate', methods=['POST', 'OPTIONS'])
+def validate_cloud_formation():
+
+    text_content = request.get_data(as_text=True)
+    try:
+        json_content = load_yaml(text_content)
+    except yaml.YAMLError as error:
+        return make_response(jsonify({'valid': False, 'errors': [str(error)]}), 422)
+    registered_defaults_hash = get_request_defaults()[1]
+    if registered_defaults_hash is None:
+        default_yaml = amz.read_yaml(app.config['DEFAULT_YAML_PATH'])
+    else:
+        default_yaml = get_defaults_registry().get(registered_defaults_hash)
+
+    errors = amz.validate_template(json_content, default_yaml)
+
+    return make_response(jsonify({'valid': not errors, 'errors': errors}), 422 if errors else 200)
+
+
+@app.route('/yaml/batch', methods=['POST', 'OPTIONS'])
+def get_cloud_formation_batch():
+    """
+    Generate a template for each application in a list or multi document yaml stream. A document of the form
+    {'applications': [...], 'defaults': {...}} may be used to override individual default values for the batch, on top
+    of any leading document holding only defaults.
+    Results are streamed as newline delimited json in the order they complete, each line holding the index of the
+    application and either its template or an error.
+    """
+    text_content = request.get_data(as_text=True)
+    applications, default_overrides = get_batch_applications(load_yaml_documents(text_content))
+    registered_defaults_hash = get_request_defaults()[1]
+    pool = get_generator_pool()
+
+    def generate_results():
+        for index, template_data, error in pool.generate_unordered(applications, default_overrides,
+                                                                   defaults_hash=registered_defaults_hash):
+            if error is None:
+                # the template is already single line json, so embed it rather than re-serialising it
+                yield '{{"index": {0}, "template": {1}}}\n'.format(index, template_data)
+            else:
+                yield json.dumps({'index': index, 'error': str(error)}) + '\n'
+
+    return Response(generate_results(), mimetype='application/x-ndjson')
+
+
+@app.route('/jobs', methods=['POST', 'OPTIONS'])
+def create_job():
+    """
+    Queue an application for generation and return the job id immediately. The job id is the content hash of the
+    amazonia version, defaults and application yaml, so identical submissions share a job and its template, unless
+    the job failed or went stale, in which case it is replaced and generated again.
+    """
+    text_content = request.get_data(as_text=True)
+    defaults_hash, registered_defaults_hash = get_request_defaults()
+    job_id = TemplateCache.get_key(text_content, defaults_hash)
+    job_store = get_job_store()
+
+    if job_store.create(job_id):
+        try:
+            get_generator_pool().submit_job(job_store.directory, job_id, text_content,
+                                            defaults_hash=registered_defaults_hash)
+        except GeneratorPoolBusyError:
+            job_store.remove(job_id)
+            raise
+
+    response = make_response(jsonify(job_store.get(job_id)), 202)
+    response.headers['Location'] = '/jobs/{0}'.format(job_id)
+    return response
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Return the status of a job and the generation phases it has completed
+    """
+    status = get_job_store().get(job_id)
+    if status is None:
+        return not_found(None)
+    return jsonify(status)
+
+
+@app.route('/jobs/<job_id>/template', methods=['GET'])
+def get_job_template(job_id):
+    """
+    Return the template of a complete job, 202 with Retry-After while the job is queued or running and 422 if the job
+    failed
+    """
+    job_store = get_job_store()
+    status = job_store.get(job_id)
+    if status is None:
+        return not_found(None)
+    if status['status'] == JOB_FAILED:
+        return make_response(jsonify({'error': status['error']}), 422)
+    if status['status'] != JOB_COMPLETE:
+        response = make_response(jsonify(status), 202)
+        response.headers['Retry-After'] = str(app.config['RETRY_AFTER'])
+        return response
+    template_data = job_store.get_template(job_id)
+    if template_data is None:
+        # evicted between reading the status and the template
+        return not_found(None)
+    return make_template_response(job_id, lambda: template_data)
+
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    http_requests.inc(endpoint=endpoint, status=response.status_code)
+    if 'request_start' in g:
+        http_request_duration.observe(time.perf_counter() - g.request_start, endpoint=endpoint)
+    return response
 
 
 @app.errorhandler(404)
@@ -30,6 +420,23 @@ def not_found(error):
     return make_response(jsonify({'error': 'Not found'}), 404)
 
 
+@app.errorhandler(GeneratorPoolBusyError)
+def busy_handler(error):
+    response = make_response(jsonify({'error': str(error)}), 503)
+    response.headers['Retry-After'] = str(app.config['RETRY_AFTER'])
+    return response
+
+
+@app.errorhandler(UnknownDefaultsError)
+def unknown_defaults_handler(error):
+    return make_response(jsonify({'error': str(error)}), 404)
+
+
+@app.errorhandler(GeneratorTimeoutError)
+def timeout_handler(error):
+    return make_response(jsonify({'error': str(error)}), 504)
+
+
 @app.errorhandler(Exception)
 def all_exception_handler(error):
     return make_response(jsonify({'error': str(error)}), 422)
@@ -45,4 +452,23 @@ def no_permission(error):
     return make_response(jsonify({'error': str(error)}), 500)
 
 if __name__ == '__main__':
-    app.run('0.0.0.0')
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='0.0.0.0', help='Interface to listen on')
+    parser.add_argument('--port', default=5000, type=int, help='Port to listen on')
+    parser.add_argument('-w', '--workers', type=int,
+                        help='Number of template generator processes, defaults to the number of cpus')
+    parser.add_argument('-q', '--max-queue', type=int,
+                        help='Number of requests that may wait for a generator before returning 503, '
+                             'defaults to four per generator')
+    parser.add_argument('--timeout', type=float, default=app.config['GENERATOR_TIMEOUT'],
+                        help='Seconds to wait for a template before returning 504')
+    args = parser.parse_args()
+
+    app.config.update(GENERATOR_WORKERS=args.workers or app.config['GENERATOR_WORKERS'],
+                      GENERATOR_MAX_QUEUE=args.max_queue if args.max_queue is not None
+                      else app.config['GENERATOR_MAX_QUEUE'],
+                      GENERATOR_TIMEOUT=args.timeout)
+
+    # start the generators before accepting requests, request threads only wait on the generators
+    get_generator_pool()
+    app.run(args.host, args.port, threaded=True)